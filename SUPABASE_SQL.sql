@@ -14,6 +14,10 @@ CREATE TABLE IF NOT EXISTS license_plates (
 -- Create indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_plate_number ON license_plates(plate_number);
 CREATE INDEX IF NOT EXISTS idx_timestamp ON license_plates(timestamp);
+-- Keyset pagination walks (timestamp, id) in descending order
+CREATE INDEX IF NOT EXISTS idx_timestamp_id ON license_plates(timestamp DESC, id DESC);
+-- Per-camera counts and queries filter on location and time together
+CREATE INDEX IF NOT EXISTS idx_camera_timestamp ON license_plates(camera_location, timestamp);
 
 -- Enable Row Level Security (RLS) for better security
 ALTER TABLE license_plates ENABLE ROW LEVEL SECURITY;
@@ -37,3 +41,139 @@ LIMIT 100;
 -- Grant access to the view
 GRANT SELECT ON recent_plates TO anon;
 GRANT SELECT ON recent_plates TO authenticated;
+
+-- Count distinct plates in the database instead of transferring every row.
+-- Every filter is optional; call it through PostgREST as rpc('count_unique_plates')
+CREATE OR REPLACE FUNCTION count_unique_plates(
+    start_ts TIMESTAMPTZ DEFAULT NULL,
+    end_ts TIMESTAMPTZ DEFAULT NULL,
+    camera VARCHAR DEFAULT NULL
+) RETURNS BIGINT
+LANGUAGE sql STABLE AS $$
+    SELECT COUNT(DISTINCT plate_number)
+    FROM license_plates
+    WHERE (start_ts IS NULL OR timestamp >= start_ts)
+      AND (end_ts IS NULL OR timestamp <= end_ts)
+      AND (camera IS NULL OR camera_location = camera);
+$$;
+
+GRANT EXECUTE ON FUNCTION count_unique_plates(TIMESTAMPTZ, TIMESTAMPTZ, VARCHAR) TO anon;
+GRANT EXECUTE ON FUNCTION count_unique_plates(TIMESTAMPTZ, TIMESTAMPTZ, VARCHAR) TO authenticated;
+
+-- Per-camera traffic rollups maintained by the LPR system (minute and hour buckets).
+-- Sums are stored so means can be combined; plate_sketch is a HyperLogLog of the
+-- bucket's plates used to keep distinct_plates correct across restarts
+CREATE TABLE IF NOT EXISTS plate_rollups (
+    camera_location VARCHAR(100) NOT NULL,
+    resolution VARCHAR(10) NOT NULL CHECK (resolution IN ('minute', 'hour')),
+    bucket_start TIMESTAMPTZ NOT NULL,
+    plate_count INTEGER NOT NULL DEFAULT 0,
+    distinct_plates INTEGER NOT NULL DEFAULT 0,
+    confidence_sum FLOAT NOT NULL DEFAULT 0,
+    confidence_count INTEGER NOT NULL DEFAULT 0,
+    latency_sum FLOAT NOT NULL DEFAULT 0,
+    latency_count INTEGER NOT NULL DEFAULT 0,
+    plate_sketch TEXT,
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (camera_location, resolution, bucket_start)
+);
+
+CREATE INDEX IF NOT EXISTS idx_rollups_resolution_bucket ON plate_rollups(resolution, bucket_start DESC);
+
+ALTER TABLE plate_rollups ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Enable all operations for all users" ON plate_rollups
+    FOR ALL USING (true) WITH CHECK (true);
+
+-- Union of two base64 plate sketches (HyperLogLog: precision byte, then one byte per register)
+CREATE OR REPLACE FUNCTION merge_plate_sketches(a TEXT, b TEXT)
+RETURNS TEXT
+LANGUAGE plpgsql IMMUTABLE
+AS $$
+DECLARE
+    x BYTEA;
+    y BYTEA;
+BEGIN
+    IF a IS NULL OR b IS NULL THEN
+        RETURN COALESCE(a, b);
+    END IF;
+    x := decode(a, 'base64');
+    y := decode(b, 'base64');
+    FOR i IN 1 .. length(x) - 1 LOOP
+        IF get_byte(y, i) > get_byte(x, i) THEN
+            x := set_byte(x, i, get_byte(y, i));
+        END IF;
+    END LOOP;
+    RETURN translate(encode(x, 'base64'), E'\n', '');
+END;
+$$;
+
+-- Distinct count estimated from a plate sketch (same estimator as hyperloglog.py)
+CREATE OR REPLACE FUNCTION plate_sketch_count(sketch TEXT)
+RETURNS INTEGER
+LANGUAGE plpgsql IMMUTABLE
+AS $$
+DECLARE
+    x BYTEA := decode(sketch, 'base64');
+    m INTEGER := length(x) - 1;
+    total FLOAT := 0;
+    zeros INTEGER := 0;
+    alpha FLOAT;
+    estimate FLOAT;
+BEGIN
+    FOR i IN 1 .. m LOOP
+        total := total + power(2, -get_byte(x, i));
+        IF get_byte(x, i) = 0 THEN
+            zeros := zeros + 1;
+        END IF;
+    END LOOP;
+    alpha := CASE m WHEN 16 THEN 0.673 WHEN 32 THEN 0.697 WHEN 64 THEN 0.709
+                    ELSE 0.7213 / (1 + 1.079 / m) END;
+    estimate := alpha * m * m / total;
+    IF estimate <= 2.5 * m AND zeros > 0 THEN
+        estimate := m * ln(m::FLOAT / zeros);
+    END IF;
+    RETURN round(estimate);
+END;
+$$;
+
+-- Adds rollup deltas from the LPR system: sums are added and sketches unioned under the
+-- row lock taken by ON CONFLICT, so concurrent writers never overwrite each other
+CREATE OR REPLACE FUNCTION add_plate_rollups(deltas JSONB)
+RETURNS VOID
+LANGUAGE sql
+AS $$
+    INSERT INTO plate_rollups (camera_location, resolution, bucket_start, plate_count, distinct_plates,
+                               confidence_sum, confidence_count, latency_sum, latency_count, plate_sketch)
+    SELECT camera_location, resolution, bucket_start, plate_count, distinct_plates,
+           confidence_sum, confidence_count, latency_sum, latency_count, plate_sketch
+    FROM jsonb_populate_recordset(NULL::plate_rollups, deltas)
+    ON CONFLICT (camera_location, resolution, bucket_start) DO UPDATE SET
+        plate_count = plate_rollups.plate_count + EXCLUDED.plate_count,
+        confidence_sum = plate_rollups.confidence_sum + EXCLUDED.confidence_sum,
+        confidence_count = plate_rollups.confidence_count + EXCLUDED.confidence_count,
+        latency_sum = plate_rollups.latency_sum + EXCLUDED.latency_sum,
+        latency_count = plate_rollups.latency_count + EXCLUDED.latency_count,
+        plate_sketch = merge_plate_sketches(plate_rollups.plate_sketch, EXCLUDED.plate_sketch),
+        distinct_plates = plate_sketch_count(merge_plate_sketches(plate_rollups.plate_sketch,
+                                                                  EXCLUDED.plate_sketch)),
+        updated_at = NOW();
+$$;
+
+GRANT EXECUTE ON FUNCTION add_plate_rollups(JSONB) TO anon;
+GRANT EXECUTE ON FUNCTION add_plate_rollups(JSONB) TO authenticated;
+
+-- Dashboard view over the rollups
+CREATE OR REPLACE VIEW plate_rollup_stats AS
+SELECT
+    camera_location,
+    resolution,
+    bucket_start,
+    plate_count,
+    distinct_plates,
+    confidence_sum / NULLIF(confidence_count, 0) AS mean_confidence,
+    1000 * latency_sum / NULLIF(latency_count, 0) AS mean_latency_ms
+FROM plate_rollups;
+
+GRANT SELECT ON plate_rollup_stats TO anon;
+GRANT SELECT ON plate_rollup_stats TO authenticated;
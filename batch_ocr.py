@@ -0,0 +1,94 @@
+import bisect
+from typing import Dict, List, Tuple
+
+import cv2
+import numpy as np
+
+# Page segmentation mode "uniform block of text": one montage line per crop
+BATCH_PSM = 6
+
+
+class PlateMontage:
+    """Tiles binarized plate crops into one image, one crop per text line.
+
+    Every crop is scaled to a common height, forced to dark-on-light polarity
+    and separated from its neighbours by blank bands, so word boxes returned by
+    Tesseract can be mapped back to the crop they came from.
+    """
+
+    def __init__(self, binary_crops: List[np.ndarray], line_height: int = 48,
+                 separator: int = 24, margin: int = 16):
+        self.line_height = line_height
+        self.separator = separator
+        self.margin = margin
+        self.line_tops: List[int] = []
+        self.image = self._build(binary_crops)
+
+    def _normalize(self, crop: np.ndarray) -> np.ndarray:
+        """Resize a binary crop to the line height with dark text on white"""
+        h, w = crop.shape[:2]
+        width = max(1, int(round(w * self.line_height / float(h))))
+        line = cv2.resize(crop, (width, self.line_height), interpolation=cv2.INTER_NEAREST)
+
+        # Tesseract expects dark glyphs on a light background
+        if line.mean() < 127:
+            line = cv2.bitwise_not(line)
+        return line
+
+    def _build(self, binary_crops: List[np.ndarray]) -> np.ndarray:
+        lines = [self._normalize(crop) for crop in binary_crops]
+        width = max(line.shape[1] for line in lines) + 2 * self.margin
+        height = (2 * self.margin + len(lines) * self.line_height
+                  + (len(lines) - 1) * self.separator)
+
+        montage = np.full((height, width), 255, dtype=np.uint8)
+        top = self.margin
+        for line in lines:
+            montage[top:top + self.line_height, self.margin:self.margin + line.shape[1]] = line
+            self.line_tops.append(top)
+            top += self.line_height + self.separator
+
+        return montage
+
+    def line_index(self, word: Dict) -> int:
+        """Index of the crop a word box belongs to, or -1 if it falls in a separator"""
+        center = word['top'] + word['height'] / 2.0
+        index = bisect.bisect_right(self.line_tops, center) - 1
+        if index < 0 or center > self.line_tops[index] + self.line_height:
+            return -1
+        return index
+
+    def split_words(self, words: List[Dict]) -> List[List[Dict]]:
+        """Group OCR word boxes by source crop, ordered left to right"""
+        grouped = [[] for _ in self.line_tops]
+        for word in words:
+            index = self.line_index(word)
+            if index >= 0:
+                grouped[index].append(word)
+
+        for line_words in grouped:
+            line_words.sort(key=lambda word: word['left'])
+        return grouped
+
+
+def read_plates_batch(engine, binary_crops: List[np.ndarray]) -> List[Tuple[str, List[float]]]:
+    """OCR many binarized plate crops with a single Tesseract invocation.
+
+    Returns (text, per-character confidence) for each crop, in input order.
+    Confidences are 0-1 and come from the word each character belongs to.
+    """
+    if not binary_crops:
+        return []
+
+    montage = PlateMontage(binary_crops)
+    words = engine.read_words(montage.image, psm=BATCH_PSM)
+
+    readings = []
+    for line_words in montage.split_words(words):
+        text, confidences = '', []
+        for word in line_words:
+            word_text = ''.join(word['text'].split())
+            text += word_text
+            confidences += [max(word['conf'], 0) / 100.0] * len(word_text)
+        readings.append((text, confidences))
+    return readings
@@ -0,0 +1 @@
+"""Synthetic plate scenes and per-stage benchmarks for the LPR pipeline (see benchmarks/run.py)"""
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Benchmark the LPR pipeline stage by stage on synthetic plate scenes.
+
+    python -m benchmarks.run --frames 50 --output results.json
+    python -m benchmarks.run --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json   # exit code 1 on regression
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from benchmarks.synthetic import generate_crop, generate_scene, random_plate_text
+
+STAGES = ('preprocess', 'cascade', 'contours', 'locate', 'ocr', 'end_to_end', 'storage')
+
+# A stage regresses when its median latency grows by more than --tolerance
+# or any of its accuracy figures drops by more than this
+ACCURACY_TOLERANCE = 0.02
+
+
+def latency_summary(latencies: Sequence[float]) -> Dict:
+    """Percentiles (ms) and throughput (calls/s) of per-call latencies in seconds"""
+    values = np.asarray(latencies, dtype=np.float64) * 1000
+    return {
+        'calls': len(values),
+        'mean_ms': float(values.mean()),
+        'p50_ms': float(np.percentile(values, 50)),
+        'p95_ms': float(np.percentile(values, 95)),
+        'p99_ms': float(np.percentile(values, 99)),
+        'throughput_per_s': float(len(values) / max(values.sum() / 1000, 1e-9)),
+    }
+
+
+def time_calls(fn: Callable, items: Sequence, repeat: int = 1, warmup: int = 2) -> Tuple[List[float], List]:
+    """Run fn on every item repeat times; returns (latencies, results of the last pass)"""
+    for item in items[:warmup]:
+        fn(item)
+    latencies, results = [], []
+    for _ in range(repeat):
+        results = []
+        for item in items:
+            started_at = time.perf_counter()
+            results.append(fn(item))
+            latencies.append(time.perf_counter() - started_at)
+    return latencies, results
+
+
+def box_iou(a, b) -> float:
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    inter_w = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    inter_h = max(0, min(ay + ah, by + bh) - max(ay, by))
+    intersection = inter_w * inter_h
+    union = aw * ah + bw * bh - intersection
+    return intersection / union if union else 0.0
+
+
+def detection_accuracy(scenes, predicted_boxes) -> Dict:
+    """Recall and precision of candidate boxes against the ground truth (IoU >= 0.5)"""
+    truth = found = predicted = 0
+    for scene, boxes in zip(scenes, predicted_boxes):
+        truth += len(scene.plates)
+        predicted += len(boxes)
+        found += sum(any(box_iou(plate['bbox'], box) >= 0.5 for box in boxes) for plate in scene.plates)
+    return {'recall': found / truth if truth else 0.0,
+            'precision': found / predicted if predicted else 0.0}
+
+
+def read_accuracy(scenes, predicted_plates) -> Dict:
+    """Share of ground-truth plates read exactly, and of reads that were right"""
+    truth = correct = reads = 0
+    for scene, plates in zip(scenes, predicted_plates):
+        texts = [plate['text'] for plate in plates]
+        truth += len(scene.plates)
+        reads += len(texts)
+        correct += sum(plate['text'] in texts for plate in scene.plates)
+    return {'recall': correct / truth if truth else 0.0,
+            'precision': correct / reads if reads else 0.0}
+
+
+def ocr_unavailable(detector) -> Optional[str]:
+    """Why OCR stages cannot run here, or None"""
+    if detector.glyphs is not None or detector.ocr_engine.persistent:
+        return None
+    try:
+        import pytesseract
+        pytesseract.get_tesseract_version()
+        return None
+    except Exception as e:
+        return f"Tesseract unavailable ({e.__class__.__name__}) and no --glyph-model"
+
+
+def bench_detector(detector, scenes, crops, stages, repeat) -> Dict:
+    from plate_detector import FrameContext
+    results = {}
+    images = [scene.image for scene in scenes]
+
+    def run(stage, fn, items, accuracy=None):
+        latencies, outputs = time_calls(fn, items, repeat)
+        results[stage] = {'latency': latency_summary(latencies)}
+        if accuracy is not None:
+            results[stage]['accuracy'] = accuracy(outputs)
+
+    # Every call gets a fresh FrameContext, so nothing is served from a previous frame's cache
+    if 'preprocess' in stages:
+        run('preprocess', lambda image: detector.preprocess_image(image, FrameContext(image)), images)
+    if 'cascade' in stages:
+        if detector.plate_cascade is None:
+            results['cascade'] = {'skipped': 'cascade classifier not available'}
+        else:
+            run('cascade', lambda image: detector.detect_plates_cascade(image, FrameContext(image)), images,
+                lambda boxes: detection_accuracy(scenes, [[tuple(box) for box in b] for b in boxes]))
+    if 'contours' in stages:
+        run('contours', lambda image: detector.detect_plates_contours(image, FrameContext(image)), images,
+            lambda boxes: detection_accuracy(scenes, boxes))
+    if 'locate' in stages:
+        run('locate', lambda image: detector.locate_plates(image), images,
+            lambda boxes: detection_accuracy(scenes, boxes))
+
+    reason = ocr_unavailable(detector)
+    if 'ocr' in stages:
+        if reason:
+            results['ocr'] = {'skipped': reason}
+        else:
+            texts = [text for text, _ in crops]
+            run('ocr', lambda crop: detector.extract_plate_text(crop[1], with_confidence=True), crops,
+                lambda readings: {'exact': sum(r['text'] == t for r, t in zip(readings, texts)) / len(texts)})
+    if 'end_to_end' in stages:
+        if reason:
+            results['end_to_end'] = {'skipped': reason}
+        else:
+            run('end_to_end', lambda image: detector.detect_and_read_plates(image), images,
+                lambda plates: read_accuracy(scenes, plates))
+    return results
+
+
+def bench_storage(records: int, batch_size: int = 100) -> Dict:
+    """Single-record and batched inserts into a throwaway SQLite database"""
+    from sqlite_manager import SQLiteManager
+    rng = np.random.default_rng(0)
+    rows = [{'plate_number': random_plate_text(rng), 'confidence_score': 0.9, 'image_path': 'bench.jpg',
+             'camera_location': 'Benchmark'} for _ in range(records)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        storage = SQLiteManager(os.path.join(directory, 'bench.db'))
+        try:
+            single, _ = time_calls(lambda row: storage.insert_plate_records([row]), rows)
+            batches = [rows[i:i + batch_size] for i in range(0, len(rows), batch_size)]
+            batched, _ = time_calls(storage.insert_plate_records, batches, warmup=0)
+        finally:
+            storage.close()
+
+    batched_summary = latency_summary(batched)
+    batched_summary['records_per_s'] = len(rows) / max(sum(batched), 1e-9)
+    return {'latency': latency_summary(single), 'batched': batched_summary, 'batch_size': batch_size}
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> Dict:
+    """Per-stage change against a baseline run, and the stages that regressed"""
+    comparison, regressions = {}, []
+    for stage, current in results['stages'].items():
+        base = baseline.get('stages', {}).get(stage)
+        if not base or 'latency' not in base or 'latency' not in current:
+            continue
+
+        p50_change = current['latency']['p50_ms'] / max(base['latency']['p50_ms'], 1e-9) - 1
+        throughput_change = (current['latency']['throughput_per_s']
+                             / max(base['latency']['throughput_per_s'], 1e-9) - 1)
+        accuracy_change = {key: value - base.get('accuracy', {}).get(key, value)
+                           for key, value in current.get('accuracy', {}).items()}
+        regressed = p50_change > tolerance or any(change < -ACCURACY_TOLERANCE
+                                                  for change in accuracy_change.values())
+        comparison[stage] = {'p50_change': p50_change, 'throughput_change': throughput_change,
+                             'accuracy_change': accuracy_change, 'regressed': regressed}
+        if regressed:
+            regressions.append(stage)
+    return {'baseline_created_at': baseline.get('created_at'), 'tolerance': tolerance,
+            'stages': comparison, 'regressions': regressions}
+
+
+def print_report(results: Dict):
+    print(f"\n{'stage':<12} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'per s':>9}  accuracy")
+    for stage, result in results['stages'].items():
+        if 'skipped' in result:
+            print(f"{stage:<12} skipped: {result['skipped']}")
+            continue
+        latency = result['latency']
+        accuracy = ', '.join(f"{key} {value:.0%}" for key, value in result.get('accuracy', {}).items())
+        print(f"{stage:<12} {latency['p50_ms']:>9.2f} {latency['p95_ms']:>9.2f} {latency['p99_ms']:>9.2f} "
+              f"{latency['throughput_per_s']:>9.1f}  {accuracy}")
+        if 'batched' in result:
+            print(f"{'':<12} batches of {result['batch_size']}: {result['batched']['records_per_s']:.0f} records/s")
+
+    comparison = results.get('comparison')
+    if comparison:
+        print(f"\nAgainst baseline from {comparison['baseline_created_at']}:")
+        for stage, change in comparison['stages'].items():
+            flag = "REGRESSED" if change['regressed'] else "ok"
+            print(f"  {stage:<12} p50 {change['p50_change']:+.0%} | throughput {change['throughput_change']:+.0%} "
+                  f"| {flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark LPR pipeline stages on synthetic plate scenes')
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=list(STAGES), help='Stages to run')
+    parser.add_argument('--frames', type=int, default=30, help='Synthetic scenes (and OCR crops) to generate')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed passes over the scenes per stage')
+    parser.add_argument('--width', type=int, default=1280, help='Scene width in pixels')
+    parser.add_argument('--height', type=int, default=720, help='Scene height in pixels')
+    parser.add_argument('--plates', type=int, default=1, help='Plates per scene')
+    parser.add_argument('--noise', type=float, default=4.0, help='Gaussian noise standard deviation')
+    parser.add_argument('--blur', type=float, default=0.0, help='Gaussian blur sigma (0: sharp)')
+    parser.add_argument('--skew', type=float, default=0.0, help='Largest plate rotation in degrees')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the scene generator')
+    parser.add_argument('--records', type=int, default=1000, help='Records written in the storage stage')
+    parser.add_argument('--threads', type=int, help='OpenCV threads (fix it for comparable runs)')
+    parser.add_argument('--detect-width', type=int, help='Detector option, as in main.py')
+    parser.add_argument('--glyph-model', help='Detector option, as in main.py')
+    parser.add_argument('--ocr-cache-size', type=int, default=0,
+                        help='OCR result cache size (default 0, so repeated crops are really read)')
+    parser.add_argument('--output', default='benchmark_results.json', help='Where to write the JSON results')
+    parser.add_argument('--baseline', help='Compare against this results file; exit 1 if a stage regressed')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Allowed growth of a stage\'s median latency against the baseline (0.2 = 20%%)')
+    parser.add_argument('--save-baseline', metavar='PATH', help='Also save these results as a baseline')
+    args = parser.parse_args()
+
+    if args.threads is not None:
+        cv2.setNumThreads(args.threads)
+
+    from plate_detector import LicensePlateDetector
+    detector = LicensePlateDetector(detection_width=args.detect_width, glyph_model=args.glyph_model,
+                                    ocr_cache_size=args.ocr_cache_size)
+
+    scenes = [generate_scene(args.width, args.height, args.plates, args.noise, args.blur, args.skew,
+                             seed=args.seed + i) for i in range(args.frames)]
+    rng = np.random.default_rng(args.seed)
+    crops = []
+    for i in range(args.frames):
+        text = random_plate_text(rng)
+        crops.append((text, generate_crop(text, noise=args.noise, blur=args.blur, skew=args.skew,
+                                          seed=args.seed + i)))
+
+    config = {key: value for key, value in vars(args).items()
+              if key not in ('output', 'baseline', 'save_baseline')}
+    results = {
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'config': config,
+        'environment': {'python': platform.python_version(), 'opencv': cv2.__version__,
+                        'numpy': np.__version__, 'machine': platform.machine(),
+                        'cpus': os.cpu_count(), 'opencv_threads': cv2.getNumThreads()},
+        'stages': {},
+    }
+
+    try:
+        results['stages'] = bench_detector(detector, scenes, crops, args.stages, args.repeat)
+    finally:
+        detector.close()
+    if 'storage' in args.stages:
+        results['stages']['storage'] = bench_storage(args.records)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            results['comparison'] = compare(results, json.load(f), args.tolerance)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump({key: value for key, value in results.items() if key != 'comparison'}, f, indent=2)
+
+    print_report(results)
+    print(f"\nResults written to {args.output}")
+    if results.get('comparison', {}).get('regressions'):
+        print(f"Regressed: {', '.join(results['comparison']['regressions'])}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
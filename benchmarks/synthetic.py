@@ -0,0 +1,116 @@
+from typing import Dict, List, NamedTuple, Optional
+
+import cv2
+import numpy as np
+
+from ocr_pool import PLATE_CHARSET
+
+PLATE_ASPECT = 4.0
+
+
+class Scene(NamedTuple):
+    image: np.ndarray
+    plates: List[Dict]  # {'text', 'bbox': (x, y, w, h)} per plate, in image coordinates
+
+
+def random_plate_text(rng: np.random.Generator, length: Optional[int] = None) -> str:
+    length = length or int(rng.integers(6, 8))
+    return ''.join(rng.choice(list(PLATE_CHARSET), size=length))
+
+
+def render_plate(text: str, width: int) -> np.ndarray:
+    """Dark-on-white plate with a border, the text scaled to fill it"""
+    height = max(12, int(round(width / PLATE_ASPECT)))
+    plate = np.full((height, width, 3), 245, dtype=np.uint8)
+    cv2.rectangle(plate, (1, 1), (width - 2, height - 2), (20, 20, 20), max(1, height // 25))
+
+    font, thickness = cv2.FONT_HERSHEY_SIMPLEX, max(1, height // 12)
+    (text_w, text_h), _ = cv2.getTextSize(text, font, 1.0, thickness)
+    scale = min(0.86 * width / text_w, 0.62 * height / text_h)
+    (text_w, text_h), _ = cv2.getTextSize(text, font, scale, thickness)
+    origin = ((width - text_w) // 2, (height + text_h) // 2)
+    cv2.putText(plate, text, origin, font, scale, (15, 15, 15), thickness, cv2.LINE_AA)
+    return plate
+
+
+def _skew(plate: np.ndarray, angle: float, shear: float):
+    """Rotate and shear a plate; returns the warped patch and its coverage mask"""
+    height, width = plate.shape[:2]
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    matrix[0, 1] += shear
+    corners = np.array([[0, 0, 1], [width, 0, 1], [0, height, 1], [width, height, 1]], dtype=np.float64)
+    warped = corners @ matrix.T
+    x0, y0 = warped.min(axis=0)
+    x1, y1 = warped.max(axis=0)
+    matrix[:, 2] -= (x0, y0)
+    size = (int(np.ceil(x1 - x0)), int(np.ceil(y1 - y0)))
+
+    patch = cv2.warpAffine(plate, matrix, size, flags=cv2.INTER_LINEAR)
+    mask = cv2.warpAffine(np.full((height, width), 255, dtype=np.uint8), matrix, size, flags=cv2.INTER_NEAREST)
+    return patch, mask
+
+
+def _degrade(image: np.ndarray, rng: np.random.Generator, noise: float, blur: float) -> np.ndarray:
+    if blur > 0:
+        image = cv2.GaussianBlur(image, (0, 0), blur)
+    if noise > 0:
+        image = np.clip(image + rng.normal(0, noise, image.shape), 0, 255).astype(np.uint8)
+    return image
+
+
+def _background(rng: np.random.Generator, width: int, height: int, clutter: int) -> np.ndarray:
+    """Gradient with random boxes, some of them plate-shaped and blank, to give the detectors decoys"""
+    gradient = np.linspace(rng.integers(40, 100), rng.integers(100, 170), height, dtype=np.float32)
+    image = np.repeat(np.repeat(gradient[:, None, None], width, axis=1), 3, axis=2).astype(np.uint8)
+    for _ in range(clutter):
+        w = int(rng.integers(width // 20, width // 5))
+        h = min(height - 1, int(w / rng.uniform(0.5, 5.0)))
+        x, y = int(rng.integers(0, width - w)), int(rng.integers(0, max(1, height - h)))
+        color = tuple(int(c) for c in rng.integers(0, 256, 3))
+        cv2.rectangle(image, (x, y), (x + w, y + h), color, -1 if rng.random() < 0.7 else 2)
+    return image
+
+
+def generate_scene(width: int = 1280, height: int = 720, plates: int = 1, noise: float = 4.0,
+                   blur: float = 0.0, skew: float = 0.0, clutter: int = 8, seed: int = 0) -> Scene:
+    """A frame with ``plates`` non-overlapping plates and their ground truth.
+
+    Plates are 12-20% of the frame width, rotated by up to ``skew`` degrees
+    (and sheared in proportion), pasted over a cluttered background, then
+    the whole frame gets Gaussian ``blur`` (sigma) and ``noise`` (std).
+    """
+    rng = np.random.default_rng(seed)
+    image = _background(rng, width, height, clutter)
+    placed = []
+    for _ in range(plates):
+        text = random_plate_text(rng)
+        plate = render_plate(text, int(width * rng.uniform(0.12, 0.2)))
+        angle = rng.uniform(-skew, skew) if skew else 0.0
+        patch, mask = _skew(plate, angle, np.tan(np.radians(angle)) * 0.5)
+        h, w = patch.shape[:2]
+
+        # A few tries at a free spot in the lower two thirds, where vehicles are
+        for _ in range(20):
+            x = int(rng.integers(0, width - w))
+            y = int(rng.integers(height // 3, height - h))
+            if all(x + w < px or px + pw < x or y + h < py or py + ph < y for px, py, pw, ph in
+                   (p['bbox'] for p in placed)):
+                break
+        else:
+            continue
+
+        region = image[y:y + h, x:x + w]
+        region[mask > 0] = patch[mask > 0]
+        placed.append({'text': text, 'bbox': (x, y, w, h)})
+
+    return Scene(_degrade(image, rng, noise, blur), placed)
+
+
+def generate_crop(text: str, width: int = 240, noise: float = 4.0, blur: float = 0.0,
+                  skew: float = 0.0, seed: int = 0) -> np.ndarray:
+    """A tight plate crop like the detector hands to OCR"""
+    rng = np.random.default_rng(seed)
+    angle = rng.uniform(-skew, skew) if skew else 0.0
+    patch, mask = _skew(render_plate(text, width), angle, np.tan(np.radians(angle)) * 0.5)
+    patch[mask == 0] = 90
+    return _degrade(patch, rng, noise, blur)
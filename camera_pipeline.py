@@ -0,0 +1,294 @@
+import queue
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+import cv2
+
+import metrics
+
+
+class DropOldestQueue:
+    """Bounded queue that discards its oldest item instead of blocking producers"""
+
+    def __init__(self, maxsize: int):
+        self._items = deque()
+        self._maxsize = maxsize
+        self._cond = threading.Condition()
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) >= self._maxsize:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout: Optional[float] = None):
+        """Pop the oldest item; raises queue.Empty on timeout"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items, timeout):
+                raise queue.Empty
+            return self._items.popleft()
+
+    def __len__(self):
+        with self._cond:
+            return len(self._items)
+
+
+class LatestFrameGrabber:
+    """Capture thread that drains the camera continuously and keeps only the freshest frame.
+
+    Reading as fast as the camera delivers stops the VideoCapture buffer from
+    filling up, so consumers never see frames that are seconds old.
+    """
+
+    def __init__(self, capture, on_frame=None):
+        self.capture = capture
+        self.on_frame = on_frame
+        self._cond = threading.Condition()
+        self._latest = None
+        self._running = True
+        self.frames = 0
+        self.failed = False
+        self._thread = threading.Thread(target=self._run, name='frame-grabber', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while self._running:
+            ret, frame = self.capture.read()
+            if not ret:
+                print("Error: Could not read frame")
+                self.failed = True
+                break
+
+            captured_at = time.time()
+            with self._cond:
+                self.frames += 1
+                self._latest = (self.frames, captured_at, frame)
+                self._cond.notify_all()
+
+            if self.on_frame is not None:
+                self.on_frame(self.frames, captured_at, frame)
+
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def latest(self, after: int = 0, timeout: Optional[float] = None):
+        """Newest (index, captured_at, frame) newer than ``after``, or None on timeout/stop"""
+        with self._cond:
+            self._cond.wait_for(lambda: not self._running or
+                                (self._latest is not None and self._latest[0] > after), timeout)
+            if self._latest is not None and self._latest[0] > after:
+                return self._latest
+            return None
+
+    def stop(self):
+        self._running = False
+        self._thread.join(timeout=2)
+
+
+class LatencyTracker:
+    """Thread-safe rolling window of latencies in seconds"""
+
+    def __init__(self, window: int = 1000):
+        self._values = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def add(self, seconds: float):
+        with self._lock:
+            self._values.append(seconds)
+            self.count += 1
+
+    def summary(self) -> Dict:
+        with self._lock:
+            values = sorted(self._values)
+        if not values:
+            return {'count': self.count, 'avg_ms': 0.0, 'p50_ms': 0.0, 'p95_ms': 0.0}
+        return {
+            'count': self.count,
+            'avg_ms': sum(values) / len(values) * 1000,
+            'p50_ms': values[len(values) // 2] * 1000,
+            'p95_ms': values[min(len(values) - 1, int(len(values) * 0.95))] * 1000,
+        }
+
+
+class CameraPipeline:
+    """Pipelined live camera mode: capture -> detect -> output, plus display on the main thread.
+
+    The capture thread keeps only the freshest frame and feeds detection through
+    a small drop-oldest queue, so a slow OCR call costs dropped frames rather
+    than growing lag. Detected plates go to an output stage that queues the DB
+    writes and measures capture-to-record latency.
+    """
+
+    WINDOW_NAME = 'LPR System - Live Detection'
+
+    def __init__(self, lpr_system, camera_index=0, detect_queue_size: int = 2,
+                 show: bool = True, report_interval: float = 10.0):
+        self.lpr_system = lpr_system
+        self.camera_index = camera_index
+        self.show = show
+        self.report_interval = report_interval
+
+        self.detect_queue = DropOldestQueue(detect_queue_size)
+        self.output_queue = queue.Queue()
+        self.detect_latency = LatencyTracker()
+        self.record_latency = LatencyTracker()
+        self.frames_detected = 0
+        self.plates_detected = 0
+
+        self._annotations: List[Dict] = []
+        self._annotations_lock = threading.Lock()
+        self._running = False
+
+    def _detect_loop(self):
+        """Detection stage: run detection/OCR on the freshest queued frame"""
+        tracker = self.lpr_system.tracker
+        while self._running:
+            try:
+                frame_index, captured_at, frame, region = self.detect_queue.get(timeout=0.1)
+            except queue.Empty:
+                # Tracks must still expire while no frames pass the gate
+                if tracker is not None:
+                    finished = tracker.expire()
+                    if finished:
+                        self.output_queue.put((time.time(), finished, None))
+                continue
+
+            try:
+                if tracker is not None:
+                    annotations, plates = self.lpr_system.track_plates(frame, region, captured_at)
+                else:
+                    plates = self.lpr_system.detector.detect_and_read_plates(frame, region=region)
+                    annotations = [{'text': plate['text'], 'bbox': plate['bbox']} for plate in plates]
+            except Exception as e:
+                print(f"Error detecting plates: {e}")
+                continue
+
+            self.frames_detected += 1
+            latency = time.time() - captured_at
+            self.detect_latency.add(latency)
+            metrics.observe_seconds('end_to_end', latency)
+            self.output_queue.put((captured_at, plates, annotations))
+
+        if tracker is not None:
+            self.output_queue.put((time.time(), tracker.flush(), None))
+        self.output_queue.put(None)
+
+    def _output_loop(self):
+        """Output stage: queue DB writes and publish annotations for display"""
+        while True:
+            item = self.output_queue.get()
+            if item is None:
+                return
+
+            # annotations is None for tracker expiries, which keep the current overlay
+            captured_at, plates, annotations = item
+            for plate in plates:
+                plate_text = plate['text']
+                self.plates_detected += 1
+
+                # Tracked plates are measured from the last frame the vehicle was seen in
+                def on_stored(future, text=plate_text, captured_at=plate.get('last_seen', captured_at)):
+                    if future.result() is not None:
+                        self.record_latency.add(time.time() - captured_at)
+                        print(f"✓ Live detection: {text}")
+
+                self.lpr_system.store_plate(plate_text, confidence=plate.get('confidence'),
+                                            wait=False, callback=on_stored,
+                                            latency=time.time() - plate.get('last_seen', captured_at))
+
+            if annotations is not None:
+                with self._annotations_lock:
+                    self._annotations = annotations
+
+    def _annotate(self, frame):
+        """Draw the most recent detections onto a display frame"""
+        with self._annotations_lock:
+            annotations = list(self._annotations)
+
+        for annotation in annotations:
+            x, y, w, h = annotation['bbox']
+            cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
+            cv2.putText(frame, annotation['text'], (x, y - 10),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
+        return frame
+
+    def stats(self, grabber: LatestFrameGrabber) -> Dict:
+        return {
+            'frames_captured': grabber.frames,
+            'frames_detected': self.frames_detected,
+            'frames_dropped': self.detect_queue.dropped,
+            'plates_detected': self.plates_detected,
+            'capture_to_detection': self.detect_latency.summary(),
+            'capture_to_record': self.record_latency.summary(),
+        }
+
+    def report(self, grabber: LatestFrameGrabber):
+        stats = self.stats(grabber)
+        detection = stats['capture_to_detection']
+        record = stats['capture_to_record']
+        print(f"Pipeline: {stats['frames_captured']} captured | {stats['frames_detected']} detected | "
+              f"{stats['frames_dropped']} dropped | capture->detection avg {detection['avg_ms']:.0f} ms "
+              f"p95 {detection['p95_ms']:.0f} ms | capture->record avg {record['avg_ms']:.0f} ms "
+              f"p95 {record['p95_ms']:.0f} ms")
+
+    def run(self):
+        """Run until the stream ends or 'q' is pressed"""
+        cap = cv2.VideoCapture(self.camera_index)
+        if not cap.isOpened():
+            print(f"Error: Could not open camera {self.camera_index}")
+            return
+
+        print("Starting pipelined LPR detection. Press 'q' to quit.")
+        self._running = True
+        detector_thread = threading.Thread(target=self._detect_loop, name='plate-detect', daemon=True)
+        output_thread = threading.Thread(target=self._output_loop, name='plate-output', daemon=True)
+        detector_thread.start()
+        output_thread.start()
+
+        def on_frame(index, captured_at, frame):
+            # Without a motion gate every frame is offered; drop-oldest keeps only the freshest
+            should_detect, region = self.lpr_system.gate_frame(frame, index, stride=1)
+            if should_detect:
+                self.detect_queue.put((index, captured_at, frame, region))
+
+        grabber = LatestFrameGrabber(cap, on_frame=on_frame)
+
+        last_report = time.time()
+        shown = 0
+        try:
+            while grabber.running:
+                latest = grabber.latest(after=shown, timeout=0.5)
+                if latest is None:
+                    continue
+
+                shown, _, frame = latest
+                if self.show:
+                    cv2.imshow(self.WINDOW_NAME, self._annotate(frame.copy()))
+                    if cv2.waitKey(1) & 0xFF == ord('q'):
+                        break
+
+                if time.time() - last_report >= self.report_interval:
+                    last_report = time.time()
+                    self.report(grabber)
+        finally:
+            grabber.stop()
+            self._running = False
+            detector_thread.join()
+            output_thread.join()
+            cap.release()
+            if self.show:
+                cv2.destroyAllWindows()
+            self.report(grabber)
+            self.lpr_system.finish_tracking()
+            self.lpr_system.report_motion_stats()
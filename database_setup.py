@@ -25,16 +25,38 @@ def create_database():
         # Create table for license plates
         create_table_query = """
         CREATE TABLE IF NOT EXISTS license_plates (
-            id INT AUTO_INCREMENT PRIMARY KEY,
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
             plate_number VARCHAR(20) NOT NULL,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            timestamp DATETIME(6) DEFAULT CURRENT_TIMESTAMP(6),
             confidence_score FLOAT,
             image_path VARCHAR(255),
-            camera_location VARCHAR(100)
+            camera_location VARCHAR(100),
+            INDEX idx_plate_number (plate_number),
+            INDEX idx_timestamp_id (timestamp, id),
+            INDEX idx_camera_timestamp (camera_location, timestamp)
         )
         """
         cursor.execute(create_table_query)
         
+        # Per-camera traffic rollups read by --mode stats
+        create_rollups_query = """
+        CREATE TABLE IF NOT EXISTS plate_rollups (
+            camera_location VARCHAR(100) NOT NULL,
+            resolution VARCHAR(10) NOT NULL,
+            bucket_start DATETIME NOT NULL,
+            plate_count INT NOT NULL DEFAULT 0,
+            distinct_plates INT NOT NULL DEFAULT 0,
+            confidence_sum DOUBLE NOT NULL DEFAULT 0,
+            confidence_count INT NOT NULL DEFAULT 0,
+            latency_sum DOUBLE NOT NULL DEFAULT 0,
+            latency_count INT NOT NULL DEFAULT 0,
+            plate_sketch TEXT,
+            PRIMARY KEY (camera_location, resolution, bucket_start),
+            INDEX idx_rollups_resolution_bucket (resolution, bucket_start)
+        )
+        """
+        cursor.execute(create_rollups_query)
+        
         print("Database and table created successfully!")
         return True
         
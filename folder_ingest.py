@@ -0,0 +1,207 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import cv2
+
+import metrics
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.tiff')
+
+# Detector owned by each worker process (created once by the pool initializer)
+_worker_detector = None
+
+
+def iter_image_paths(folder_path: str, recursive: bool = False) -> Iterator[str]:
+    """Lazily yield image paths under a folder using os.scandir"""
+    pending = [folder_path]
+    while pending:
+        directory = pending.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive:
+                            pending.append(entry.path)
+                    elif entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                        yield entry.path
+        except OSError as e:
+            print(f"Error scanning {directory}: {e}")
+
+
+def iter_chunks(iterable, size: int) -> Iterator[List]:
+    """Split an iterable into lists of at most ``size`` items"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _init_worker(detector_options: Dict, enable_metrics: bool = False):
+    """Process pool initializer: load the cascade and OCR engine once per worker"""
+    global _worker_detector
+    metrics.init_worker(enable_metrics)
+    from plate_detector import LicensePlateDetector
+    _worker_detector = LicensePlateDetector(**detector_options)
+
+
+def _image_result(image_path: str, plates: List[Dict]) -> Dict:
+    # Only send back what the writer needs; plate crops are not pickled
+    return {
+        'path': image_path,
+        'plates': [{'text': plate['text'], 'confidence': plate['confidence'],
+                    'bbox': tuple(int(v) for v in plate['bbox'])}
+                   for plate in plates],
+        'error': None
+    }
+
+
+def read_image_plates(detector, image_path: str) -> Dict:
+    """Decode one image and detect/read its plates (no DB access)"""
+    started = metrics.timer()
+    image = cv2.imread(image_path)
+    metrics.observe('decode', started)
+    if image is None:
+        return {'path': image_path, 'plates': [], 'error': 'Could not read image'}
+
+    try:
+        plates = detector.detect_and_read_plates(image)
+    except Exception as e:
+        return {'path': image_path, 'plates': [], 'error': str(e)}
+    metrics.observe('end_to_end', started)
+    return _image_result(image_path, plates)
+
+
+def read_image_batch(detector, image_paths: List[str]) -> List[Dict]:
+    """read_image_plates for several images with one detect_and_read_plates_batch call"""
+    if len(image_paths) == 1:
+        return [read_image_plates(detector, image_paths[0])]
+
+    results = {}
+    images, paths, read_started = [], [], []
+    for path in image_paths:
+        started = metrics.timer()
+        image = cv2.imread(path)
+        metrics.observe('decode', started)
+        if image is None:
+            results[path] = {'path': path, 'plates': [], 'error': 'Could not read image'}
+        else:
+            images.append(image)
+            paths.append(path)
+            read_started.append(started)
+
+    if images:
+        try:
+            for path, plates in zip(paths, detector.detect_and_read_plates_batch(images)):
+                results[path] = _image_result(path, plates)
+            # Each image waited for the whole batch, so its end-to-end time runs to the batch's end
+            for started in read_started:
+                metrics.observe('end_to_end', started)
+        except Exception as e:
+            # Retry one by one so a single bad image does not fail the whole batch
+            print(f"Batch detection failed ({e}); retrying images individually")
+            for path in paths:
+                results[path] = read_image_plates(detector, path)
+    return [results[path] for path in image_paths]
+
+
+def _process_chunk(image_paths: List[str], batch_size: int = 1) -> Tuple[List[Dict], Optional[Dict]]:
+    """Worker entry point: detect plates in a chunk of images, batch_size images per detector call.
+
+    Returns the image results and the worker's metrics for the chunk (see metrics.collect).
+    """
+    results = [result for batch in iter_chunks(image_paths, batch_size)
+               for result in read_image_batch(_worker_detector, batch)]
+    return results, metrics.collect()
+
+
+class IngestProgress:
+    """Tracks and periodically prints images/s and plates/s"""
+
+    def __init__(self, interval: float = 5.0):
+        self.interval = interval
+        self.started_at = time.time()
+        self.last_report = self.started_at
+        self.images = 0
+        self.plates = 0
+        self.errors = 0
+
+    def update(self, images: int, plates: int, errors: int = 0):
+        self.images += images
+        self.plates += plates
+        self.errors += errors
+
+        now = time.time()
+        if now - self.last_report >= self.interval:
+            self.last_report = now
+            self.report()
+
+    def report(self, final: bool = False):
+        elapsed = max(time.time() - self.started_at, 1e-6)
+        label = "Processing complete." if final else "Progress:"
+        print(f"{label} {self.images} images, {self.plates} plates, {self.errors} errors | "
+              f"{self.images / elapsed:.1f} images/s | {self.plates / elapsed:.1f} plates/s")
+
+
+def ingest_folder(folder_path: str, record_plate: Callable[[Dict, str], None],
+                  workers: int = 1, chunksize: int = 16, recursive: bool = False,
+                  detector_options: Dict = None, progress_interval: float = 5.0,
+                  batch_size: int = 1) -> IngestProgress:
+    """Detect plates in every image under a folder using a process pool.
+
+    Paths are streamed from os.scandir in chunks, and at most two chunks per
+    worker are in flight, so memory stays bounded for very large folders.
+    ``record_plate(plate, image_path)`` runs in the calling process for each
+    detected plate, in completion order, so it acts as the single DB writer
+    while the workers keep decoding and detecting. Workers detect
+    ``batch_size`` images per detector call (see detect_and_read_plates_batch).
+    When metrics are enabled, each chunk's worker metrics are merged into
+    this process's registry.
+    """
+    progress = IngestProgress(progress_interval)
+    chunks = iter_chunks(iter_image_paths(folder_path, recursive), chunksize)
+    max_in_flight = workers * 2
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(detector_options or {}, metrics.enabled())) as executor:
+        in_flight = set()
+
+        def fill():
+            while len(in_flight) < max_in_flight:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    return
+                in_flight.add(executor.submit(_process_chunk, chunk, batch_size))
+
+        fill()
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            in_flight.difference_update(done)
+
+            # Keep workers busy before spending time on DB writes
+            fill()
+
+            for future in done:
+                try:
+                    results, collected = future.result()
+                except Exception as e:
+                    print(f"Error processing chunk: {e}")
+                    continue
+                metrics.merge(collected)
+
+                plates = errors = 0
+                for result in results:
+                    if result['error']:
+                        errors += 1
+                        print(f"Error processing image {result['path']}: {result['error']}")
+                    for plate in result['plates']:
+                        record_plate(plate, result['path'])
+                        plates += 1
+                progress.update(len(results), plates, errors)
+
+    progress.report(final=True)
+    return progress
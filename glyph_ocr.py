@@ -0,0 +1,218 @@
+import os
+from collections import defaultdict
+from typing import Callable, Dict, List, Tuple
+
+import cv2
+import numpy as np
+
+from ocr_pool import PLATE_CHARSET
+
+# Every glyph is scaled into a GLYPH_HEIGHT x GLYPH_WIDTH box before matching
+GLYPH_HEIGHT = 24
+GLYPH_WIDTH = 16
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.tiff')
+
+# A character is accepted only if it is this similar to its best template...
+MIN_SIMILARITY = 0.85
+# ...and this much more similar to it than to the best template of any other character.
+# Characters missing from the model (an O read against a model without O) fail one or both
+MIN_MARGIN = 0.05
+
+# Plates carry this many characters; other counts mean segmentation went wrong
+MIN_PLATE_GLYPHS = 5
+MAX_PLATE_GLYPHS = 8
+
+
+def _segment(binary_crop: np.ndarray):
+    """Connected components of a binarized crop: labels, stats and which of them look like characters"""
+    # Characters become the foreground whatever the plate's polarity
+    ink = binary_crop if binary_crop.mean() < 127 else cv2.bitwise_not(binary_crop)
+    _, labels, stats, _ = cv2.connectedComponentsWithStats(ink, connectivity=8)
+
+    height, width = binary_crop.shape[:2]
+    x, y, w, h, area = stats[1:].T
+    keep = ((h >= 0.35 * height) & (h <= 0.95 * height) & (w <= 0.3 * width) & (w <= 1.5 * h)
+            & (area >= 0.1 * w * h))
+    return labels, stats[1:], keep
+
+
+def segment_characters(binary_crop: np.ndarray) -> List[np.ndarray]:
+    """Split a binarized plate crop into character masks, left to right.
+
+    Connected components that are too short, too flat or too wide to be a
+    character (specks, the plate border, bolts) are discarded.
+    """
+    return _glyph_masks(*_segment(binary_crop))
+
+
+def _glyph_masks(labels: np.ndarray, stats: np.ndarray, keep: np.ndarray) -> List[np.ndarray]:
+    masks = []
+    for index in sorted(np.flatnonzero(keep), key=lambda i: stats[i, 0]):
+        gx, gy, gw, gh = stats[index, :4]
+        masks.append((labels[gy:gy+gh, gx:gx+gw] == index + 1).astype(np.uint8) * 255)
+    return masks
+
+
+def segmentation_consistent(stats: np.ndarray, keep: np.ndarray, width: int) -> bool:
+    """Whether the kept components plausibly are all of the plate's characters.
+
+    Fails on a glyph count no plate has, on sizeable ink discarded inside the
+    character row (a character broken into pieces, or two touching ones
+    merged into one wide blob), and on a gap between neighbours wide enough
+    to hold a whole character (one that thresholding wiped out).
+    """
+    glyphs = stats[keep]
+    if not MIN_PLATE_GLYPHS <= len(glyphs) <= MAX_PLATE_GLYPHS:
+        return False
+    glyphs = glyphs[np.argsort(glyphs[:, 0])]
+    x, y, w, h, area = glyphs.T
+    glyph_width = np.median(w)
+    row_top, row_bottom = np.median(y), np.median(y + h)
+
+    ox, oy, ow, oh, oarea = stats[~keep].T
+    centre_y = oy + oh / 2
+    # The plate border spans the crop, so it is never taken for a lost character
+    lost = ((ow < 0.8 * width) & (centre_y > row_top) & (centre_y < row_bottom)
+            & (ox + ow > x[0] - glyph_width) & (ox < x[-1] + w[-1] + glyph_width)
+            & (oarea >= 0.25 * np.median(area)))
+    if lost.any():
+        return False
+
+    spaces = x[1:] - (x[:-1] + w[:-1])
+    return not (spaces > np.median(spaces) + 1.2 * glyph_width).any()
+
+
+def glyph_vectors(masks: List[np.ndarray]) -> np.ndarray:
+    """Normalize character masks into zero-mean, unit-length feature rows"""
+    vectors = np.zeros((len(masks), GLYPH_HEIGHT * GLYPH_WIDTH), dtype=np.float32)
+    for i, mask in enumerate(masks):
+        h, w = mask.shape
+        # Keep the aspect ratio: a '1' stays narrow instead of being stretched into a block
+        scale = min(GLYPH_HEIGHT / h, GLYPH_WIDTH / w)
+        size = (max(1, int(round(w * scale))), max(1, int(round(h * scale))))
+        glyph = cv2.resize(mask, size, interpolation=cv2.INTER_AREA)
+        box = np.zeros((GLYPH_HEIGHT, GLYPH_WIDTH), dtype=np.float32)
+        top, left = (GLYPH_HEIGHT - size[1]) // 2, (GLYPH_WIDTH - size[0]) // 2
+        box[top:top + size[1], left:left + size[0]] = glyph
+        vectors[i] = box.ravel()
+
+    vectors -= vectors.mean(axis=1, keepdims=True)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-6)
+
+
+class GlyphClassifier:
+    """Nearest-template classifier for plate characters.
+
+    Templates are normalized glyphs cut from labeled crops. A glyph's label
+    is that of its most similar template (cosine similarity, one matrix
+    product for all glyphs of a plate) and its confidence is that similarity.
+    """
+
+    def __init__(self, templates: np.ndarray, labels: np.ndarray):
+        # Templates grouped by character, so per-character best matches are one reduceat
+        order = np.argsort(np.asarray(labels), kind='stable')
+        self.templates = templates.astype(np.float32)[order]
+        self.labels = np.asarray(labels)[order]
+        # Contiguous (features x templates) matrix: transposing per call is several times slower
+        self._matrix = np.ascontiguousarray(self.templates.T)
+        self._characters, self._starts = np.unique(self.labels, return_index=True)
+        self._character_list = self._characters.tolist()
+
+    def match(self, vectors: np.ndarray) -> Tuple[str, np.ndarray, np.ndarray]:
+        """Best character per glyph, its similarity, and its margin over the runner-up character"""
+        if not len(vectors) or not len(self.templates):
+            return "", np.zeros(0), np.zeros(0)
+        per_character = np.maximum.reduceat(vectors @ self._matrix, self._starts, axis=1)
+        rows = np.arange(len(vectors))
+        best = per_character.argmax(axis=1)
+        similarity = per_character[rows, best]
+        per_character[rows, best] = -1.0
+        runner_up = per_character.max(axis=1) if len(self._starts) > 1 else np.full(len(vectors), -1.0)
+        return ''.join(self._character_list[i] for i in best), similarity, similarity - runner_up
+
+    def read(self, binary_crop: np.ndarray, min_similarity: float = MIN_SIMILARITY,
+             min_margin: float = MIN_MARGIN) -> Tuple[str, List[float]]:
+        """Text and per-character confidences of a binarized plate crop.
+
+        Returns ("", []) rather than a guess when the segmentation looks
+        incomplete or any character is unlike every template (min_similarity)
+        or nearly as like another character (min_margin), so the caller
+        falls back to Tesseract.
+        """
+        labels, stats, keep = _segment(binary_crop)
+        if not segmentation_consistent(stats, keep, binary_crop.shape[1]):
+            return "", []
+        text, similarity, margin = self.match(glyph_vectors(_glyph_masks(labels, stats, keep)))
+        if not text or similarity.min() < min_similarity or margin.min() < min_margin:
+            return "", []
+        return text, np.clip(similarity, 0.0, 1.0).tolist()
+
+    def save(self, path: str):
+        np.savez_compressed(path, templates=self.templates, labels=self.labels,
+                            glyph_size=np.array([GLYPH_HEIGHT, GLYPH_WIDTH]))
+
+    @classmethod
+    def load(cls, path: str) -> 'GlyphClassifier':
+        with np.load(path) as model:
+            if tuple(model['glyph_size']) != (GLYPH_HEIGHT, GLYPH_WIDTH):
+                raise ValueError(f"{path} was trained for {tuple(model['glyph_size'])} glyphs, "
+                                 f"not {(GLYPH_HEIGHT, GLYPH_WIDTH)}")
+            return cls(model['templates'], model['labels'])
+
+
+def plate_label(path: str) -> str:
+    """Plate text from a crop's file name: AB123.jpg or AB123_0042.png"""
+    stem = os.path.splitext(os.path.basename(path))[0].split('_')[0]
+    return ''.join(c for c in stem.upper() if c in PLATE_CHARSET)
+
+
+def train_glyph_model(folder: str, output_path: str, binarize: Callable[[np.ndarray], np.ndarray],
+                      max_templates: int = 32) -> Dict:
+    """Build a GlyphClassifier from a folder of labeled plate crops and save it.
+
+    Crops are named after their plate text (see plate_label) and binarized
+    with ``binarize``, the same preprocessing used when reading. Crops that
+    do not segment into exactly one component per character are skipped.
+    Up to ``max_templates`` glyphs are kept per character.
+    """
+    samples = defaultdict(list)
+    used = skipped = 0
+    for name in sorted(os.listdir(folder)):
+        if not name.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        label = plate_label(name)
+        image = cv2.imread(os.path.join(folder, name))
+        if not label or image is None:
+            skipped += 1
+            continue
+
+        masks = segment_characters(binarize(image))
+        if len(masks) != len(label):
+            skipped += 1
+            continue
+        used += 1
+        for char, vector in zip(label, glyph_vectors(masks)):
+            samples[char].append(vector)
+
+    if not samples:
+        raise ValueError(f"No usable labeled plate crops in {folder}")
+
+    # Evenly spaced picks keep variety (lighting, wear) without unbounded model size
+    templates, labels = [], []
+    for char in sorted(samples):
+        vectors = samples[char]
+        for index in np.linspace(0, len(vectors) - 1, min(len(vectors), max_templates)).astype(int):
+            templates.append(vectors[index])
+            labels.append(char)
+
+    classifier = GlyphClassifier(np.stack(templates), np.array(labels))
+    classifier.save(output_path)
+    return {
+        'crops_used': used,
+        'crops_skipped': skipped,
+        'characters': {char: len(vectors) for char, vectors in sorted(samples.items())},
+        'missing': [char for char in PLATE_CHARSET if char not in samples],
+        'templates': len(templates),
+    }
@@ -1,58 +1,209 @@
 import cv2
 import os
 import time
-from datetime import datetime
+import metrics
+from itertools import islice
+from datetime import datetime, timezone
 from plate_detector import LicensePlateDetector
-from supabase_manager import SupabaseManager
+from folder_ingest import ingest_folder, iter_chunks, iter_image_paths, read_image_batch
+from video_ingest import VIDEO_EXTENSIONS, ingest_video, probe_video
+from storage import create_storage
+from plate_writer import AsyncPlateWriter
+from plate_spool import SpooledPlateWriter
+from plate_dedup import PlateDedupCache
+from hyperloglog import HyperLogLog
+from traffic_rollups import TrafficRollups
+from camera_pipeline import CameraPipeline
+from multi_camera import MultiCameraOrchestrator, load_camera_config
+from plate_tracker import track_frame
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+# Read-only reports; they need only a storage backend (see main.py's records and stats modes)
+
+def show_recent_records(db_manager, limit=10, plate_number=None, start_date=None, end_date=None,
+                        camera_location=None):
+    """Display recent license plate records"""
+    # Stream only the displayed columns, a page at a time, stopping at the limit
+    records = db_manager.iter_plate_records(
+        start_date=start_date, end_date=end_date, plate_number=plate_number,
+        camera_location=camera_location, columns=('id', 'plate_number', 'timestamp', 'camera_location'),
+        page_size=max(1, min(limit, 1000)), prefetch=limit > 1000)
+
+    shown = 0
+    for record in islice(records, limit):
+        if shown == 0:
+            print("\nRecent License Plate Records:")
+            print("-" * 80)
+        print(f"ID: {record['id']} | Plate: {record['plate_number']} | "
+              f"Time: {record['timestamp']} | Location: {record['camera_location']}")
+        shown += 1
+
+    if not shown:
+        print("No records found")
+
+
+def show_unique_plate_count(db_manager, start_date=None, end_date=None, camera_location=None):
+    """Display the exact distinct plate count computed by the database"""
+    count = db_manager.count_unique_plates(start_date, end_date, camera_location)
+    if count is not None:
+        scope = f" at {camera_location}" if camera_location else ""
+        print(f"Unique plates{scope}: {count}")
+    return count
+
+
+def show_traffic_stats(db_manager, resolution='hour', limit=24, start_date=None, end_date=None,
+                       camera_location=None):
+    """Display per-camera traffic rollups (read from plate_rollups, not the raw table)"""
+    rows = db_manager.get_rollups(resolution, start_date, end_date, camera_location, limit)
+    if not rows:
+        print("No traffic stats found")
+        return
+
+    print(f"\nTraffic per {resolution}:")
+    print("-" * 80)
+    for row in rows:
+        confidence = row.get('mean_confidence')
+        latency = row.get('mean_latency_ms')
+        print(f"{row['bucket_start']} | {row['camera_location']} | {row['plate_count']} plates | "
+              f"{row['distinct_plates']} unique | "
+              f"confidence {f'{confidence:.2f}' if confidence is not None else '-'} | "
+              f"latency {f'{latency:.0f} ms' if latency is not None else '-'}")
+
 
 class LPRSystem:
-    def __init__(self, camera_location="Main Entrance"):
-        self.detector = LicensePlateDetector()
-        self.db_manager = SupabaseManager()
+    def __init__(self, camera_location="Main Entrance", ocr_workers=0, ocr_backend='tesseract', ocr_confidence=0.75,
+                 spool_path=None, motion_gate=None, detect_stride=10,
+                 tracker=None, min_confidence=0.0, dedup_window=30, rollup_interval=30, backend=None,
+                 detection_width=None, min_plate_width=None, roi_polygons=None,
+                 ocr_cache_size=0, ocr_cache_ttl=2.0, ocr_cache_distance=6.0, glyph_model=None,
+                 max_candidates=3):
+        # roi_polygons: lane polygons for this camera location; detection ignores the rest of the frame
+        self.detector = LicensePlateDetector(ocr_workers=ocr_workers, ocr_backend=ocr_backend,
+                                             confidence_bar=ocr_confidence, detection_width=detection_width,
+                                             min_plate_width=min_plate_width, roi_polygons=roi_polygons,
+                                             ocr_cache_size=ocr_cache_size, ocr_cache_ttl=ocr_cache_ttl,
+                                             ocr_cache_distance=ocr_cache_distance, glyph_model=glyph_model,
+                                             max_candidates=max_candidates)
+        # Supabase, MySQL or local SQLite, from backend or LPR_BACKEND in .env
+        self.db_manager = create_storage(backend)
+        # Spool records to local disk first (spool_path None: LPR_SPOOL_PATH or lpr_spool.db;
+        # '' disables it). A local engine is already on disk, so it is written directly
+        if spool_path is None:
+            spool_path = os.getenv('LPR_SPOOL_PATH', 'lpr_spool.db')
+        if self.db_manager.local:
+            self.writer = AsyncPlateWriter(self.db_manager, flush_interval=0.01)
+        elif spool_path:
+            self.writer = SpooledPlateWriter(self.db_manager, spool_path)
+        else:
+            self.writer = AsyncPlateWriter(self.db_manager)
         self.camera_location = camera_location
-        self.processed_plates = set()  # To avoid duplicate processing
-        self.last_processed_time = {}
+        self.motion_gate = motion_gate  # MotionGate, or None to use the fixed detect_stride
+        self.detect_stride = detect_stride
+        self.tracker = tracker  # PlateTracker for cross-frame OCR voting, or None
+        self.min_confidence = min_confidence  # Reads below this OCR confidence are not stored
+        # Recently stored plates per camera; tolerant to OCR jitter like ABC123 vs A8C123
+        self.dedup = PlateDedupCache(ttl=dedup_window)
+        # Approximate distinct plates recorded by this system, updated once each record is written
+        self.unique_plates = HyperLogLog()
+        # Per-camera minute/hour traffic stats, persisted to plate_rollups in the background
+        self.rollups = TrafficRollups(self.db_manager, flush_interval=rollup_interval)
+        
+    def store_plate(self, plate_text, image_path=None, confidence=None, wait=True, callback=None,
+                    wait_timeout=10, latency=None, camera_location=None, recorded_at=None,
+                    deduplicate=True, block=None):
+        """Store a detected plate unless it was recorded recently.
+        
+        The record is handed to the background writer. With wait=True the
+        record id is returned once written (None if it is still spooled after
+        wait_timeout seconds); otherwise a Future for it is returned as soon
+        as the writer has accepted (or spooled) the record. Only callers that
+        need the database id should wait. block (default: wait) waits for room
+        in a full write queue instead of dropping the record. Returns None for
+        suppressed duplicates and reads below min_confidence. latency (seconds from capture to detection) feeds the
+        traffic rollups; camera_location overrides the system's location.
+        recorded_at (epoch seconds) sets the record's timestamp for footage that
+        is not live; callers doing their own de-duplication pass deduplicate=False.
+        """
+        camera_location = camera_location or self.camera_location
+        if confidence is not None and confidence < self.min_confidence:
+            return None
+        
+        # Check if we've recently processed this plate (avoid duplicates). The claim
+        # is made now so frames arriving before the write completes are suppressed
+        current_time = time.time()
+        if deduplicate and not self.dedup.claim(plate_text, camera_location, current_time):
+            return None
+        recorded_at = current_time if recorded_at is None else recorded_at
         
+        def on_written(future):
+            # Only plates that reached the database count towards the unique count and rollups
+            if future.result() is not None:
+                self.unique_plates.add(plate_text.upper())
+                self.rollups.record(camera_location, plate_text.upper(), confidence, latency, recorded_at)
+            elif deduplicate:
+                self.dedup.release(plate_text, camera_location, current_time)
+        
+        record = self.db_manager.build_plate_record(
+            plate_number=plate_text,
+            confidence_score=round(confidence, 4) if confidence is not None else None,
+            image_path=image_path,
+            camera_location=camera_location,
+            # Stamped now rather than on insert, which may come long after an outage
+            timestamp=datetime.fromtimestamp(recorded_at, timezone.utc).isoformat()
+        )
+        # A caller waiting for the record id should not also wait out the batching interval
+        future = self.writer.submit(record, callback=on_written, block=wait if block is None else block,
+                                    flush=wait)
+        if callback is not None:
+            future.add_done_callback(callback)
+        
+        if not wait:
+            return future
+        
+        try:
+            return future.result(timeout=wait_timeout)
+        except FutureTimeoutError:
+            print(f"Plate {plate_text} queued; it will be written when the database is reachable")
+            return None
+    
     def process_image_file(self, image_path):
-        """Process a single image file for license plates"""
+        """Process a single image file for license plates.
+        
+        Plates are handed to the writer without waiting for the database, so
+        an outage doesn't stall the run; each result's 'record' is a Future
+        for its record id, and plates are announced once written.
+        """
         try:
-            # Read image
+            # Read image (latency counts from here: reading the file is this frame's capture)
+            started_at = time.time()
+            decode_started = metrics.timer()
             image = cv2.imread(image_path)
             if image is None:
                 print(f"Error: Could not read image {image_path}")
                 return []
+            metrics.observe('decode', decode_started)
             
             # Detect and read plates
             detected_plates = self.detector.detect_and_read_plates(image)
+            latency = time.time() - started_at
+            metrics.observe_seconds('end_to_end', latency)
             
             results = []
             for plate in detected_plates:
                 plate_text = plate['text']
+                future = self.store_plate(
+                    plate_text, image_path, confidence=plate['confidence'], latency=latency,
+                    wait=False, block=True,
+                    callback=lambda f, text=plate_text: self._report_stored(f, text, "Detected and stored"))
                 
-                # Check if we've recently processed this plate (avoid duplicates)
-                current_time = time.time()
-                if plate_text in self.last_processed_time:
-                    if current_time - self.last_processed_time[plate_text] < 30:  # 30 second cooldown
-                        continue
-                
-                # Store in database
-                record_id = self.db_manager.insert_plate_record(
-                    plate_number=plate_text,
-                    confidence_score=0.8,  # Placeholder confidence score
-                    image_path=image_path,
-                    camera_location=self.camera_location
-                )
-                
-                if record_id:
-                    self.last_processed_time[plate_text] = current_time
+                if future is not None:
                     results.append({
                         'plate_number': plate_text,
                         'timestamp': datetime.now(),
-                        'record_id': record_id,
+                        'record': future,
+                        'confidence': plate['confidence'],
                         'bbox': plate['bbox']
                     })
-                    
-                    print(f"✓ Detected and stored: {plate_text}")
             
             return results
             
@@ -60,8 +211,68 @@ class LPRSystem:
             print(f"Error processing image {image_path}: {e}")
             return []
     
-    def process_video_stream(self, camera_index=0, save_frames=False):
+    def gate_frame(self, frame, frame_count, stride=None):
+        """Decide whether a live frame needs detection; returns (should_detect, region)"""
+        if self.motion_gate is not None:
+            region = self.motion_gate.check(frame)
+            return region is not None, region
+        
+        stride = self.detect_stride if stride is None else stride
+        return frame_count % stride == 0, None
+    
+    def report_motion_stats(self):
+        """Print how many live frames the motion gate skipped"""
+        if self.motion_gate is None:
+            return
+        stats = self.motion_gate.stats()
+        print(f"Motion gate: skipped {stats['skipped']} of {stats['frames']} frames "
+              f"({stats['skipped_fraction']:.1%})")
+    
+    def track_plates(self, frame, region=None, now=None, tracker=None, detector=None, roi=None, cache_scope=None):
+        """Advance the plate tracker by one frame.
+        
+        Only tracks whose reading has not stabilized are OCR'd. Returns the
+        annotations for tracks visible in this frame and the plates of tracks
+        that have left it. tracker, detector and roi default to the system's own;
+        cache_scope names the camera for the OCR cache.
+        """
+        tracks, finished = track_frame(tracker or self.tracker, detector or self.detector, frame, region, now,
+                                       roi, cache_scope)
+        annotations = [{'text': track.best_text, 'bbox': track.bbox}
+                       for track in tracks if track.best_text]
+        return annotations, finished
+    
+    def store_live_plates(self, plates, callback=None, captured_at=None):
+        """Queue live detections for the database; returns the futures of queued records"""
+        futures = []
+        now = time.time()
+        for plate in plates:
+            plate_text = plate['text']
+            # Tracked plates are measured from the last frame the vehicle was seen in
+            seen_at = plate.get('last_seen', captured_at)
+            future = self.store_plate(
+                plate_text, confidence=plate.get('confidence'), wait=False,
+                latency=now - seen_at if seen_at is not None else None,
+                callback=callback or (lambda f, text=plate_text: self._report_stored(f, text, "Live detection")))
+            if future is not None:
+                futures.append(future)
+        return futures
+    
+    def finish_tracking(self):
+        """Record plates still being tracked when a stream ends"""
+        if self.tracker is None:
+            return
+        self.store_live_plates(self.tracker.flush())
+        stats = self.tracker.stats()
+        print(f"Tracker: {stats['tracks_started']} tracks, {stats['records_emitted']} records, "
+              f"{stats['ocr_calls']} OCR calls")
+    
+    def process_video_stream(self, camera_index=0, save_frames=False, pipelined=False):
         """Process live video stream from camera"""
+        if pipelined:
+            CameraPipeline(self, camera_index).run()
+            return
+        
         cap = cv2.VideoCapture(camera_index)
         
         if not cap.isOpened():
@@ -79,38 +290,38 @@ class LPRSystem:
                 break
             
             frame_count += 1
+            captured_at = time.time()
             
-            # Process every 10th frame to reduce computational load
-            if frame_count % 10 == 0:
-                detected_plates = self.detector.detect_and_read_plates(frame)
+            # Only detect on frames with motion (or every Nth frame without a motion gate)
+            should_detect, region = self.gate_frame(frame, frame_count)
+            if should_detect and self.tracker is not None:
+                # Tracks are OCR'd until stable and recorded once when they leave the frame
+                annotations, finished = self.track_plates(frame, region, captured_at)
+                self.store_live_plates(finished)
+                for plate in annotations:
+                    x, y, w, h = plate['bbox']
+                    cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
+                    cv2.putText(frame, plate['text'], (x, y - 10), 
+                              cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
+                metrics.observe_seconds('end_to_end', time.time() - captured_at)
+            elif self.tracker is not None:
+                self.store_live_plates(self.tracker.expire())
+            elif should_detect:
+                detected_plates = self.detector.detect_and_read_plates(frame, region=region)
+                metrics.observe_seconds('end_to_end', time.time() - captured_at)
                 
                 for plate in detected_plates:
                     plate_text = plate['text']
                     x, y, w, h = plate['bbox']
                     
-                    # Check for recent duplicates
-                    current_time = time.time()
-                    if plate_text in self.last_processed_time:
-                        if current_time - self.last_processed_time[plate_text] < 30:
-                            continue
-                    
-                    # Store in database
-                    record_id = self.db_manager.insert_plate_record(
-                        plate_number=plate_text,
-                        confidence_score=0.8,
-                        image_path=None,  # Live stream, no saved image path
-                        camera_location=self.camera_location
-                    )
+                    # Queue for the database without stalling capture (live stream, no saved image path)
+                    pending = self.store_live_plates([plate], captured_at=captured_at)
                     
-                    if record_id:
-                        self.last_processed_time[plate_text] = current_time
-                        
+                    if pending:
                         # Draw bounding box and text on frame
                         cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
                         cv2.putText(frame, plate_text, (x, y - 10), 
                                   cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
-                        
-                        print(f"✓ Live detection: {plate_text}")
             
             # Display the frame
             cv2.imshow('LPR System - Live Detection', frame)
@@ -126,47 +337,146 @@ class LPRSystem:
         
         cap.release()
         cv2.destroyAllWindows()
+        self.finish_tracking()
+        self.report_motion_stats()
+    
+    def process_camera_config(self, config_path, detect_workers=None, motion_method='diff',
+                              motion_threshold=0.005, track=False):
+        """Run every camera listed in a config file in this process"""
+        config = load_camera_config(config_path)
+        MultiCameraOrchestrator(self, config, detect_workers=detect_workers, motion_method=motion_method,
+                                motion_threshold=motion_threshold, track=track).run()
     
-    def process_image_folder(self, folder_path):
-        """Process all images in a folder"""
+    def process_image_folder(self, folder_path, workers=1, chunksize=16, recursive=False, batch_size=1):
+        """Process all images in a folder, batch_size images per detector call"""
         if not os.path.exists(folder_path):
             print(f"Error: Folder {folder_path} does not exist")
             return
         
-        # Supported image extensions
-        image_extensions = ['.jpg', '.jpeg', '.png', '.bmp', '.tiff']
+        if workers <= 1 and batch_size > 1:
+            total_plates = 0
+            for batch in iter_chunks(iter_image_paths(folder_path, recursive), batch_size):
+                started_at = time.time()
+                results = read_image_batch(self.detector, batch)
+                latency = (time.time() - started_at) / len(batch)
+                for result in results:
+                    print(f"Processing: {result['path']}")
+                    if result['error']:
+                        print(f"Error processing image {result['path']}: {result['error']}")
+                    for plate in result['plates']:
+                        if self.store_plate(plate['text'], result['path'], confidence=plate['confidence'],
+                                            latency=latency, wait=False, block=True,
+                                            callback=lambda f, text=plate['text']:
+                                                self._report_stored(f, text, "Detected and stored")):
+                            total_plates += 1
+            
+            print(f"Processing complete. Total plates detected: {total_plates}")
+            return
         
-        # Get all image files
-        image_files = []
-        for file in os.listdir(folder_path):
-            if any(file.lower().endswith(ext) for ext in image_extensions):
-                image_files.append(os.path.join(folder_path, file))
+        if workers <= 1:
+            total_plates = 0
+            for image_file in iter_image_paths(folder_path, recursive):
+                print(f"Processing: {image_file}")
+                plates = self.process_image_file(image_file)
+                total_plates += len(plates)
+            
+            print(f"Processing complete. Total plates detected: {total_plates}")
+            return
         
-        print(f"Found {len(image_files)} images to process")
+        print(f"Processing {folder_path} with {workers} worker processes")
         
-        total_plates = 0
-        for image_file in image_files:
-            print(f"Processing: {image_file}")
-            plates = self.process_image_file(image_file)
-            total_plates += len(plates)
+        # block=True: a full write queue holds back the results loop (and so new chunks) instead of dropping
+        def record_plate(plate, image_path):
+            self.store_plate(plate['text'], image_path, confidence=plate.get('confidence'), wait=False, block=True,
+                             callback=lambda f: self._report_stored(f, plate['text'], "Detected and stored"))
         
-        print(f"Processing complete. Total plates detected: {total_plates}")
+        ingest_folder(folder_path, record_plate, workers=workers, chunksize=chunksize,
+                      recursive=recursive,
+                      detector_options=self.detector.options(), batch_size=batch_size)
     
-    def show_recent_records(self, limit=10):
-        """Display recent license plate records"""
-        records = self.db_manager.get_plate_records(limit)
+    def process_video_files(self, input_path, workers=1, segment_seconds=60, stride=5,
+                            motion_method=None, start_time=None, batch_size=1):
+        """Run LPR over recorded video files, splitting each into segments across worker processes.
         
-        if not records:
-            print("No records found")
-            return
+        Records get the frame's time in the footage: image_path is
+        "<file>#t=<seconds>" and the timestamp is the recording start
+        (start_time as an ISO string, else the file's modification time minus
+        its duration) plus that offset.
+        """
+        if os.path.isdir(input_path):
+            paths = sorted(entry.path for entry in os.scandir(input_path)
+                           if entry.is_file() and entry.name.lower().endswith(VIDEO_EXTENSIONS))
+        else:
+            paths = [input_path]
         
-        print("\nRecent License Plate Records:")
-        print("-" * 80)
-        for record in records:
-            print(f"ID: {record['id']} | Plate: {record['plate_number']} | "
-                  f"Time: {record['timestamp']} | Location: {record['camera_location']}")
+        for path in paths:
+            if start_time:
+                recording_start = datetime.fromisoformat(start_time).timestamp()
+            else:
+                frames, fps = probe_video(path)
+                recording_start = os.path.getmtime(path) - frames / fps
+            
+            print(f"Processing video {path} with {workers} worker process(es)")
+            
+            def record_plate(plate, offset, path=path, recording_start=recording_start):
+                self.store_plate(plate['text'], f"{path}#t={offset:.2f}", confidence=plate.get('confidence'),
+                                 wait=False, block=True, recorded_at=recording_start + offset, deduplicate=False,
+                                 callback=lambda f: self._report_stored(f, plate['text'], f"Found at {offset:.1f}s"))
+            
+            totals = ingest_video(path, record_plate, workers=workers, segment_seconds=segment_seconds,
+                                  stride=stride, motion_method=motion_method,
+                                  dedup_window=self.dedup.ttl,
+                                  detector_options=self.detector.options(), batch_size=batch_size)
+            print(f"Processing complete. {totals['plates']} plates in {totals['segments']} segments "
+                  f"({totals['frames']} frames analysed, {totals['duplicates']} boundary duplicates, "
+                  f"{totals['errors']} errors)")
+    
+    def show_recent_records(self, limit=10, plate_number=None, start_date=None, end_date=None,
+                            camera_location=None):
+        """Display recent license plate records"""
+        show_recent_records(self.db_manager, limit, plate_number, start_date, end_date, camera_location)
+    
+    def approximate_unique_plates(self):
+        """Approximate count of distinct plates stored since startup, without a database query"""
+        return self.unique_plates.count()
+    
+    def show_unique_plate_count(self, start_date=None, end_date=None, camera_location=None):
+        """Display the exact distinct plate count computed by the database"""
+        return show_unique_plate_count(self.db_manager, start_date, end_date, camera_location)
+    
+    def show_traffic_stats(self, resolution='hour', limit=24, start_date=None, end_date=None,
+                           camera_location=None):
+        """Display per-camera traffic rollups (read from plate_rollups, not the raw table)"""
+        show_traffic_stats(self.db_manager, resolution, limit, start_date, end_date, camera_location)
+    
+    def _report_stored(self, future, plate_text, label):
+        """Writer callback: announce a plate once its record has been written"""
+        if future.result() is not None:
+            print(f"✓ {label}: {plate_text}")
     
     def cleanup(self):
         """Clean up resources"""
+        # Flush queued records and rollups before tearing down the DB client
+        self.writer.close()
+        self.rollups.close()
+        ocr_stats = self.detector.ocr_stats()
+        if ocr_stats:
+            print(f"OCR pool: {ocr_stats['calls']} calls on {ocr_stats['workers']} workers | "
+                  f"avg {ocr_stats['latency_avg_ms']:.1f} ms | p95 {ocr_stats['latency_p95_ms']:.1f} ms | "
+                  f"queue wait {ocr_stats['queue_wait_avg_ms']:.1f} ms")
+        cache_stats = self.detector.cache_stats()
+        if cache_stats and (cache_stats['hits'] or cache_stats['misses']):
+            print(f"OCR cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+                  f"({cache_stats['hit_rate']:.0%}) within distance {cache_stats['max_distance']:g} | "
+                  f"{cache_stats['evictions']} evicted")
+        if self.dedup.misses:
+            print(f"Unique plates this session: ~{self.approximate_unique_plates()}")
+        candidates = self.detector.candidate_stats()
+        if candidates['found']:
+            print(f"Plate candidates: {candidates['found']} found, {candidates['read']} sent to OCR")
+        print("OCR preprocessing tiers used: " +
+              ", ".join(f"{tier} {count}" for tier, count in self.detector.tier_stats().items()))
+        self.detector.close()
+        
         if self.db_manager:
             self.db_manager.close()
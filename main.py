@@ -7,33 +7,201 @@ Main entry point for the LPR application
 import os
 import sys
 import argparse
-from lpr_system import LPRSystem
-from supabase_setup import create_supabase_table
+from lpr_system import LPRSystem, show_recent_records, show_traffic_stats, show_unique_plate_count
+from metrics import start_metrics_server
+from motion_gate import MotionGate
+from plate_roi import load_roi_config
+from plate_tracker import PlateTracker
+from storage import BACKENDS, create_storage
+
+def setup_storage(backend):
+    """Create the tables for the selected storage backend"""
+    if backend == 'supabase':
+        from supabase_setup import create_supabase_table
+        return create_supabase_table()
+    if backend == 'mysql':
+        from database_setup import create_database
+        return create_database()
+    
+    # The SQLite engine creates its schema when it opens the file
+    from sqlite_manager import SQLiteManager
+    storage = SQLiteManager()
+    storage.close()
+    return True
+
+def train_glyphs(folder, output_path):
+    """Train the character template model from labeled plate crops and report coverage"""
+    from glyph_ocr import train_glyph_model
+    from plate_detector import LicensePlateDetector
+    detector = LicensePlateDetector(ocr_cache_size=0)
+    try:
+        summary = train_glyph_model(folder, output_path, lambda image: detector.binarize_plate(image, tier=0))
+    finally:
+        detector.close()
+    
+    print(f"✓ Saved {summary['templates']} templates to {output_path} "
+          f"({summary['crops_used']} crops used, {summary['crops_skipped']} skipped)")
+    print("Glyphs per character: " +
+          ", ".join(f"{char} {count}" for char, count in summary['characters'].items()))
+    if summary['missing']:
+        print(f"Warning: no samples for {''.join(summary['missing'])}; plates with them fall back to Tesseract")
 
 def main():
     parser = argparse.ArgumentParser(description='License Plate Recognition System')
-    parser.add_argument('--mode', choices=['setup', 'image', 'folder', 'camera', 'records'], 
+    parser.add_argument('--mode', choices=['setup', 'image', 'folder', 'video', 'camera', 'multi', 'records', 'stats',
+                                           'train-ocr'], 
                        required=True, help='Operation mode')
-    parser.add_argument('--input', help='Input file/folder path (for image/folder modes)')
+    parser.add_argument('--backend', choices=BACKENDS, default=os.getenv('LPR_BACKEND', 'supabase'),
+                       help='Storage backend (default: LPR_BACKEND from .env, else supabase)')
+    parser.add_argument('--input', help='Input file/folder path (for image/folder/video modes)')
     parser.add_argument('--camera', type=int, default=0, help='Camera index (for camera mode)')
+    parser.add_argument('--config', help='Camera config JSON listing the streams (multi mode)')
+    parser.add_argument('--detect-workers', type=int,
+                       help='Detection threads shared by all streams (multi mode, default: one per stream up to the CPU count)')
+    parser.add_argument('--pipeline', action='store_true',
+                       help='Camera mode: run capture, detection and output on separate threads')
+    parser.add_argument('--motion-gate', choices=['diff', 'mog2', 'off'], default='diff',
+                       help='Camera mode: only detect on frames with motion (off uses --detect-stride)')
+    parser.add_argument('--motion-threshold', type=float, default=0.005,
+                       help='Fraction of changed pixels that triggers detection')
+    parser.add_argument('--detect-stride', type=int, default=10,
+                       help='Detect on every Nth frame when the motion gate is off (video mode: always)')
+    parser.add_argument('--track', action='store_true',
+                       help='Camera mode: track plates across frames and record each vehicle once')
     parser.add_argument('--location', default='Main Entrance', help='Camera location identifier')
     parser.add_argument('--limit', type=int, default=10, help='Limit for records display')
+    parser.add_argument('--plate', help='Only show records for this plate number (records mode)')
+    parser.add_argument('--start', help='Only show records at or after this ISO timestamp (records mode)')
+    parser.add_argument('--end', help='Only show records at or before this ISO timestamp (records mode)')
+    parser.add_argument('--camera-filter', metavar='LOCATION',
+                       help='Only show and count records from this camera location (records/stats modes)')
+    parser.add_argument('--resolution', choices=['minute', 'hour'], default='hour',
+                       help='Bucket size for traffic stats (stats mode)')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='Worker processes for folder and video modes (1 processes images serially)')
+    parser.add_argument('--chunksize', type=int, default=16,
+                       help='Images handed to a worker process at a time (folder mode)')
+    parser.add_argument('--batch-size', type=int, default=1,
+                       help='Frames detected per detector call, with their plate crops OCR\'d together (folder and video modes)')
+    parser.add_argument('--recursive', action='store_true', help='Include subfolders (folder mode)')
+    parser.add_argument('--segment-seconds', type=float, default=60,
+                       help='Length of the video segments handed to worker processes (video mode)')
+    parser.add_argument('--video-start',
+                       help='ISO time the recording started (video mode, default: file mtime minus duration)')
+    parser.add_argument('--ocr-workers', type=int, default=0,
+                       help='Size of the persistent OCR worker pool (0 runs OCR inline)')
+    parser.add_argument('--ocr-backend', choices=['tesseract', 'batch'], default='tesseract',
+                       help='OCR backend: one Tesseract call per plate, or one batched call per frame')
+    parser.add_argument('--ocr-confidence', type=float, default=0.75,
+                       help='OCR confidence (0-1) at which cheaper preprocessing is accepted without escalating')
+    parser.add_argument('--glyph-model', default=os.getenv('LPR_GLYPH_MODEL'),
+                       help='Character template model read before falling back to Tesseract '
+                            '(train-ocr mode: where to write it, default glyphs.npz)')
+    parser.add_argument('--ocr-cache-size', type=int, default=0,
+                       help='Recent plate crops whose OCR readings are reused for near-identical crops '
+                            'at the same spot (default 0: off)')
+    parser.add_argument('--ocr-cache-ttl', type=float, default=2.0,
+                       help='Seconds a cached OCR reading is reused before the crop is read again')
+    parser.add_argument('--ocr-cache-distance', type=float, default=6.0,
+                       help='Largest per-character mean gray-level difference (0-255) between crops treated as the same')
+    parser.add_argument('--detect-width', type=int,
+                       help='Find plates on frames downscaled to this width; OCR still reads full-resolution crops')
+    parser.add_argument('--min-plate-width', type=int,
+                       help='Smallest plate width in full-resolution pixels worth searching for '
+                            '(default: no minimum, or 40 with --detect-width)')
+    parser.add_argument('--roi-config', default=os.getenv('LPR_ROI_PATH'),
+                       help='JSON file of lane polygons per camera location; plates are only searched inside them')
+    parser.add_argument('--max-candidates', type=int, default=3,
+                       help='Best-scoring plate candidates per frame (or ROI box) sent to OCR')
+    parser.add_argument('--min-confidence', type=float, default=0.0,
+                       help='Do not store reads below this OCR confidence (0-1)')
+    parser.add_argument('--dedup-window', type=float, default=30,
+                       help='Seconds after a stored read during which repeats of the same (or a near-identical) plate are ignored')
+    parser.add_argument('--spool', default=os.getenv('LPR_SPOOL_PATH', 'lpr_spool.db'),
+                       help='Local spool file records are written to before the database')
+    parser.add_argument('--no-spool', action='store_true',
+                       help='Write records straight to the database without the local spool')
+    parser.add_argument('--metrics-port', type=int,
+                       default=int(os.getenv('LPR_METRICS_PORT')) if os.getenv('LPR_METRICS_PORT') else None,
+                       help='Serve per-stage latency histograms and counters in Prometheus format on this port')
+    parser.add_argument('--metrics-host', default=os.getenv('LPR_METRICS_HOST', '127.0.0.1'),
+                       help='Address the metrics endpoint listens on')
     
     args = parser.parse_args()
     
+    if args.mode == 'setup':
+        print(f"Setting up {args.backend} database...")
+        if setup_storage(args.backend):
+            print(f"✓ {args.backend} setup completed successfully")
+            return
+        print(f"✗ {args.backend} setup failed")
+        sys.exit(1)
+    
+    if args.mode == 'train-ocr':
+        if not args.input:
+            print("Error: --input folder of labeled plate crops required for train-ocr mode")
+            sys.exit(1)
+        train_glyphs(args.input, args.glyph_model or 'glyphs.npz')
+        return
+    
+    if args.mode in ('records', 'stats'):
+        # Read-only: only the storage is needed, not the detector, writer, spool or rollup threads
+        try:
+            db_manager = create_storage(args.backend)
+        except Exception as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        try:
+            if args.mode == 'records':
+                show_recent_records(db_manager, limit=args.limit, plate_number=args.plate,
+                                    start_date=args.start, end_date=args.end,
+                                    camera_location=args.camera_filter)
+                if not args.plate:
+                    show_unique_plate_count(db_manager, start_date=args.start, end_date=args.end,
+                                            camera_location=args.camera_filter)
+            else:
+                show_traffic_stats(db_manager, resolution=args.resolution, limit=args.limit,
+                                   start_date=args.start, end_date=args.end,
+                                   camera_location=args.camera_filter)
+        except KeyboardInterrupt:
+            print("\nOperation cancelled by user")
+        except Exception as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        finally:
+            db_manager.close()
+        return
+    
+    if args.metrics_port is not None:
+        start_metrics_server(args.metrics_port, args.metrics_host)
+    
+    motion_gate = None
+    if args.motion_gate != 'off':
+        motion_gate = MotionGate(threshold=args.motion_threshold, method=args.motion_gate)
+    
+    roi_polygons = None
+    if args.roi_config:
+        roi = load_roi_config(args.roi_config).get(args.location)
+        if roi is not None:
+            roi_polygons = roi.to_list()
+        else:
+            print(f"No ROI configured for {args.location} in {args.roi_config}; searching whole frames")
+    
     # Initialize LPR system
-    lpr_system = LPRSystem(camera_location=args.location)
+    lpr_system = LPRSystem(camera_location=args.location, ocr_workers=args.ocr_workers,
+                           ocr_backend=args.ocr_backend, ocr_confidence=args.ocr_confidence,
+                           spool_path='' if args.no_spool else args.spool,
+                           motion_gate=motion_gate, detect_stride=args.detect_stride,
+                           tracker=PlateTracker() if args.track else None,
+                           min_confidence=args.min_confidence, dedup_window=args.dedup_window,
+                           backend=args.backend, detection_width=args.detect_width,
+                           min_plate_width=args.min_plate_width, roi_polygons=roi_polygons,
+                           ocr_cache_size=args.ocr_cache_size, ocr_cache_ttl=args.ocr_cache_ttl,
+                           ocr_cache_distance=args.ocr_cache_distance, glyph_model=args.glyph_model,
+                           max_candidates=args.max_candidates)
     
     try:
-        if args.mode == 'setup':
-            print("Setting up Supabase database...")
-            if create_supabase_table():
-                print("✓ Supabase setup completed successfully")
-            else:
-                print("✗ Supabase setup failed")
-                sys.exit(1)
-        
-        elif args.mode == 'image':
+        if args.mode == 'image':
             if not args.input:
                 print("Error: --input path required for image mode")
                 sys.exit(1)
@@ -48,7 +216,8 @@ def main():
             if results:
                 print(f"\nDetected {len(results)} license plate(s):")
                 for result in results:
-                    print(f"  - {result['plate_number']} at {result['timestamp']}")
+                    print(f"  - {result['plate_number']} at {result['timestamp']} "
+                          f"(confidence {result['confidence']:.2f})")
             else:
                 print("No license plates detected")
         
@@ -57,15 +226,34 @@ def main():
                 print("Error: --input path required for folder mode")
                 sys.exit(1)
             
-            lpr_system.process_image_folder(args.input)
+            lpr_system.process_image_folder(args.input, workers=args.workers,
+                                            chunksize=args.chunksize, recursive=args.recursive,
+                                            batch_size=args.batch_size)
+        
+        elif args.mode == 'video':
+            if not args.input:
+                print("Error: --input path required for video mode")
+                sys.exit(1)
+            
+            lpr_system.process_video_files(args.input, workers=args.workers,
+                                           segment_seconds=args.segment_seconds,
+                                           stride=args.detect_stride,
+                                           motion_method=None if args.motion_gate == 'off' else args.motion_gate,
+                                           start_time=args.video_start, batch_size=args.batch_size)
         
         elif args.mode == 'camera':
             print("Starting live camera detection...")
             print("Press 'q' to quit the camera view")
-            lpr_system.process_video_stream(camera_index=args.camera)
+            lpr_system.process_video_stream(camera_index=args.camera, pipelined=args.pipeline)
         
-        elif args.mode == 'records':
-            lpr_system.show_recent_records(limit=args.limit)
+        elif args.mode == 'multi':
+            if not args.config:
+                print("Error: --config path required for multi mode")
+                sys.exit(1)
+            
+            lpr_system.process_camera_config(args.config, detect_workers=args.detect_workers,
+                                             motion_method=args.motion_gate,
+                                             motion_threshold=args.motion_threshold, track=args.track)
     
     except KeyboardInterrupt:
         print("\nOperation cancelled by user")
@@ -0,0 +1,202 @@
+import bisect
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+# Pipeline stages with a latency histogram
+STAGES = ('decode', 'preprocess', 'cascade', 'contour', 'ocr', 'db_insert', 'end_to_end')
+
+# Counter name -> help text; exported as lpr_<name>_total
+COUNTERS = {
+    'frames': "Frames (or ROI regions of a frame) searched for plates",
+    'candidates': "Plate candidates found by the cascade and contour detectors",
+    'candidates_read': "Plate candidates that survived ranking and were sent to OCR",
+    'ocr_calls': "Plate crops read by OCR (cache hits excluded)",
+    'records_dropped': "Plate records dropped before reaching the database",
+}
+
+# Upper bounds in seconds; a sub-millisecond Canny and a multi-second DB retry both land in a bucket
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram, safe to observe from many threads"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)  # the last bucket is +Inf
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += seconds
+
+    def take(self) -> Tuple[List[int], float]:
+        """Per-bucket counts and sum observed since the last take, resetting them"""
+        with self._lock:
+            counts, total = self._counts, self._sum
+            self._counts, self._sum = [0] * len(counts), 0.0
+        return counts, total
+
+    def add(self, counts: List[int], total: float):
+        """Fold in counts and a sum from take() on a histogram with the same buckets"""
+        with self._lock:
+            for index, count in enumerate(counts):
+                self._counts[index] += count
+            self._sum += total
+
+    def snapshot(self) -> Tuple[List[int], float]:
+        """Cumulative count per bucket (+Inf last) and the sum of all observations"""
+        with self._lock:
+            counts, total = list(self._counts), self._sum
+        cumulative, running = [], 0
+        for count in counts:
+            running += count
+            cumulative.append(running)
+        return cumulative, total
+
+
+class MetricsRegistry:
+    """Stage latency histograms and event counters, rendered in Prometheus text format"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.histograms = {stage: Histogram(buckets) for stage in STAGES}
+        self.counters = {name: 0 for name in COUNTERS}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float):
+        self.histograms[stage].observe(seconds)
+
+    def inc(self, name: str, amount: int = 1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def take(self) -> Dict:
+        """Everything recorded since the last take (picklable), resetting it"""
+        with self._lock:
+            counters = self.counters
+            self.counters = {name: 0 for name in COUNTERS}
+        return {'histograms': {stage: histogram.take() for stage, histogram in self.histograms.items()},
+                'counters': counters}
+
+    def merge(self, taken: Dict):
+        """Fold in what take() returned in another process"""
+        for stage, (counts, total) in taken['histograms'].items():
+            self.histograms[stage].add(counts, total)
+        with self._lock:
+            for name, value in taken['counters'].items():
+                self.counters[name] += value
+
+    def render(self) -> str:
+        lines = ["# HELP lpr_stage_latency_seconds Latency of each pipeline stage",
+                 "# TYPE lpr_stage_latency_seconds histogram"]
+        for stage, histogram in self.histograms.items():
+            cumulative, total = histogram.snapshot()
+            for bound, count in zip(histogram.buckets + ('+Inf',), cumulative):
+                lines.append(f'lpr_stage_latency_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+            lines.append(f'lpr_stage_latency_seconds_sum{{stage="{stage}"}} {total:.6f}')
+            lines.append(f'lpr_stage_latency_seconds_count{{stage="{stage}"}} {cumulative[-1]}')
+
+        with self._lock:
+            counters = dict(self.counters)
+        for name, value in counters.items():
+            lines += [f"# HELP lpr_{name}_total {COUNTERS[name]}",
+                      f"# TYPE lpr_{name}_total counter",
+                      f"lpr_{name}_total {value}"]
+        return "\n".join(lines) + "\n"
+
+
+# None until enable(): every helper below then returns straight away and nothing is timed
+_registry: Optional[MetricsRegistry] = None
+
+
+def enable(buckets=LATENCY_BUCKETS) -> MetricsRegistry:
+    """Start collecting metrics in this process"""
+    global _registry
+    if _registry is None:
+        _registry = MetricsRegistry(buckets)
+    return _registry
+
+
+def enabled() -> bool:
+    return _registry is not None
+
+
+def init_worker(enable_metrics: bool):
+    """Start a pool worker with a fresh registry (or none).
+
+    A forked worker inherits the parent's registry, whose counts must not
+    be sent back; the parent serves the worker's metrics once they come
+    back through collect() and merge().
+    """
+    global _registry
+    _registry = MetricsRegistry() if enable_metrics else None
+
+
+def collect() -> Optional[Dict]:
+    """This process's metrics since the last collect, for returning to the parent; None when off"""
+    return _registry.take() if _registry is not None else None
+
+
+def merge(collected: Optional[Dict]):
+    """Add metrics collected in a worker process to this process's registry"""
+    if collected is not None and _registry is not None:
+        _registry.merge(collected)
+
+
+def timer() -> Optional[float]:
+    """Start time to hand to observe(), or None when metrics are off"""
+    return time.perf_counter() if _registry is not None else None
+
+
+def observe(stage: str, started: Optional[float]):
+    """Record the time since ``started`` (from timer()) under a stage"""
+    if started is not None and _registry is not None:
+        _registry.observe(stage, time.perf_counter() - started)
+
+
+def observe_seconds(stage: str, seconds: Optional[float]):
+    """Record a latency measured elsewhere (e.g. capture to detection)"""
+    if seconds is not None and _registry is not None:
+        _registry.observe(stage, seconds)
+
+
+def inc(name: str, amount: int = 1):
+    if _registry is not None and amount:
+        _registry.inc(name, amount)
+
+
+def render() -> str:
+    return _registry.render() if _registry is not None else ""
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would drown the detection output
+        pass
+
+
+def start_metrics_server(port: int, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+    """Enable metrics and serve them at http://host:port/metrics from a daemon thread"""
+    enable()
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True)
+    thread.start()
+    print(f"Serving metrics at http://{host}:{server.server_address[1]}/metrics")
+    return server
@@ -0,0 +1,85 @@
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """Cheap motion detector deciding which frames are worth running plate detection on.
+
+    Frames are downscaled to ``scale_width`` pixels wide and compared with a
+    running-average background (``method='diff'``) or a MOG2 background model
+    (``method='mog2'``). A frame passes the gate when the fraction of changed
+    pixels exceeds ``threshold``; the bounding box of the motion, mapped back to
+    full-resolution coordinates, tells the detector where to look.
+    """
+
+    def __init__(self, threshold: float = 0.005, scale_width: int = 160,
+                 pixel_delta: int = 25, method: str = 'diff', alpha: float = 0.1,
+                 padding: float = 0.1):
+        if method not in ('diff', 'mog2'):
+            raise ValueError(f"Unknown motion method '{method}'. Choose 'diff' or 'mog2'")
+
+        self.threshold = threshold
+        self.scale_width = scale_width
+        self.pixel_delta = pixel_delta
+        self.method = method
+        self.alpha = alpha
+        self.padding = padding
+
+        self._background = None
+        self._subtractor = (cv2.createBackgroundSubtractorMOG2(history=200, detectShadows=False)
+                            if method == 'mog2' else None)
+        self._kernel = np.ones((3, 3), np.uint8)
+        self.frames = 0
+        self.triggered = 0
+
+    def _motion_mask(self, small: np.ndarray) -> Optional[np.ndarray]:
+        if self._subtractor is not None:
+            return self._subtractor.apply(small)
+
+        gray = cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+        if self._background is None:
+            self._background = gray.astype(np.float32)
+            return None
+
+        delta = cv2.absdiff(gray, cv2.convertScaleAbs(self._background))
+        cv2.accumulateWeighted(gray, self._background, self.alpha)
+        _, mask = cv2.threshold(delta, self.pixel_delta, 255, cv2.THRESH_BINARY)
+        return mask
+
+    def check(self, frame: np.ndarray) -> Optional[Tuple[int, int, int, int]]:
+        """Return the (x, y, w, h) motion region in frame coordinates, or None to skip the frame"""
+        self.frames += 1
+        height, width = frame.shape[:2]
+        scale = self.scale_width / float(width)
+        small = cv2.resize(frame, (self.scale_width, max(1, int(height * scale))),
+                           interpolation=cv2.INTER_AREA)
+
+        mask = self._motion_mask(small)
+        if mask is None:
+            return None
+
+        mask = cv2.dilate(mask, self._kernel, iterations=2)
+        if cv2.countNonZero(mask) < self.threshold * mask.size:
+            return None
+
+        self.triggered += 1
+        x, y, w, h = cv2.boundingRect(cv2.findNonZero(mask))
+
+        # Map back to full resolution with some padding so plates at the edge aren't clipped
+        pad_x, pad_y = w * self.padding, h * self.padding
+        x0 = max(0, int((x - pad_x) / scale))
+        y0 = max(0, int((y - pad_y) / scale))
+        x1 = min(width, int((x + w + pad_x) / scale) + 1)
+        y1 = min(height, int((y + h + pad_y) / scale) + 1)
+        return (x0, y0, x1 - x0, y1 - y0)
+
+    def stats(self) -> Dict:
+        skipped = self.frames - self.triggered
+        return {
+            'frames': self.frames,
+            'triggered': self.triggered,
+            'skipped': skipped,
+            'skipped_fraction': skipped / self.frames if self.frames else 0.0,
+        }
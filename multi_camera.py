@@ -0,0 +1,321 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+
+import metrics
+from camera_pipeline import LatencyTracker, LatestFrameGrabber
+from motion_gate import MotionGate
+from plate_detector import LicensePlateDetector
+from plate_roi import PlateROI
+from plate_tracker import PlateTracker
+
+
+def load_camera_config(path: str) -> Dict:
+    """Read a multi-camera config file.
+
+    Example::
+
+        {
+          "detect_workers": 4,
+          "streams": [
+            {"name": "lane-1", "source": 0, "location": "Lane 1", "stride": 5},
+            {"name": "lane-2", "source": "rtsp://10.0.0.12/stream", "location": "Lane 2",
+             "roi": [200, 300, 880, 400], "motion_gate": "mog2"},
+            {"name": "exit", "source": 2, "location": "Exit",
+             "roi_polygons": [[[100, 400], [900, 380], [1000, 700], [50, 720]]]}
+          ]
+        }
+    """
+    with open(path) as f:
+        config = json.load(f)
+
+    streams = config.get('streams') or []
+    if not streams:
+        raise ValueError(f"No streams configured in {path}")
+    for index, stream in enumerate(streams):
+        if 'source' not in stream:
+            raise ValueError(f"Stream {index} in {path} has no source")
+        stream.setdefault('name', f"stream-{index}")
+    return config
+
+
+class CameraStream:
+    """One configured camera: capture thread, gate, bounded frame queue and stats"""
+
+    def __init__(self, config: Dict, motion_method: str = 'diff', motion_threshold: float = 0.005,
+                 track: bool = False, queue_size: int = 2):
+        source = config['source']
+        self.source = int(source) if isinstance(source, str) and source.isdigit() else source
+        self.name = config['name']
+        self.location = config.get('location', self.name)
+        self.stride = max(1, int(config.get('stride', 1)))
+        # Lane polygons restrict detection; the rectangle (or the polygons' bounds) limits motion gating
+        self.plate_roi = PlateROI(config['roi_polygons']) if config.get('roi_polygons') else None
+        if config.get('roi'):
+            self.roi = tuple(config['roi'])
+        else:
+            self.roi = self.plate_roi.bounds() if self.plate_roi is not None else None
+
+        method = config.get('motion_gate', motion_method)
+        self.motion_gate = (MotionGate(threshold=config.get('motion_threshold', motion_threshold),
+                                       method=method) if method != 'off' else None)
+        self.tracker = PlateTracker() if config.get('track', track) else None
+        # Serializes tracker updates from detection workers and idle expiry
+        self.lock = threading.Lock()
+
+        # Frames waiting for detection; the oldest is dropped when the stream outruns detection
+        self.frames = deque(maxlen=config.get('queue_size', queue_size))
+        self.in_flight = 0
+        self.grabber: Optional[LatestFrameGrabber] = None
+        self.capture = None
+
+        self.frames_offered = 0
+        self.frames_dropped = 0
+        self.frames_detected = 0
+        self.plates = 0
+        self.latency = LatencyTracker()
+        self.started_at = time.time()
+
+    @property
+    def finished(self) -> bool:
+        return self.grabber is not None and not self.grabber.running
+
+    def gate(self, index: int, frame) -> Tuple[bool, Optional[Tuple[int, int, int, int]]]:
+        """Whether to detect on this frame, and the region to search.
+
+        Only every ``stride``-th frame is considered; with a motion gate, those
+        frames are then checked for motion (as in video_ingest).
+        """
+        if index % self.stride:
+            return False, None
+        if self.motion_gate is not None:
+            # Gate on motion inside the ROI only
+            x, y, w, h = self.roi if self.roi else (0, 0, frame.shape[1], frame.shape[0])
+            motion = self.motion_gate.check(frame[y:y + h, x:x + w])
+            if motion is None:
+                return False, None
+            return True, (motion[0] + x, motion[1] + y, motion[2], motion[3])
+        return True, self.roi
+
+    def stats(self) -> Dict:
+        elapsed = max(time.time() - self.started_at, 1e-6)
+        captured = self.grabber.frames if self.grabber is not None else 0
+        return {
+            'name': self.name,
+            'location': self.location,
+            'capture_fps': captured / elapsed,
+            'detect_fps': self.frames_detected / elapsed,
+            'frames_dropped': self.frames_dropped,
+            'plates': self.plates,
+            'latency': self.latency.summary(),
+        }
+
+
+class FairFrameScheduler:
+    """Hands frames from many streams to shared detection workers in round-robin order.
+
+    Each stream has at most ``max_in_flight`` frames being detected at once, so
+    a busy camera cannot starve the others, and its small drop-oldest queue
+    bounds how far behind it can fall.
+    """
+
+    def __init__(self, streams: List[CameraStream], max_in_flight: int = 1):
+        self.streams = streams
+        self.max_in_flight = max_in_flight
+        self._next = 0
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def put(self, stream: CameraStream, item):
+        with self._cond:
+            if len(stream.frames) == stream.frames.maxlen:
+                stream.frames_dropped += 1
+            stream.frames.append(item)
+            stream.frames_offered += 1
+            self._cond.notify()
+
+    def _pick(self) -> Optional[CameraStream]:
+        for offset in range(len(self.streams)):
+            stream = self.streams[(self._next + offset) % len(self.streams)]
+            if stream.frames and stream.in_flight < self.max_in_flight:
+                self._next = (self._next + offset + 1) % len(self.streams)
+                return stream
+        return None
+
+    def get(self, timeout: Optional[float] = None):
+        """Next (stream, item) to detect on, or None on timeout/close"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._closed or self._pick_ready(), timeout)
+            stream = None if self._closed else self._pick()
+            if stream is None:
+                return None
+            stream.in_flight += 1
+            return stream, stream.frames.popleft()
+
+    def _pick_ready(self) -> bool:
+        return any(stream.frames and stream.in_flight < self.max_in_flight for stream in self.streams)
+
+    def done(self, stream: CameraStream):
+        with self._cond:
+            stream.in_flight -= 1
+            self._cond.notify()
+
+    def idle(self) -> bool:
+        with self._cond:
+            return not any(stream.frames or stream.in_flight for stream in self.streams)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class MultiCameraOrchestrator:
+    """Runs many camera streams in one process with a shared pool of detection workers.
+
+    Every stream has its own capture thread, gate (stride, then motion, limited to
+    its ROI), optional plate tracker and location. Detection workers each own a
+    LicensePlateDetector and take frames from a FairFrameScheduler; plates are
+    stored through the shared LPRSystem writer with the stream's location.
+    """
+
+    def __init__(self, lpr_system, config: Dict, detect_workers: Optional[int] = None,
+                 motion_method: str = 'diff', motion_threshold: float = 0.005,
+                 track: bool = False, report_interval: float = 10.0):
+        self.lpr_system = lpr_system
+        self.report_interval = report_interval
+        self.streams = [CameraStream(stream, motion_method, motion_threshold, track)
+                        for stream in config['streams']]
+        self.detect_workers = (detect_workers or config.get('detect_workers')
+                               or min(len(self.streams), os.cpu_count() or 1))
+        self.scheduler = FairFrameScheduler(self.streams)
+        self._running = False
+
+    def _make_detector(self) -> LicensePlateDetector:
+        # Workers share the system detector's OCR pool and cache instead of starting their own
+        # (cache entries are scoped by stream name); ROIs are per stream, so the workers have none
+        detector = self.lpr_system.detector
+        worker = LicensePlateDetector(**dict(detector.options(), roi_polygons=None))
+        worker.ocr_pool = detector.ocr_pool
+        worker.ocr_cache = detector.ocr_cache
+        return worker
+
+    def _detect_loop(self, detector: LicensePlateDetector):
+        while self._running or not self.scheduler.idle():
+            picked = self.scheduler.get(timeout=0.1)
+            if picked is None:
+                continue
+
+            stream, (captured_at, frame, region) = picked
+            try:
+                self._detect(stream, detector, captured_at, frame, region)
+            except Exception as e:
+                print(f"Error detecting plates on {stream.name}: {e}")
+            finally:
+                self.scheduler.done(stream)
+
+        detector.ocr_pool = None  # shared; shut down with the system's detector
+        detector.close()
+
+    def _detect(self, stream: CameraStream, detector: LicensePlateDetector, captured_at: float,
+                frame, region):
+        if stream.tracker is not None:
+            with stream.lock:
+                _, plates = self.lpr_system.track_plates(frame, region, captured_at, tracker=stream.tracker,
+                                                         detector=detector, roi=stream.plate_roi,
+                                                         cache_scope=stream.name)
+        else:
+            plates = detector.detect_and_read_plates(frame, region=region, roi=stream.plate_roi,
+                                                     cache_scope=stream.name)
+
+        stream.frames_detected += 1
+        latency = time.time() - captured_at
+        stream.latency.add(latency)
+        metrics.observe_seconds('end_to_end', latency)
+        self._store(stream, plates, captured_at)
+
+    def _store(self, stream: CameraStream, plates: List[Dict], captured_at: float):
+        now = time.time()
+        for plate in plates:
+            plate_text = plate['text']
+            stream.plates += 1
+            seen_at = plate.get('last_seen', captured_at)
+            self.lpr_system.store_plate(
+                plate_text, confidence=plate.get('confidence'), wait=False,
+                latency=now - seen_at, camera_location=stream.location,
+                callback=lambda f, text=plate_text, name=stream.name:
+                    self.lpr_system._report_stored(f, text, f"{name} detection"))
+
+    def _start_stream(self, stream: CameraStream) -> bool:
+        stream.capture = cv2.VideoCapture(stream.source)
+        if not stream.capture.isOpened():
+            print(f"Error: Could not open {stream.name} ({stream.source})")
+            return False
+
+        def on_frame(index, captured_at, frame):
+            should_detect, region = stream.gate(index, frame)
+            if should_detect:
+                self.scheduler.put(stream, (captured_at, frame, region))
+
+        stream.grabber = LatestFrameGrabber(stream.capture, on_frame=on_frame)
+        return True
+
+    def stats(self) -> List[Dict]:
+        return [stream.stats() for stream in self.streams]
+
+    def report(self):
+        for stats in self.stats():
+            latency = stats['latency']
+            print(f"[{stats['name']}] {stats['capture_fps']:.1f} fps captured | "
+                  f"{stats['detect_fps']:.1f} fps detected | {stats['frames_dropped']} dropped | "
+                  f"{stats['plates']} plates | latency avg {latency['avg_ms']:.0f} ms "
+                  f"p95 {latency['p95_ms']:.0f} ms")
+
+    def _expire_tracks(self):
+        """Record tracked plates that left the frame on streams with no detection running"""
+        for stream in self.streams:
+            if stream.tracker is not None:
+                with stream.lock:
+                    finished = stream.tracker.expire()
+                self._store(stream, finished, time.time())
+
+    def run(self):
+        """Run every stream until all of them end or Ctrl+C is pressed"""
+        started = [stream for stream in self.streams if self._start_stream(stream)]
+        if not started:
+            return
+
+        print(f"Running {len(started)} stream(s) on {self.detect_workers} detection worker(s). "
+              f"Press Ctrl+C to stop.")
+        self._running = True
+        workers = [threading.Thread(target=self._detect_loop, args=(self._make_detector(),),
+                                    name=f'plate-detect-{i}', daemon=True)
+                   for i in range(self.detect_workers)]
+        for worker in workers:
+            worker.start()
+
+        last_report = time.time()
+        try:
+            while not all(stream.finished for stream in started):
+                time.sleep(0.2)
+                self._expire_tracks()
+                if time.time() - last_report >= self.report_interval:
+                    last_report = time.time()
+                    self.report()
+        finally:
+            for stream in started:
+                stream.grabber.stop()
+            self._running = False
+            for worker in workers:
+                worker.join()
+            self.scheduler.close()
+            for stream in started:
+                stream.capture.release()
+                if stream.tracker is not None:
+                    self._store(stream, stream.tracker.flush(), time.time())
+            self.report()
@@ -0,0 +1,87 @@
+import os
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from mysql.connector import pooling
+
+from storage import ROLLUP_COLUMNS, ROLLUP_SUMS, SQLPlateStorage
+
+
+class MySQLManager(SQLPlateStorage):
+    """MySQL storage using a connection pool and one transaction per batch of inserts.
+
+    Connection settings come from the same DB_* variables as
+    database_setup.py, which creates the schema. Timestamps are stored as
+    UTC DATETIME(6) values and returned as ISO-8601 strings.
+    """
+
+    placeholder = '%s'
+    row_lock = ' FOR UPDATE'
+
+    def __init__(self, pool_size: int = None):
+        pool_size = pool_size or int(os.getenv('DB_POOL_SIZE', '5'))
+        try:
+            self.pool = pooling.MySQLConnectionPool(
+                pool_name='lpr',
+                pool_size=pool_size,
+                host=os.getenv('DB_HOST', 'localhost'),
+                user=os.getenv('DB_USER', 'root'),
+                password=os.getenv('DB_PASSWORD', ''),
+                database=os.getenv('DB_NAME', 'lpr_database'),
+                time_zone='+00:00',
+            )
+            print(f"Successfully connected to MySQL ({pool_size} pooled connections)")
+        except Exception as e:
+            print(f"Error connecting to MySQL: {e}")
+            raise
+
+    @contextmanager
+    def _connection(self):
+        # Closing a pooled connection returns it to the pool
+        connection = self.pool.get_connection()
+        try:
+            yield connection
+            connection.commit()
+        except BaseException:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+
+    def _insert_rows(self, connection, rows: List[tuple]) -> List[int]:
+        # One row per statement in the batch's transaction: a multi-row INSERT only
+        # reports its first ID, and the rest are not consecutive under the default
+        # autoinc_lock_mode 2 or with auto_increment_increment > 1
+        cursor = connection.cursor()
+        try:
+            record_ids = []
+            for row in rows:
+                cursor.execute(
+                    'INSERT INTO license_plates (plate_number, confidence_score, image_path, camera_location, '
+                    'timestamp) VALUES (%s, %s, %s, %s, %s)', row)
+                record_ids.append(cursor.lastrowid)
+            return record_ids
+        finally:
+            cursor.close()
+
+    def _add_rollups_sql(self) -> str:
+        updates = ', '.join(f'{column} = {column} + VALUES({column})' if column in ROLLUP_SUMS
+                            else f'{column} = VALUES({column})' for column in ROLLUP_COLUMNS[3:])
+        return (f"INSERT INTO plate_rollups ({', '.join(ROLLUP_COLUMNS)}) "
+                f"VALUES ({', '.join(['%s'] * len(ROLLUP_COLUMNS))}) "
+                f"ON DUPLICATE KEY UPDATE {updates}")
+
+    def _to_db(self, value):
+        """ISO timestamps (any offset) become naive UTC datetimes"""
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        if isinstance(value, datetime) and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+    def _from_db(self, row: Dict) -> Dict:
+        for column in ('timestamp', 'bucket_start'):
+            if isinstance(row.get(column), datetime):
+                row[column] = row[column].replace(tzinfo=timezone.utc).isoformat()
+        return row
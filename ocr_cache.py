@@ -0,0 +1,143 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+# Crops are compared as contrast-normalized FINGERPRINT_WIDTH x FINGERPRINT_HEIGHT thumbnails
+FINGERPRINT_WIDTH = 64
+FINGERPRINT_HEIGHT = 16
+
+# Differences are averaged over column windows about one character wide (plates hold 5-8)
+CHARACTER_WINDOW = FINGERPRINT_WIDTH // 8
+
+
+def plate_fingerprint(plate_image) -> np.ndarray:
+    """Contrast-normalized grayscale thumbnail of a plate crop (grayscale or BGR)"""
+    if plate_image.ndim == 3:
+        plate_image = cv2.cvtColor(plate_image, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(plate_image, (FINGERPRINT_WIDTH, FINGERPRINT_HEIGHT), interpolation=cv2.INTER_AREA)
+    return cv2.normalize(small, None, 0, 255, cv2.NORM_MINMAX)
+
+
+def fingerprint_distance(a: np.ndarray, b: np.ndarray) -> float:
+    """Largest mean absolute difference (0-255) over any character-wide window of columns.
+
+    Averaging over the whole crop would dilute a single changed character
+    among the unchanged ones; a window the width of one character does not,
+    so ABC123 and ABC128 stay far apart while sensor noise averages out.
+    """
+    columns = np.abs(a.astype(np.int16) - b).mean(axis=0)
+    sums = np.concatenate(([0.0], np.cumsum(columns)))
+    return float((sums[CHARACTER_WINDOW:] - sums[:-CHARACTER_WINDOW]).max() / CHARACTER_WINDOW)
+
+
+def _box_iou(a: Sequence[int], b: Sequence[int]) -> float:
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    w = min(ax + aw, bx + bw) - max(ax, bx)
+    h = min(ay + ah, by + bh) - max(ay, by)
+    if w <= 0 or h <= 0:
+        return 0.0
+    inter = w * h
+    return inter / float(aw * ah + bw * bh - inter)
+
+
+class OCRResultCache:
+    """Bounded, TTL-based cache of OCR readings for near-identical plate crops.
+
+    A crop reuses a cached reading only if it comes from the same ``scope``
+    (camera), its (x, y, w, h) box overlaps the cached crop's box by at least
+    ``min_iou``, and its fingerprint is within ``max_distance`` of the cached
+    one (see fingerprint_distance). That is the case for a car waiting at a
+    barrier; a different car, or the same car after it moved, is read again.
+    Entries expire ``ttl`` seconds after they were read and the oldest are
+    evicted beyond ``max_entries``. Safe to share between threads.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 2.0, max_distance: float = 6.0,
+                 min_iou: float = 0.7):
+        if max_distance < 0:
+            raise ValueError("max_distance must not be negative")
+
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_distance = max_distance
+        self.min_iou = min_iou
+
+        # entry id -> (scope, box, fingerprint, reading, stored_at), oldest first
+        self._entries: 'OrderedDict[int, Tuple]' = OrderedDict()
+        self._by_scope: Dict[Hashable, set] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _remove(self, entry_id: int):
+        scope = self._entries.pop(entry_id)[0]
+        ids = self._by_scope[scope]
+        ids.discard(entry_id)
+        if not ids:
+            del self._by_scope[scope]
+
+    def _purge(self, now: float):
+        """Drop expired entries from the front, then enforce the size cap"""
+        while self._entries:
+            entry_id, entry = next(iter(self._entries.items()))
+            if now - entry[4] < self.ttl:
+                break
+            self._remove(entry_id)
+
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _matches(self, entry, box) -> bool:
+        return box is None or entry[1] is None or _box_iou(box, entry[1]) >= self.min_iou
+
+    def get(self, fingerprint: np.ndarray, scope: Hashable = None, box: Optional[Sequence[int]] = None,
+            now: Optional[float] = None) -> Optional[Dict]:
+        """Copy of the reading of the closest live cached crop at this position, or None"""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._purge(now)
+            best, best_distance = None, self.max_distance
+            for entry_id in self._by_scope.get(scope, ()):
+                entry = self._entries[entry_id]
+                if not self._matches(entry, box):
+                    continue
+                distance = fingerprint_distance(fingerprint, entry[2])
+                if distance <= best_distance:
+                    best, best_distance = entry, distance
+
+            if best is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return dict(best[3])
+
+    def put(self, fingerprint: np.ndarray, reading: Dict, scope: Hashable = None,
+            box: Optional[Sequence[int]] = None, now: Optional[float] = None):
+        now = time.time() if now is None else now
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (scope, tuple(box) if box is not None else None,
+                                       fingerprint, dict(reading), now)
+            self._by_scope.setdefault(scope, set()).add(entry_id)
+            self._purge(now)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'max_distance': self.max_distance,
+            }
@@ -0,0 +1,240 @@
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pytesseract
+
+try:
+    # tesserocr talks to libtesseract directly, so the engine and its
+    # language model stay loaded between calls instead of forking a process
+    import tesserocr
+    from PIL import Image
+except ImportError:
+    tesserocr = None
+
+PLATE_CHARSET = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
+PLATE_PSM = 8
+
+
+class TesseractEngine:
+    """Tesseract OCR engine configured for license plates"""
+
+    def __init__(self, psm: int = PLATE_PSM, whitelist: str = PLATE_CHARSET):
+        self.psm = psm
+        self.whitelist = whitelist
+        self.config = f'--oem 3 --psm {psm} -c tessedit_char_whitelist={whitelist}'
+        self._api = None
+
+        if tesserocr is not None:
+            try:
+                self._api = tesserocr.PyTessBaseAPI(psm=psm, oem=tesserocr.OEM.DEFAULT)
+                self._api.SetVariable('tessedit_char_whitelist', whitelist)
+            except Exception as e:
+                print(f"Warning: tesserocr unavailable ({e}). Falling back to pytesseract.")
+                self._api = None
+
+    @property
+    def persistent(self) -> bool:
+        """True when the engine stays loaded between calls"""
+        return self._api is not None
+
+    def read(self, binary_image) -> str:
+        """Run OCR on a preprocessed (binary) plate image and return raw text"""
+        if self._api is not None:
+            self._api.SetImage(Image.fromarray(binary_image))
+            return self._api.GetUTF8Text()
+
+        return pytesseract.image_to_string(binary_image, config=self.config)
+
+    def read_with_confidence(self, binary_image) -> Tuple[str, List[float]]:
+        """Run OCR and return the text (whitespace removed) with a 0-1 confidence per character"""
+        if self._api is not None:
+            self._api.SetImage(Image.fromarray(binary_image))
+            self._api.Recognize()
+            level = tesserocr.RIL.SYMBOL
+            chars, confidences = [], []
+            for symbol in tesserocr.iterate_level(self._api.GetIterator(), level):
+                char = symbol.GetUTF8Text(level)
+                if char and not char.isspace():
+                    chars.append(char)
+                    confidences.append(symbol.Confidence(level) / 100.0)
+            return ''.join(chars), confidences
+
+        # pytesseract only reports word-level confidence; every character inherits it
+        text, confidences = '', []
+        for word in self.read_words(binary_image):
+            word_text = ''.join(word['text'].split())
+            text += word_text
+            confidences += [max(word['conf'], 0) / 100.0] * len(word_text)
+        return text, confidences
+
+    def read_words(self, image, psm: Optional[int] = None) -> List[Dict]:
+        """Run OCR and return word boxes as dicts (text, left, top, width, height, conf)"""
+        psm = self.psm if psm is None else psm
+
+        if self._api is not None:
+            self._api.SetPageSegMode(psm)
+            try:
+                self._api.SetImage(Image.fromarray(image))
+                self._api.Recognize()
+                level = tesserocr.RIL.WORD
+                words = []
+                for word in tesserocr.iterate_level(self._api.GetIterator(), level):
+                    text = word.GetUTF8Text(level)
+                    if not text:
+                        continue
+                    x1, y1, x2, y2 = word.BoundingBox(level)
+                    words.append({'text': text, 'left': x1, 'top': y1,
+                                  'width': x2 - x1, 'height': y2 - y1,
+                                  'conf': word.Confidence(level)})
+                return words
+            finally:
+                self._api.SetPageSegMode(self.psm)
+
+        config = f'--oem 3 --psm {psm} -c tessedit_char_whitelist={self.whitelist}'
+        data = pytesseract.image_to_data(image, config=config, output_type=pytesseract.Output.DICT)
+        words = []
+        for i, text in enumerate(data['text']):
+            if not text.strip():
+                continue
+            words.append({'text': text, 'left': data['left'][i], 'top': data['top'][i],
+                          'width': data['width'][i], 'height': data['height'][i],
+                          'conf': float(data['conf'][i])})
+        return words
+
+    def close(self):
+        """Release the underlying Tesseract handle"""
+        if self._api is not None:
+            self._api.End()
+            self._api = None
+
+
+class OCRWorkerPool:
+    """Long-lived pool of OCR worker threads, each owning its own TesseractEngine.
+
+    Jobs are callables invoked as ``fn(engine, *args)`` on a worker thread and
+    their results are delivered through ``concurrent.futures.Future`` objects.
+    """
+
+    def __init__(self, num_workers: Optional[int] = None, pin_to_cores: bool = True,
+                 engine_factory: Callable[[], TesseractEngine] = TesseractEngine,
+                 latency_window: int = 1000):
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.pin_to_cores = pin_to_cores
+        self.engine_factory = engine_factory
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=latency_window)
+        self._waits = deque(maxlen=latency_window)
+        self._calls = 0
+        self._errors = 0
+        self._shutdown = False
+
+        self._workers: List[threading.Thread] = []
+        for index in range(self.num_workers):
+            worker = threading.Thread(target=self._worker_loop, args=(index,),
+                                      name=f'ocr-worker-{index}', daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def _pin_current_thread(self, index: int):
+        """Pin the calling worker thread to a single core (Linux only)"""
+        if not self.pin_to_cores or not hasattr(os, 'sched_setaffinity'):
+            return
+
+        try:
+            cores = sorted(os.sched_getaffinity(0))
+            os.sched_setaffinity(0, {cores[index % len(cores)]})
+        except OSError as e:
+            print(f"Warning: could not pin OCR worker {index}: {e}")
+
+    def _worker_loop(self, index: int):
+        """Worker body: build an engine once, then serve jobs until shutdown"""
+        self._pin_current_thread(index)
+        engine = self.engine_factory()
+        if index == 0 and not getattr(engine, 'persistent', True):
+            print(f"Warning: OCR pool has {self.num_workers} worker(s) but no loaded Tesseract engine "
+                  f"(install tesserocr); every OCR call still starts a tesseract process")
+
+        try:
+            while True:
+                job = self._queue.get()
+                if job is None:
+                    break
+
+                future, fn, args, enqueued_at = job
+                if not future.set_running_or_notify_cancel():
+                    continue
+
+                started_at = time.perf_counter()
+                try:
+                    result = fn(engine, *args)
+                except Exception as e:
+                    with self._lock:
+                        self._errors += 1
+                    future.set_exception(e)
+                else:
+                    future.set_result(result)
+
+                finished_at = time.perf_counter()
+                with self._lock:
+                    self._calls += 1
+                    self._waits.append(started_at - enqueued_at)
+                    self._latencies.append(finished_at - started_at)
+        finally:
+            engine.close()
+
+    def submit(self, fn: Callable, *args) -> Future:
+        """Queue ``fn(engine, *args)`` for a worker and return its future"""
+        if self._shutdown:
+            raise RuntimeError("OCR worker pool has been shut down")
+
+        future = Future()
+        self._queue.put((future, fn, args, time.perf_counter()))
+        return future
+
+    def queue_depth(self) -> int:
+        """Number of jobs waiting for a free worker"""
+        return self._queue.qsize()
+
+    def stats(self) -> Dict:
+        """Snapshot of queue depth and per-call latency (milliseconds)"""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            waits = list(self._waits)
+            calls = self._calls
+            errors = self._errors
+
+        def percentile(values, pct):
+            if not values:
+                return 0.0
+            return values[min(len(values) - 1, int(len(values) * pct))] * 1000
+
+        return {
+            'workers': self.num_workers,
+            'queue_depth': self.queue_depth(),
+            'calls': calls,
+            'errors': errors,
+            'latency_avg_ms': (sum(latencies) / len(latencies) * 1000) if latencies else 0.0,
+            'latency_p50_ms': percentile(latencies, 0.50),
+            'latency_p95_ms': percentile(latencies, 0.95),
+            'queue_wait_avg_ms': (sum(waits) / len(waits) * 1000) if waits else 0.0,
+        }
+
+    def shutdown(self, wait: bool = True):
+        """Stop all workers after the queued jobs have been served"""
+        if self._shutdown:
+            return
+
+        self._shutdown = True
+        for _ in self._workers:
+            self._queue.put(None)
+
+        if wait:
+            for worker in self._workers:
+                worker.join()
@@ -0,0 +1,94 @@
+from typing import Dict, List, Sequence
+
+import cv2
+import numpy as np
+
+from plate_tracker import iou_matrix
+
+# Plates are about 3.5 times wider than tall (EU ~4.7, US ~2); aspect is scored on a log scale
+IDEAL_ASPECT = 3.5
+ASPECT_SPREAD = 0.5
+
+# Edge pixels per row crossing the middle of a plate: a few per character
+MIN_STROKE_CROSSINGS = 10.0
+
+# Characters put edges about a fifth of the plate height apart; noise and texture far closer
+MIN_STROKE_SPACING = 0.05
+
+
+def _box_sums(integral: np.ndarray, x0, y0, x1, y1) -> np.ndarray:
+    """Sum of the image inside every [x0, x1) x [y0, y1) box, from its integral image"""
+    return integral[y1, x1] - integral[y0, x1] - integral[y1, x0] + integral[y0, x0]
+
+
+def candidate_features(edged: np.ndarray, boxes: np.ndarray, fill: np.ndarray) -> Dict[str, np.ndarray]:
+    """Plate-likeness features of every (x, y, w, h) box, as arrays.
+
+    - aspect: width / height
+    - fill: share of the box covered by the shape that produced it (1 for cascade boxes)
+    - edge_density: share of edge pixels inside the box, borders excluded
+    - crossings: edge pixels per row across the middle third, i.e. character
+      strokes a horizontal scan line passes through
+    - stroke_spacing: mean gap between those crossings, relative to the box height
+    """
+    height, width = edged.shape[:2]
+    integral = cv2.integral((edged > 0).astype(np.uint8))
+    x, y, w, h = (boxes[:, i] for i in range(4))
+
+    # Inset the box so the plate's own border does not count as strokes
+    x0 = np.clip(x + w // 12, 0, width)
+    x1 = np.clip(x + w - w // 12, 0, width)
+    y0 = np.clip(y + h // 8, 0, height)
+    y1 = np.clip(y + h - h // 8, 0, height)
+    inner_area = np.maximum((x1 - x0) * (y1 - y0), 1)
+
+    band0 = np.clip(y + h // 3, 0, height)
+    band1 = np.clip(y + (2 * h) // 3, 0, height)
+    band_rows = np.maximum(band1 - band0, 1)
+
+    crossings = _box_sums(integral, x0, band0, x1, band1) / band_rows
+    return {
+        'aspect': w / np.maximum(h, 1),
+        'fill': fill,
+        'edge_density': _box_sums(integral, x0, y0, x1, y1) / inner_area,
+        'crossings': crossings,
+        'stroke_spacing': (x1 - x0) / np.maximum(crossings, 1.0) / np.maximum(h, 1),
+    }
+
+
+def score_candidates(features: Dict[str, np.ndarray]) -> np.ndarray:
+    """0-1 plate score per candidate; boxes with no character-like strokes score 0"""
+    aspect = np.exp(-np.log(np.maximum(features['aspect'], 1e-3) / IDEAL_ASPECT) ** 2
+                    / (2 * ASPECT_SPREAD ** 2))
+    fill = np.clip(features['fill'], 0.0, 1.0)
+    # Characters make some edges; foliage, grilles and text blocks make far more
+    density = (np.clip(features['edge_density'] / 0.05, 0.0, 1.0)
+               * np.clip((0.5 - features['edge_density']) / 0.25, 0.0, 1.0))
+    strokes = (np.clip(features['crossings'] / MIN_STROKE_CROSSINGS, 0.0, 1.0)
+               * np.clip(features['stroke_spacing'] / MIN_STROKE_SPACING - 1.0, 0.0, 1.0))
+    return strokes * (0.35 * aspect + 0.2 * fill + 0.45 * density)
+
+
+def non_max_suppression(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float = 0.3) -> List[int]:
+    """Indices of the boxes kept, best first, dropping boxes overlapping a better one"""
+    order = np.argsort(-scores, kind='stable')
+    iou = iou_matrix(boxes.astype(np.float64), boxes.astype(np.float64))
+    suppressed = np.zeros(len(boxes), dtype=bool)
+    keep = []
+    for index in order:
+        if suppressed[index]:
+            continue
+        keep.append(int(index))
+        suppressed |= iou[index] > iou_threshold
+    return keep
+
+
+def rank_candidates(edged: np.ndarray, boxes: Sequence, fill: Sequence, max_candidates: int = 3,
+                    min_score: float = 0.1, iou_threshold: float = 0.3) -> List[tuple]:
+    """Score candidate boxes, merge overlapping ones and return the best max_candidates"""
+    if not len(boxes):
+        return []
+    boxes = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+    scores = score_candidates(candidate_features(edged, boxes, np.asarray(fill, dtype=np.float64)))
+    keep = [i for i in non_max_suppression(boxes, scores, iou_threshold) if scores[i] >= min_score]
+    return [tuple(int(v) for v in boxes[i]) for i in keep[:max_candidates]]
@@ -0,0 +1,155 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterator, Optional, Set, Tuple
+
+# Characters OCR commonly confuses on plates, folded onto one representative
+CONFUSABLE_CHARACTERS = str.maketrans({
+    'O': '0', 'D': '0', 'Q': '0',
+    'I': '1', 'L': '1',
+    'Z': '2',
+    'S': '5',
+    'G': '6',
+    'B': '8',
+})
+
+
+def normalize_plate(plate_number: str) -> str:
+    """Fold OCR-confusable characters so e.g. ABC123 and A8C123 share a key"""
+    return plate_number.upper().translate(CONFUSABLE_CHARACTERS)
+
+
+def edit_distance_at_most_one(a: str, b: str) -> bool:
+    """True if a and b differ by at most one insertion, deletion or substitution"""
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        return a[i + 1:] == b[i + 1:]
+    return a[i:] == b[i + 1:]
+
+
+def _deletion_variants(key: str) -> Iterator[str]:
+    """The key itself plus every string obtained by deleting one character"""
+    yield key
+    for i in range(len(key)):
+        yield key[:i] + key[i + 1:]
+
+
+class PlateDedupCache:
+    """Bounded, TTL-based memory of recently recorded plates with fuzzy matching.
+
+    Plates are normalized with CONFUSABLE_CHARACTERS and, with
+    ``max_distance=1``, matched within one edit through a single-deletion
+    index (the SymSpell trick), so lookups cost O(plate length) dict probes
+    regardless of how many plates are remembered. Entries are scoped (e.g.
+    per camera) and expire ``ttl`` seconds after they were recorded. Beyond
+    ``max_entries`` the earliest recorded entries are evicted first: a
+    suppressed duplicate refreshes neither the TTL nor the eviction order, so
+    entries stay in expiry order and purging only looks at the front. Safe to
+    share between threads.
+    """
+
+    def __init__(self, ttl: float = 30.0, max_entries: int = 100000, max_distance: int = 1):
+        if max_distance not in (0, 1):
+            raise ValueError("max_distance must be 0 or 1")
+
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+
+        # (scope, key) -> recorded_at, oldest first
+        self._entries: 'OrderedDict[Tuple[Hashable, str], float]' = OrderedDict()
+        self._index: Dict[Tuple[Hashable, str], Set[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _index_variants(self, key: str):
+        return _deletion_variants(key) if self.max_distance else (key,)
+
+    def _remove(self, entry: Tuple[Hashable, str]):
+        del self._entries[entry]
+        scope, key = entry
+        for variant in self._index_variants(key):
+            bucket = self._index.get((scope, variant))
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._index[(scope, variant)]
+
+    def _purge(self, now: float):
+        """Drop expired entries from the front, then enforce the size cap"""
+        while self._entries:
+            entry, recorded_at = next(iter(self._entries.items()))
+            if now - recorded_at < self.ttl:
+                break
+            self._remove(entry)
+
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _find(self, scope: Hashable, key: str, now: float) -> Optional[Tuple[Hashable, str]]:
+        """Live entry matching key within max_distance, if any"""
+        candidates = set()
+        for variant in self._index_variants(key):
+            candidates.update(self._index.get((scope, variant), ()))
+
+        for candidate in candidates:
+            if candidate == key or edit_distance_at_most_one(candidate, key):
+                recorded_at = self._entries[(scope, candidate)]
+                if now - recorded_at < self.ttl:
+                    return (scope, candidate)
+        return None
+
+    def claim(self, plate_number: str, scope: Hashable = None, now: Optional[float] = None) -> bool:
+        """Record a plate unless a similar one was recorded in the same scope within the TTL.
+
+        Returns True if the caller should store the plate, False for a duplicate.
+        """
+        now = time.time() if now is None else now
+        key = normalize_plate(plate_number)
+
+        with self._lock:
+            self._purge(now)
+            if self._find(scope, key, now) is not None:
+                self.hits += 1
+                return False
+
+            self.misses += 1
+            entry = (scope, key)
+            if entry in self._entries:
+                self._remove(entry)
+            self._entries[entry] = now
+            for variant in self._index_variants(key):
+                self._index.setdefault((scope, variant), set()).add(key)
+
+            self._purge(now)
+            return True
+
+    def release(self, plate_number: str, scope: Hashable = None, recorded_at: Optional[float] = None):
+        """Forget a claim (e.g. when storing the plate failed)"""
+        entry = (scope, normalize_plate(plate_number))
+        with self._lock:
+            if entry in self._entries and (recorded_at is None or self._entries[entry] == recorded_at):
+                self._remove(entry)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'index_keys': len(self._index),
+                'duplicates_suppressed': self.hits,
+                'plates_claimed': self.misses,
+                'evictions': self.evictions,
+            }
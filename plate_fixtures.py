@@ -0,0 +1,41 @@
+"""
+Synthetic plate crops for the tests, without the benchmark scene generator
+"""
+
+from typing import Optional
+
+import cv2
+import numpy as np
+
+from ocr_pool import PLATE_CHARSET
+
+PLATE_ASPECT = 4.0
+
+
+def random_plate_text(rng: np.random.Generator, length: Optional[int] = None) -> str:
+    length = length or int(rng.integers(6, 8))
+    return ''.join(rng.choice(list(PLATE_CHARSET), size=length))
+
+
+def render_plate(text: str, width: int) -> np.ndarray:
+    """Dark-on-white plate with a border, the text scaled to fill it"""
+    height = max(12, int(round(width / PLATE_ASPECT)))
+    plate = np.full((height, width, 3), 245, dtype=np.uint8)
+    cv2.rectangle(plate, (1, 1), (width - 2, height - 2), (20, 20, 20), max(1, height // 25))
+
+    font, thickness = cv2.FONT_HERSHEY_SIMPLEX, max(1, height // 12)
+    (text_w, text_h), _ = cv2.getTextSize(text, font, 1.0, thickness)
+    scale = min(0.86 * width / text_w, 0.62 * height / text_h)
+    (text_w, text_h), _ = cv2.getTextSize(text, font, scale, thickness)
+    origin = ((width - text_w) // 2, (height + text_h) // 2)
+    cv2.putText(plate, text, origin, font, scale, (15, 15, 15), thickness, cv2.LINE_AA)
+    return plate
+
+
+def generate_crop(text: str, width: int = 240, noise: float = 4.0, seed: int = 0) -> np.ndarray:
+    """A tight plate crop like the detector hands to OCR, with Gaussian noise (std)"""
+    rng = np.random.default_rng(seed)
+    crop = render_plate(text, width)
+    if noise > 0:
+        crop = np.clip(crop + rng.normal(0, noise, crop.shape), 0, 255).astype(np.uint8)
+    return crop
@@ -0,0 +1,77 @@
+import json
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+
+class PlateROI:
+    """Lane polygons plates can appear in, for one camera.
+
+    Detection only runs on the bounding boxes of the polygons (overlapping
+    boxes are merged), edges outside the polygons are masked away, and
+    candidates whose centre falls outside every polygon are dropped before OCR.
+    """
+
+    def __init__(self, polygons: Sequence[Sequence[Sequence[int]]]):
+        self.polygons = [np.array(polygon, dtype=np.int32).reshape(-1, 2) for polygon in polygons]
+        if not self.polygons or any(len(polygon) < 3 for polygon in self.polygons):
+            raise ValueError("An ROI needs at least one polygon of three or more points")
+        self._boxes = self._merge([cv2.boundingRect(polygon) for polygon in self.polygons])
+
+    @staticmethod
+    def _merge(boxes: List[Tuple[int, int, int, int]]) -> List[Tuple[int, int, int, int]]:
+        """Union overlapping (x, y, w, h) boxes so no pixel is searched twice"""
+        boxes = list(boxes)
+        merged = True
+        while merged:
+            merged = False
+            for i in range(len(boxes)):
+                for j in range(i + 1, len(boxes)):
+                    ax, ay, aw, ah = boxes[i]
+                    bx, by, bw, bh = boxes[j]
+                    if ax < bx + bw and bx < ax + aw and ay < by + bh and by < ay + ah:
+                        x0, y0 = min(ax, bx), min(ay, by)
+                        x1, y1 = max(ax + aw, bx + bw), max(ay + ah, by + bh)
+                        boxes[i] = (x0, y0, x1 - x0, y1 - y0)
+                        del boxes[j]
+                        merged = True
+                        break
+                if merged:
+                    break
+        return boxes
+
+    def to_list(self) -> List[List[List[int]]]:
+        return [polygon.tolist() for polygon in self.polygons]
+
+    def bounds(self) -> Tuple[int, int, int, int]:
+        """(x, y, w, h) box around every polygon"""
+        return cv2.boundingRect(np.concatenate(self.polygons))
+
+    def regions(self, frame_shape, region: Optional[Tuple[int, int, int, int]] = None
+                ) -> List[Tuple[int, int, int, int]]:
+        """Boxes to search in a frame, clipped to the frame and to an optional (x, y, w, h) region"""
+        height, width = frame_shape[:2]
+        limit = region or (0, 0, width, height)
+        clipped = []
+        for x, y, w, h in self._boxes:
+            x0, y0 = max(x, limit[0], 0), max(y, limit[1], 0)
+            x1 = min(x + w, limit[0] + limit[2], width)
+            y1 = min(y + h, limit[1] + limit[3], height)
+            if x1 > x0 and y1 > y0:
+                clipped.append((x0, y0, x1 - x0, y1 - y0))
+        return clipped
+
+    def mask(self, box: Tuple[int, int, int, int]) -> np.ndarray:
+        """255 inside the polygons, 0 outside, for the pixels of a box"""
+        x, y, w, h = box
+        mask = np.zeros((h, w), dtype=np.uint8)
+        cv2.fillPoly(mask, [polygon - (x, y) for polygon in self.polygons], 255)
+        return mask
+
+
+def load_roi_config(path: str) -> Dict[str, PlateROI]:
+    """Read per-location ROI polygons: {"Main Entrance": [[[x, y], ...], ...], ...}"""
+    with open(path) as f:
+        config = json.load(f)
+    return {location: PlateROI(polygons) for location, polygons in config.items()}
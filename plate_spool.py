@@ -0,0 +1,298 @@
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple
+
+import metrics
+
+
+class PlateSpool:
+    """Durable local append-only spool of plate records backed by SQLite.
+
+    Records are committed to disk before anything is sent to the database and
+    removed only after the database acknowledges them, so reads survive
+    network outages and process restarts. Records the database keeps
+    rejecting are moved to a ``dead_letter`` table in the same file.
+    """
+
+    def __init__(self, path: str = 'lpr_spool.db'):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+
+        with self._lock:
+            # auto_vacuum must be chosen before the first table is created
+            self._conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            self._conn.execute('PRAGMA journal_mode = WAL')
+            self._conn.execute('PRAGMA synchronous = NORMAL')
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS spool (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    record TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS dead_letter (
+                    id INTEGER PRIMARY KEY,
+                    record TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    attempts INTEGER NOT NULL,
+                    error TEXT,
+                    failed_at REAL NOT NULL
+                )
+            """)
+
+    def append(self, record: Dict) -> int:
+        """Durably append one record and return its spool id"""
+        with self._lock:
+            cursor = self._conn.execute(
+                'INSERT INTO spool (record, created_at) VALUES (?, ?)',
+                (json.dumps(record), time.time()))
+            return cursor.lastrowid
+
+    def pending(self, limit: int) -> List[Tuple[int, Dict, int]]:
+        """Oldest unacknowledged records as (spool_id, record, failed attempts)"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT id, record, attempts FROM spool ORDER BY id LIMIT ?', (limit,)).fetchall()
+        return [(spool_id, json.loads(record), attempts) for spool_id, record, attempts in rows]
+
+    def count(self) -> int:
+        """Number of records waiting to be replayed"""
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM spool').fetchone()[0]
+
+    def mark_failed(self, spool_ids: List[int]):
+        """Record a failed delivery attempt for the given records"""
+        with self._lock:
+            self._conn.executemany('UPDATE spool SET attempts = attempts + 1 WHERE id = ?',
+                                   [(spool_id,) for spool_id in spool_ids])
+
+    def dead_letter(self, spool_ids: List[int], error: str):
+        """Move records the database rejects out of the replay queue"""
+        with self._lock:
+            self._conn.execute('BEGIN')
+            for spool_id in spool_ids:
+                self._conn.execute(
+                    'INSERT INTO dead_letter (id, record, created_at, attempts, error, failed_at) '
+                    'SELECT id, record, created_at, attempts, ?, ? FROM spool WHERE id = ?',
+                    (error, time.time(), spool_id))
+                self._conn.execute('DELETE FROM spool WHERE id = ?', (spool_id,))
+            self._conn.execute('COMMIT')
+
+    def dead_count(self) -> int:
+        """Number of records given up on"""
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM dead_letter').fetchone()[0]
+
+    def acknowledge(self, spool_ids: List[int]):
+        """Remove records the database has accepted"""
+        with self._lock:
+            self._conn.execute('BEGIN')
+            self._conn.executemany('DELETE FROM spool WHERE id = ?',
+                                   [(spool_id,) for spool_id in spool_ids])
+            self._conn.execute('COMMIT')
+
+    def compact(self):
+        """Return space freed by acknowledged records to the filesystem"""
+        with self._lock:
+            self._conn.execute('PRAGMA incremental_vacuum')
+            self._conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class SpooledPlateWriter:
+    """Plate writer that spools every record locally before replaying it in bulk.
+
+    ``submit`` only waits for a local SQLite commit. A background drainer sends
+    spooled records to the database as multi-row inserts, retries with capped
+    exponential backoff for as long as the database is unreachable, and deletes
+    records once they are acknowledged. Records left over from a previous run
+    are replayed on startup. Same interface as AsyncPlateWriter.
+
+    A batch that has failed ``max_attempts`` times while the database answers
+    its connection test holds a record the database rejects (a constraint or
+    a bad value). The batch is then split in halves until the rejected
+    records are found; they go to the dead-letter table so the records
+    behind them are not blocked forever.
+    """
+
+    def __init__(self, db_manager, spool_path: str = 'lpr_spool.db', batch_size: int = 200,
+                 flush_interval: float = 0.5, retry_backoff: float = 0.5,
+                 max_backoff: float = 60.0, compact_every: int = 10000, max_attempts: int = 5):
+        self.db_manager = db_manager
+        self.spool = PlateSpool(spool_path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retry_backoff = retry_backoff
+        self.max_backoff = max_backoff
+        self.compact_every = compact_every
+        self.max_attempts = max_attempts
+
+        self._futures: Dict[int, Future] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._closed = False
+        self._unflushed = 0
+        self._acked_since_compact = 0
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+
+        backlog = self.spool.count()
+        if backlog:
+            print(f"Replaying {backlog} spooled plate record(s) from {spool_path}")
+
+        self._thread = threading.Thread(target=self._run, name='plate-spool-drainer', daemon=True)
+        self._thread.start()
+
+    def submit(self, record: Dict, callback: Optional[Callable[[Future], None]] = None,
+               block: bool = True, timeout: Optional[float] = None, flush: bool = False) -> Future:
+        """Spool a record and return a Future for its database record id.
+
+        flush=True wakes the drainer at once instead of at the next flush_interval.
+        """
+        future = Future()
+        if callback is not None:
+            future.add_done_callback(callback)
+
+        # Register the future under the same lock the drainer uses to resolve
+        # it, so a record can't be acknowledged before its future is known
+        with self._lock:
+            try:
+                spool_id = self.spool.append(record)
+            except sqlite3.Error as e:
+                self.dropped += 1
+                metrics.inc('records_dropped')
+                print(f"Error spooling plate record: {e}")
+                future.set_result(None)
+                return future
+
+            self._futures[spool_id] = future
+            self._unflushed += 1
+            if flush or self._unflushed >= self.batch_size:
+                self._wakeup.set()
+        return future
+
+    def pending(self) -> int:
+        """Number of records spooled but not yet acknowledged"""
+        return self.spool.count()
+
+    def _drain_once(self) -> bool:
+        """Send one batch from the spool; returns False if it has to be retried later"""
+        batch = self.spool.pending(self.batch_size)
+        if not batch:
+            return True
+
+        try:
+            self._deliver(batch)
+        except Exception as e:
+            self.spool.mark_failed([spool_id for spool_id, _, _ in batch])
+            print(f"Error replaying {len(batch)} spooled plate record(s): {e}")
+            if max(attempts for _, _, attempts in batch) + 1 < self.max_attempts:
+                return False
+            # Failing again and again: an outage, or rows the database will never accept
+            if not self.db_manager.test_connection():
+                return False
+            self._isolate(batch, e)
+        return True
+
+    def _isolate(self, batch: List[Tuple[int, Dict, int]], error: Exception):
+        """Deliver what the database accepts from a failing batch, dead-lettering the rest"""
+        if len(batch) == 1:
+            spool_id, record, attempts = batch[0]
+            self.spool.dead_letter([spool_id], str(error))
+            with self._lock:
+                self.dropped += 1
+                future = self._futures.pop(spool_id, None)
+            metrics.inc('records_dropped')
+            print(f"Warning: moved plate record {record.get('plate_number')} to the dead-letter table "
+                  f"after {attempts + 1} attempts: {error}")
+            if future is not None:
+                future.set_result(None)
+            return
+
+        middle = len(batch) // 2
+        for half in (batch[:middle], batch[middle:]):
+            try:
+                self._deliver(half)
+            except Exception as e:
+                self._isolate(half, e)
+
+    def _deliver(self, batch: List[Tuple[int, Dict, int]]):
+        """Insert a batch, acknowledge it and resolve its futures; insert errors are raised"""
+        spool_ids = [spool_id for spool_id, _, _ in batch]
+        started = metrics.timer()
+        record_ids = self.db_manager.insert_plate_records([record for _, record, _ in batch])
+        metrics.observe('db_insert', started)
+
+        self.spool.acknowledge(spool_ids)
+        with self._lock:
+            self.written += len(batch)
+            self.batches += 1
+            self._acked_since_compact += len(batch)
+            futures = [self._futures.pop(spool_id, None) for spool_id in spool_ids]
+        for future, record_id in zip(futures, record_ids):
+            if future is not None:
+                future.set_result(record_id)
+
+        if self._acked_since_compact >= self.compact_every:
+            self._acked_since_compact = 0
+            self.spool.compact()
+
+    def _drain(self):
+        """Replay until the spool is empty, backing off while the database is down"""
+        delay = self.retry_backoff
+        while True:
+            with self._lock:
+                self._unflushed = 0
+            if self.spool.count() == 0:
+                return
+            if self._drain_once():
+                delay = self.retry_backoff
+                continue
+            if self._closed:
+                return
+            self._stop.wait(delay)
+            delay = min(delay * 2, self.max_backoff)
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self._drain()
+
+    def close(self, timeout: Optional[float] = None):
+        """Make a final replay attempt and stop; unsent records stay spooled on disk"""
+        if self._closed:
+            return
+
+        self._closed = True
+        self._stop.set()
+        self._wakeup.set()
+        self._thread.join(timeout)
+        self._drain()
+
+        remaining = self.spool.count()
+        dead = self.spool.dead_count()
+        self.spool.compact()
+        self.spool.close()
+
+        # Records still on disk will be replayed by the next run
+        with self._lock:
+            futures = list(self._futures.values())
+            self._futures.clear()
+        for future in futures:
+            future.set_result(None)
+
+        print(f"Plate spool: {self.written} written in {self.batches} batches, "
+              f"{remaining} left in {self.spool.path} for replay"
+              + (f", {dead} in its dead_letter table" if dead else ""))
@@ -0,0 +1,237 @@
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def iou_matrix(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU between two arrays of (x, y, w, h) boxes"""
+    ax1, ay1 = boxes_a[:, 0:1], boxes_a[:, 1:2]
+    ax2, ay2 = ax1 + boxes_a[:, 2:3], ay1 + boxes_a[:, 3:4]
+    bx1, by1 = boxes_b[:, 0], boxes_b[:, 1]
+    bx2, by2 = bx1 + boxes_b[:, 2], by1 + boxes_b[:, 3]
+
+    inter_w = np.clip(np.minimum(ax2, bx2) - np.maximum(ax1, bx1), 0, None)
+    inter_h = np.clip(np.minimum(ay2, by2) - np.maximum(ay1, by1), 0, None)
+    intersection = inter_w * inter_h
+    union = (boxes_a[:, 2:3] * boxes_a[:, 3:4]) + (boxes_b[:, 2] * boxes_b[:, 3]) - intersection
+    return intersection / np.maximum(union, 1e-6)
+
+
+class PlateTrack:
+    """One plate followed across frames, with its OCR readings"""
+
+    def __init__(self, track_id: int, bbox: Tuple[int, int, int, int], now: float):
+        self.track_id = track_id
+        self.bbox = bbox
+        self.first_seen = now
+        self.last_seen = now
+        self.missed = 0
+        self.ocr_attempts = 0
+        self.votes = Counter()
+        self.confidences: Dict[str, List[float]] = {}
+        self.stable_text: Optional[str] = None
+
+    @property
+    def best_text(self) -> Optional[str]:
+        """Majority-vote reading so far"""
+        if not self.votes:
+            return None
+        return self.votes.most_common(1)[0][0]
+
+    def confidence(self) -> float:
+        """Mean OCR confidence of the readings that agree with the majority"""
+        readings = self.confidences.get(self.best_text) or []
+        return sum(readings) / len(readings) if readings else self.vote_share()
+
+    def vote_share(self) -> float:
+        total = sum(self.votes.values())
+        return self.votes[self.best_text] / total if total else 0.0
+
+    def to_plate(self) -> Dict:
+        """Plate dict in the same shape LicensePlateDetector returns"""
+        return {
+            'text': self.best_text,
+            'bbox': self.bbox,
+            'confidence': self.confidence(),
+            'track_id': self.track_id,
+            'votes': sum(self.votes.values()),
+            'vote_share': self.vote_share(),
+            'first_seen': self.first_seen,
+            'last_seen': self.last_seen,
+        }
+
+
+class PlateTracker:
+    """Associates plate boxes across frames so each vehicle is OCR'd a bounded number of times.
+
+    Boxes are matched to existing tracks greedily by IoU, falling back to
+    centroid distance for fast-moving plates. A track is OCR'd until one
+    reading has ``votes_to_confirm`` votes (or ``max_ocr_attempts`` reads were
+    made), and is emitted once when it has not been seen for ``max_missed``
+    processed frames or ``max_age`` seconds.
+    """
+
+    def __init__(self, iou_threshold: float = 0.3, max_centroid_distance: float = 1.0,
+                 votes_to_confirm: int = 3, max_ocr_attempts: int = 8,
+                 max_missed: int = 5, max_age: float = 2.0):
+        self.iou_threshold = iou_threshold
+        self.max_centroid_distance = max_centroid_distance
+        self.votes_to_confirm = votes_to_confirm
+        self.max_ocr_attempts = max_ocr_attempts
+        self.max_missed = max_missed
+        self.max_age = max_age
+
+        self.tracks: List[PlateTrack] = []
+        self._next_id = 1
+        self.ocr_calls = 0
+        self.emitted = 0
+
+    def _associate(self, boxes: np.ndarray) -> List[Tuple[int, int]]:
+        """Greedy (track index, box index) matches"""
+        if not self.tracks or not len(boxes):
+            return []
+
+        track_boxes = np.array([track.bbox for track in self.tracks], dtype=np.float64)
+        iou = iou_matrix(track_boxes, boxes)
+        scores = np.where(iou >= self.iou_threshold, iou, 0.0)
+
+        # Centroid fallback for fast plates (distance relative to track width),
+        # ranked below every IoU match
+        track_centers = track_boxes[:, :2] + track_boxes[:, 2:] / 2
+        box_centers = boxes[:, :2] + boxes[:, 2:] / 2
+        distance = np.linalg.norm(track_centers[:, None, :] - box_centers[None, :, :], axis=2)
+        relative = distance / np.maximum(track_boxes[:, 2:3], 1)
+        fallback = (scores == 0) & (relative < self.max_centroid_distance)
+        scores[fallback] = 1e-3 * (1 - relative[fallback] / self.max_centroid_distance)
+
+        matches = []
+        while True:
+            t, b = np.unravel_index(np.argmax(scores), scores.shape)
+            if scores[t, b] <= 0:
+                break
+            matches.append((int(t), int(b)))
+            scores[t, :] = 0
+            scores[:, b] = 0
+        return matches
+
+    def update(self, boxes: Sequence, now: Optional[float] = None) -> List[PlateTrack]:
+        """Match this frame's boxes to tracks; returns the tracks seen in this frame"""
+        now = time.time() if now is None else now
+        boxes = np.array([tuple(box) for box in boxes], dtype=np.float64).reshape(-1, 4)
+
+        matched_tracks, matched_boxes = set(), set()
+        for t, b in self._associate(boxes):
+            track = self.tracks[t]
+            track.bbox = tuple(int(v) for v in boxes[b])
+            track.last_seen = now
+            track.missed = 0
+            matched_tracks.add(t)
+            matched_boxes.add(b)
+
+        for t, track in enumerate(self.tracks):
+            if t not in matched_tracks:
+                track.missed += 1
+
+        seen = [self.tracks[t] for t in sorted(matched_tracks)]
+        for b in range(len(boxes)):
+            if b not in matched_boxes:
+                track = PlateTrack(self._next_id, tuple(int(v) for v in boxes[b]), now)
+                self._next_id += 1
+                self.tracks.append(track)
+                seen.append(track)
+        return seen
+
+    def needs_ocr(self, track: PlateTrack) -> bool:
+        return track.stable_text is None and track.ocr_attempts < self.max_ocr_attempts
+
+    def add_reading(self, track: PlateTrack, text: str, confidence: Optional[float] = None):
+        """Record one OCR result for a track and check whether it has stabilized"""
+        track.ocr_attempts += 1
+        self.ocr_calls += 1
+        if not text:
+            return
+
+        track.votes[text] += 1
+        if confidence is not None:
+            track.confidences.setdefault(text, []).append(confidence)
+        if track.votes[text] >= self.votes_to_confirm:
+            track.stable_text = text
+
+    def expire(self, now: Optional[float] = None) -> List[Dict]:
+        """Remove tracks that left the frame; returns one plate dict per readable track"""
+        return self._emit(self._remove_expired(now))
+
+    def _remove_expired(self, now: Optional[float] = None) -> List[PlateTrack]:
+        now = time.time() if now is None else now
+        finished = [track for track in self.tracks
+                    if track.missed > self.max_missed or now - track.last_seen > self.max_age]
+        if finished:
+            self.tracks = [track for track in self.tracks if track not in finished]
+        return finished
+
+    def flush(self) -> List[Dict]:
+        """Emit every remaining track (end of stream)"""
+        finished, self.tracks = self.tracks, []
+        return self._emit(finished)
+
+    def _emit(self, tracks: List[PlateTrack]) -> List[Dict]:
+        plates = [track.to_plate() for track in tracks if track.best_text]
+        self.emitted += len(plates)
+        return plates
+
+    def stats(self) -> Dict:
+        return {
+            'active_tracks': len(self.tracks),
+            'tracks_started': self._next_id - 1,
+            'records_emitted': self.emitted,
+            'ocr_calls': self.ocr_calls,
+        }
+
+
+def track_frame(tracker: PlateTracker, detector, frame, region=None, now: Optional[float] = None,
+                roi=None, cache_scope=None) -> Tuple[List[PlateTrack], List[Dict]]:
+    """Advance a tracker by one frame, OCR-ing only tracks whose reading has not stabilized.
+
+    Returns the tracks visible in this frame and the plates of tracks that
+    have left it. cache_scope names the camera for the detector's OCR cache.
+    """
+    now = time.time() if now is None else now
+    boxes = detector.locate_plates(frame, region=region, roi=roi)
+    tracks = tracker.update(boxes, now)
+
+    pending = [track for track in tracks if tracker.needs_ocr(track)]
+    if pending:
+        readings = detector.read_plate_boxes(frame, [track.bbox for track in pending], cache_scope)
+        for track, reading in zip(pending, readings):
+            tracker.add_reading(track, reading['text'], reading['confidence'])
+
+    return tracks, tracker.expire(now)
+
+
+def track_frames(tracker: PlateTracker, detector, frames: Sequence, times: Sequence[float],
+                 regions: Optional[Sequence] = None, roi=None) -> List[Dict]:
+    """track_frame over a batch of frames, with one localization call and one OCR submission.
+
+    Tracks are matched and expired frame by frame as usual, but their crops
+    are read together at the end of the batch, before the plates of tracks
+    that left are emitted. A track is queued at most up to its remaining
+    OCR attempts, since readings from earlier frames of the batch are not
+    known yet when later frames are matched.
+    """
+    boxes_per_frame = detector.locate_plates_batch(frames, regions, roi=roi)
+    pending, finished, queued = [], [], Counter()
+    for frame, boxes, now in zip(frames, boxes_per_frame, times):
+        for track in tracker.update(boxes, now):
+            if tracker.needs_ocr(track) and track.ocr_attempts + queued[track.track_id] < tracker.max_ocr_attempts:
+                queued[track.track_id] += 1
+                x, y, w, h = track.bbox
+                pending.append((track, track.bbox, frame[y:y+h, x:x+w]))
+        finished += tracker._remove_expired(now)
+
+    if pending:
+        readings = detector.read_plates([crop for _, _, crop in pending], [bbox for _, bbox, _ in pending])
+        for (track, _, _), reading in zip(pending, readings):
+            tracker.add_reading(track, reading['text'], reading['confidence'])
+    return tracker._emit(finished)
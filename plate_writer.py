@@ -0,0 +1,156 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional
+
+import metrics
+
+
+class AsyncPlateWriter:
+    """Background writer that batches plate records into multi-row inserts.
+
+    Records are accepted into a bounded queue and flushed by a single thread
+    when ``batch_size`` records are waiting or ``flush_interval`` seconds have
+    passed since the oldest one arrived, or right away for a record submitted
+    with flush=True (a caller waiting on it). Failed batches are retried with
+    exponential backoff. Each submitted record gets a Future that resolves to
+    its record id, or to None if it could not be written.
+    """
+
+    def __init__(self, db_manager, batch_size: int = 200, flush_interval: float = 0.5,
+                 max_queue: int = 10000, max_retries: int = 5,
+                 retry_backoff: float = 0.5, max_backoff: float = 30.0):
+        self.db_manager = db_manager
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.max_backoff = max_backoff
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._closed = False
+        self._stopping = False
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+
+        self._thread = threading.Thread(target=self._run, name='plate-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, record: Dict, callback: Optional[Callable[[Future], None]] = None,
+               block: bool = True, timeout: Optional[float] = None, flush: bool = False) -> Future:
+        """Queue a record for insertion and return a Future for its record id.
+
+        flush=True writes it (with whatever else is queued) without waiting for
+        the batch to fill or flush_interval to pass.
+        """
+        future = Future()
+        if callback is not None:
+            future.add_done_callback(callback)
+
+        if self._closed:
+            self._drop([future], "writer is closed")
+            return future
+
+        try:
+            self._queue.put((record, future, flush), block=block, timeout=timeout)
+        except queue.Full:
+            self._drop([future], "write queue is full")
+        return future
+
+    def pending(self) -> int:
+        """Number of records waiting to be flushed"""
+        return self._queue.qsize()
+
+    def _drop(self, futures: List[Future], reason: str):
+        with self._lock:
+            self.dropped += len(futures)
+        metrics.inc('records_dropped', len(futures))
+        print(f"Warning: dropped {len(futures)} plate record(s): {reason}")
+        for future in futures:
+            future.set_result(None)
+
+    def _next_batch(self) -> Optional[List]:
+        """Block for the first record, then gather more until the size or time limit"""
+        if self._stopping:
+            return None
+
+        first = self._queue.get()
+        if first is None:
+            return None
+
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        urgent = first[2]
+        while len(batch) < self.batch_size:
+            # Once someone is waiting on a record, take only what is already queued
+            remaining = 0 if urgent else deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                # Close requested: flush what we have, then stop
+                self._stopping = True
+                break
+            batch.append(item)
+            urgent = urgent or item[2]
+
+        return batch
+
+    def _write_batch(self, batch: List):
+        records = [record for record, _, _ in batch]
+        futures = [future for _, future, _ in batch]
+
+        delay = self.retry_backoff
+        for attempt in range(self.max_retries + 1):
+            try:
+                started = metrics.timer()
+                record_ids = self.db_manager.insert_plate_records(records)
+                metrics.observe('db_insert', started)
+                break
+            except Exception as e:
+                if attempt == self.max_retries:
+                    self._drop(futures, f"insert failed after {attempt + 1} attempts: {e}")
+                    return
+                print(f"Error writing {len(records)} plate record(s), retrying in {delay:.1f}s: {e}")
+                time.sleep(delay)
+                delay = min(delay * 2, self.max_backoff)
+
+        with self._lock:
+            self.written += len(records)
+            self.batches += 1
+        for future, record_id in zip(futures, record_ids):
+            future.set_result(record_id)
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self._write_batch(batch)
+
+    def close(self, timeout: Optional[float] = None):
+        """Flush every queued record and stop the writer thread"""
+        if self._closed:
+            return
+
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+        # Records that raced with close() never reached the writer thread
+        leftovers = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                leftovers.append(item[1])
+        if leftovers:
+            self._drop(leftovers, "writer closed before they were flushed")
+
+        print(f"Plate writer: {self.written} written in {self.batches} batches, {self.dropped} dropped")
@@ -0,0 +1,87 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import List
+
+from storage import ROLLUP_COLUMNS, ROLLUP_SUMS, SQLPlateStorage
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS license_plates (
+    id INTEGER PRIMARY KEY,
+    plate_number TEXT NOT NULL,
+    timestamp TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')),
+    confidence_score REAL,
+    image_path TEXT,
+    camera_location TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_plate_number ON license_plates(plate_number);
+CREATE INDEX IF NOT EXISTS idx_timestamp_id ON license_plates(timestamp DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_camera_timestamp ON license_plates(camera_location, timestamp);
+
+CREATE TABLE IF NOT EXISTS plate_rollups (
+    camera_location TEXT NOT NULL,
+    resolution TEXT NOT NULL CHECK (resolution IN ('minute', 'hour')),
+    bucket_start TEXT NOT NULL,
+    plate_count INTEGER NOT NULL DEFAULT 0,
+    distinct_plates INTEGER NOT NULL DEFAULT 0,
+    confidence_sum REAL NOT NULL DEFAULT 0,
+    confidence_count INTEGER NOT NULL DEFAULT 0,
+    latency_sum REAL NOT NULL DEFAULT 0,
+    latency_count INTEGER NOT NULL DEFAULT 0,
+    plate_sketch TEXT,
+    PRIMARY KEY (camera_location, resolution, bucket_start)
+);
+CREATE INDEX IF NOT EXISTS idx_rollups_resolution_bucket ON plate_rollups(resolution, bucket_start DESC);
+"""
+
+
+class SQLiteManager(SQLPlateStorage):
+    """Local SQLite storage in WAL mode for sites without (reliable) network access.
+
+    Writes are local commits, so they take well under a millisecond per
+    record and need no spool. Timestamps are stored as ISO-8601 UTC text,
+    which sorts and compares correctly as strings.
+    """
+
+    local = True
+
+    def __init__(self, path: str = None):
+        self.path = path or os.getenv('LPR_SQLITE_PATH', 'lpr.db')
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+
+        with self._lock:
+            self._conn.execute('PRAGMA journal_mode = WAL')
+            self._conn.execute('PRAGMA synchronous = NORMAL')
+            self._conn.executescript(SCHEMA)
+        print(f"Using SQLite database {self.path}")
+
+    @contextmanager
+    def _connection(self):
+        with self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+
+    def _insert_rows(self, connection, rows: List[tuple]) -> List[int]:
+        # One transaction for the batch; per-row execute gives exact rowids
+        return [connection.execute(
+            'INSERT INTO license_plates (plate_number, confidence_score, image_path, camera_location, timestamp) '
+            'VALUES (?, ?, ?, ?, ?)', row).lastrowid for row in rows]
+
+    def _add_rollups_sql(self) -> str:
+        updates = ', '.join(f'{column} = {column} + excluded.{column}' if column in ROLLUP_SUMS
+                            else f'{column} = excluded.{column}' for column in ROLLUP_COLUMNS[3:])
+        return (f"INSERT INTO plate_rollups ({', '.join(ROLLUP_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(ROLLUP_COLUMNS))}) "
+                f"ON CONFLICT (camera_location, resolution, bucket_start) DO UPDATE SET {updates}")
+
+    def close(self):
+        """Close the database file"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,372 @@
+import os
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from dotenv import load_dotenv
+
+from traffic_rollups import merge_sketches
+
+load_dotenv()
+
+# Storage backends selectable with LPR_BACKEND in .env or --backend
+BACKENDS = ('supabase', 'mysql', 'sqlite')
+
+# Columns returned by the streaming queries unless a projection is given
+PLATE_COLUMNS = ('id', 'plate_number', 'timestamp', 'confidence_score', 'image_path', 'camera_location')
+
+ROLLUP_COLUMNS = ('camera_location', 'resolution', 'bucket_start', 'plate_count', 'distinct_plates',
+                  'confidence_sum', 'confidence_count', 'latency_sum', 'latency_count', 'plate_sketch')
+
+# Rollup columns that are added to the stored bucket; the sketch is unioned instead
+ROLLUP_SUMS = ('plate_count', 'confidence_sum', 'confidence_count', 'latency_sum', 'latency_count')
+
+
+def utc_timestamp(value) -> str:
+    """ISO-8601 UTC text (millisecond precision) for a datetime or ISO string"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value.tzinfo is None:
+        value = value.astimezone()
+    return value.astimezone(timezone.utc).isoformat(timespec='milliseconds')
+
+
+class PlateStorage(ABC):
+    """Interface LPRSystem uses to store and query plate records and traffic rollups"""
+
+    # True for engines on local disk, which need no spool in front of them
+    local = False
+
+    @staticmethod
+    def build_plate_record(plate_number: str, confidence_score: Optional[float] = None,
+                           image_path: Optional[str] = None, camera_location: Optional[str] = None,
+                           timestamp: Optional[str] = None) -> Dict:
+        """Build the row dict for a license plate record.
+
+        timestamp defaults to now, not to the insert: records spooled during an
+        outage keep the time they were read when they are replayed hours later.
+        """
+        record_data = {
+            'plate_number': plate_number.upper(),
+            'confidence_score': confidence_score,
+            'image_path': image_path,
+            'camera_location': camera_location,
+            'timestamp': timestamp or datetime.now(timezone.utc).isoformat()
+        }
+
+        # Remove None values
+        return {k: v for k, v in record_data.items() if v is not None}
+
+    @abstractmethod
+    def insert_plate_records(self, records: List[Dict]) -> List[int]:
+        """Insert many plate records and return their IDs in order; errors are raised"""
+
+    @abstractmethod
+    def iter_plate_records(self, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                           plate_number: Optional[str] = None, camera_location: Optional[str] = None,
+                           columns: Sequence[str] = PLATE_COLUMNS, page_size: int = 1000,
+                           prefetch: bool = False) -> Iterator[Dict]:
+        """Lazily yield matching records, newest first"""
+
+    @abstractmethod
+    def count_unique_plates(self, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                            camera_location: Optional[str] = None) -> Optional[int]:
+        """Count distinct plate numbers; None if the count failed"""
+
+    @abstractmethod
+    def add_rollups(self, rows: List[Dict]):
+        """Add rollup deltas to the stored buckets (keyed by camera, resolution and bucket).
+
+        ROLLUP_SUMS are added to the stored values and plate_sketch is
+        unioned with the stored sketch, atomically per bucket, so concurrent
+        writers never overwrite each other's counts.
+        """
+
+    @abstractmethod
+    def get_rollups(self, resolution: str = 'hour', start_date: Optional[str] = None,
+                    end_date: Optional[str] = None, camera_location: Optional[str] = None,
+                    limit: int = 24) -> List[Dict]:
+        """Traffic stats with mean confidence and latency, newest bucket first"""
+
+    @abstractmethod
+    def delete_plate_record(self, record_id: int) -> bool:
+        """Delete a specific plate record"""
+
+    @abstractmethod
+    def update_plate_record(self, record_id: int, update_data: Dict) -> bool:
+        """Update a specific plate record"""
+
+    @abstractmethod
+    def test_connection(self) -> bool:
+        """Check that the storage is reachable"""
+
+    def close(self):
+        """Release connections"""
+
+    def insert_plate_record(self, plate_number: str, confidence_score: Optional[float] = None,
+                            image_path: Optional[str] = None, camera_location: Optional[str] = None) -> Optional[int]:
+        """Insert a new license plate record"""
+        try:
+            record = self.build_plate_record(plate_number, confidence_score, image_path, camera_location)
+            record_id = self.insert_plate_records([record])[0]
+            print(f"Successfully inserted plate {plate_number} with ID: {record_id}")
+            return record_id
+        except Exception as e:
+            print(f"Error inserting plate record: {e}")
+            return None
+
+    def get_plate_records(self, limit: int = 10) -> List[Dict]:
+        """Retrieve recent license plate records"""
+        return list(islice(self.iter_plate_records(page_size=max(1, min(limit, 1000))), limit))
+
+    def iter_search_plate(self, plate_number: str, **kwargs) -> Iterator[Dict]:
+        """Lazily yield records for a plate number, newest first"""
+        return self.iter_plate_records(plate_number=plate_number, **kwargs)
+
+    def iter_plates_by_date_range(self, start_date: str, end_date: str, **kwargs) -> Iterator[Dict]:
+        """Lazily yield records within a date range, newest first"""
+        return self.iter_plate_records(start_date=start_date, end_date=end_date, **kwargs)
+
+    def search_plate(self, plate_number: str) -> List[Dict]:
+        """Search for specific plate number"""
+        return list(self.iter_search_plate(plate_number))
+
+    def get_plates_by_date_range(self, start_date: str, end_date: str) -> List[Dict]:
+        """Get plates within a date range"""
+        return list(self.iter_plates_by_date_range(start_date, end_date))
+
+    def get_unique_plate_count(self) -> int:
+        """Get count of unique license plates"""
+        return self.count_unique_plates() or 0
+
+
+class SQLPlateStorage(PlateStorage):
+    """Shared SQL for DB-API backends (SQLite, MySQL).
+
+    Subclasses provide connections, the parameter placeholder, the bulk
+    insert and the rollup upsert statement.
+    """
+
+    placeholder = '?'
+
+    # Appended to the rollup sketch read so the row stays locked until the upsert
+    row_lock = ''
+
+    @abstractmethod
+    @contextmanager
+    def _connection(self):
+        """Yield a DB-API connection, committing on success and rolling back on error"""
+
+    @abstractmethod
+    def _insert_rows(self, connection, rows: List[tuple]) -> List[int]:
+        """Insert (plate_number, confidence_score, image_path, camera_location, timestamp) rows; return IDs"""
+
+    @abstractmethod
+    def _add_rollups_sql(self) -> str:
+        """INSERT statement for ROLLUP_COLUMNS that adds ROLLUP_SUMS to an existing bucket
+        and replaces its distinct_plates and plate_sketch"""
+
+    def _to_db(self, value):
+        """Convert an ISO timestamp parameter for the driver"""
+        return value
+
+    def _from_db(self, row: Dict) -> Dict:
+        """Convert driver values (e.g. datetimes) in a fetched row"""
+        return row
+
+    def _query(self, sql: str, params: Sequence = ()) -> List[Dict]:
+        with self._connection() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.execute(sql, tuple(params))
+                names = [column[0] for column in cursor.description]
+                return [self._from_db(dict(zip(names, row))) for row in cursor.fetchall()]
+            finally:
+                cursor.close()
+
+    def _execute(self, sql: str, params: Sequence = ()) -> int:
+        with self._connection() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.execute(sql, tuple(params))
+                return cursor.rowcount
+            finally:
+                cursor.close()
+
+    def _where(self, start_date=None, end_date=None, plate_number=None, camera_location=None,
+               time_column='timestamp'):
+        """WHERE clause and parameters for the optional record filters"""
+        p = self.placeholder
+        clauses, params = [], []
+        if plate_number:
+            clauses.append(f'plate_number = {p}')
+            params.append(plate_number.upper())
+        if camera_location:
+            clauses.append(f'camera_location = {p}')
+            params.append(camera_location)
+        if start_date:
+            clauses.append(f'{time_column} >= {p}')
+            params.append(self._to_db(start_date))
+        if end_date:
+            clauses.append(f'{time_column} <= {p}')
+            params.append(self._to_db(end_date))
+        return clauses, params
+
+    def insert_plate_records(self, records: List[Dict]) -> List[int]:
+        if not records:
+            return []
+        now = datetime.now(timezone.utc)
+        rows = [(record['plate_number'], record.get('confidence_score'), record.get('image_path'),
+                 record.get('camera_location'), self._to_db(utc_timestamp(record.get('timestamp') or now)))
+                for record in records]
+        with self._connection() as connection:
+            return self._insert_rows(connection, rows)
+
+    def iter_plate_records(self, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                           plate_number: Optional[str] = None, camera_location: Optional[str] = None,
+                           columns: Sequence[str] = PLATE_COLUMNS, page_size: int = 1000,
+                           prefetch: bool = False) -> Iterator[Dict]:
+        """Lazily yield matching records, newest first, keyset-paginated on (timestamp, id)"""
+        unknown = set(columns) - set(PLATE_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown columns: {', '.join(sorted(unknown))}")
+        columns = list(columns) + [c for c in ('timestamp', 'id') if c not in columns]
+
+        p = self.placeholder
+        clauses, params = self._where(start_date, end_date, plate_number, camera_location)
+        cursor = None
+        try:
+            while True:
+                page_clauses, page_params = list(clauses), list(params)
+                if cursor is not None:
+                    page_clauses.append(f'(timestamp < {p} OR (timestamp = {p} AND id < {p}))')
+                    ts = self._to_db(cursor['timestamp'])
+                    page_params += [ts, ts, cursor['id']]
+
+                where = f"WHERE {' AND '.join(page_clauses)}" if page_clauses else ''
+                page = self._query(
+                    f"SELECT {', '.join(columns)} FROM license_plates {where} "
+                    f"ORDER BY timestamp DESC, id DESC LIMIT {p}",
+                    page_params + [page_size])
+                if not page:
+                    return
+
+                cursor = page[-1]
+                yield from page
+                if len(page) < page_size:
+                    return
+
+        except Exception as e:
+            print(f"Error streaming plate records: {e}")
+
+    def count_unique_plates(self, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                            camera_location: Optional[str] = None) -> Optional[int]:
+        try:
+            clauses, params = self._where(start_date, end_date, camera_location=camera_location)
+            where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+            rows = self._query(f'SELECT COUNT(DISTINCT plate_number) AS plates FROM license_plates {where}',
+                               params)
+            return int(rows[0]['plates'])
+
+        except Exception as e:
+            print(f"Error counting unique plates: {e}")
+            return None
+
+    def add_rollups(self, rows: List[Dict]):
+        if not rows:
+            return
+        p = self.placeholder
+        with self._connection() as connection:
+            cursor = connection.cursor()
+            try:
+                for row in rows:
+                    key = (row['camera_location'], row['resolution'], self._to_db(row['bucket_start']))
+                    cursor.execute(
+                        f"SELECT plate_sketch FROM plate_rollups "
+                        f"WHERE camera_location = {p} AND resolution = {p} AND bucket_start = {p}{self.row_lock}",
+                        key)
+                    stored = cursor.fetchone()
+                    sketch, distinct = merge_sketches(row['plate_sketch'], stored[0] if stored else None)
+                    row = dict(row, plate_sketch=sketch, distinct_plates=distinct)
+                    cursor.execute(self._add_rollups_sql(), key + tuple(row[c] for c in ROLLUP_COLUMNS[3:]))
+            finally:
+                cursor.close()
+
+    def get_rollups(self, resolution: str = 'hour', start_date: Optional[str] = None,
+                    end_date: Optional[str] = None, camera_location: Optional[str] = None,
+                    limit: int = 24) -> List[Dict]:
+        p = self.placeholder
+        try:
+            clauses, params = self._where(start_date, end_date, camera_location=camera_location,
+                                          time_column='bucket_start')
+            clauses.insert(0, f'resolution = {p}')
+            return self._query(
+                "SELECT camera_location, resolution, bucket_start, plate_count, distinct_plates, "
+                "confidence_sum / NULLIF(confidence_count, 0) AS mean_confidence, "
+                "1000 * latency_sum / NULLIF(latency_count, 0) AS mean_latency_ms "
+                f"FROM plate_rollups WHERE {' AND '.join(clauses)} "
+                f"ORDER BY bucket_start DESC, camera_location LIMIT {p}",
+                [resolution] + params + [limit])
+
+        except Exception as e:
+            print(f"Error retrieving traffic rollups: {e}")
+            return []
+
+    def delete_plate_record(self, record_id: int) -> bool:
+        try:
+            if self._execute(f'DELETE FROM license_plates WHERE id = {self.placeholder}', (record_id,)):
+                print(f"Successfully deleted record with ID: {record_id}")
+                return True
+            print(f"No record found with ID: {record_id}")
+            return False
+
+        except Exception as e:
+            print(f"Error deleting plate record: {e}")
+            return False
+
+    def update_plate_record(self, record_id: int, update_data: Dict) -> bool:
+        p = self.placeholder
+        try:
+            unknown = set(update_data) - set(PLATE_COLUMNS[1:])
+            if unknown:
+                raise ValueError(f"Unknown columns: {', '.join(sorted(unknown))}")
+
+            assignments = ', '.join(f'{column} = {p}' for column in update_data)
+            if self._execute(f'UPDATE license_plates SET {assignments} WHERE id = {p}',
+                             list(update_data.values()) + [record_id]):
+                print(f"Successfully updated record with ID: {record_id}")
+                return True
+            print(f"No record found with ID: {record_id}")
+            return False
+
+        except Exception as e:
+            print(f"Error updating plate record: {e}")
+            return False
+
+    def test_connection(self) -> bool:
+        try:
+            self._query('SELECT COUNT(*) AS records FROM license_plates')
+            print(f"✓ {type(self).__name__} connection test successful!")
+            return True
+        except Exception as e:
+            print(f"✗ {type(self).__name__} connection test failed: {e}")
+            return False
+
+
+def create_storage(backend: Optional[str] = None) -> PlateStorage:
+    """Create the storage backend named by ``backend`` or LPR_BACKEND (default supabase)"""
+    backend = (backend or os.getenv('LPR_BACKEND') or 'supabase').lower()
+
+    # Backends are imported lazily so only the selected one's driver is required
+    if backend == 'supabase':
+        from supabase_manager import SupabaseManager
+        return SupabaseManager()
+    if backend == 'mysql':
+        from mysql_manager import MySQLManager
+        return MySQLManager()
+    if backend == 'sqlite':
+        from sqlite_manager import SQLiteManager
+        return SQLiteManager()
+    raise ValueError(f"Unknown storage backend '{backend}' (choose from {', '.join(BACKENDS)})")
@@ -1,12 +1,14 @@
 from supabase import create_client, Client
 import os
 from dotenv import load_dotenv
-from datetime import datetime
-from typing import List, Dict, Optional
+from datetime import datetime, timezone
+from typing import List, Dict, Iterator, Optional, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from storage import PLATE_COLUMNS, PlateStorage, utc_timestamp
 
 load_dotenv()
 
-class SupabaseManager:
+class SupabaseManager(PlateStorage):
     def __init__(self):
         self.supabase: Client = self._connect()
     
@@ -31,15 +33,8 @@ class SupabaseManager:
                           image_path: Optional[str] = None, camera_location: Optional[str] = None) -> Optional[int]:
         """Insert a new license plate record into Supabase"""
         try:
-            record_data = {
-                'plate_number': plate_number.upper(),
-                'confidence_score': confidence_score,
-                'image_path': image_path,
-                'camera_location': camera_location
-            }
-            
-            # Remove None values
-            record_data = {k: v for k, v in record_data.items() if v is not None}
+            record_data = self.build_plate_record(plate_number, confidence_score,
+                                                  image_path, camera_location)
             
             result = self.supabase.table('license_plates').insert(record_data).execute()
             
@@ -55,6 +50,26 @@ class SupabaseManager:
             print(f"Error inserting plate record: {e}")
             return None
     
+    def insert_plate_records(self, records: List[Dict]) -> List[int]:
+        """Insert many plate records in one request and return their IDs in order.
+        
+        Unlike insert_plate_record, errors are raised so callers can retry.
+        """
+        if not records:
+            return []
+        
+        # PostgREST needs every row of a bulk insert to have the same keys
+        columns = set().union(*records)
+        # ...and a missing timestamp must not become NULL next to rows that have one
+        defaults = {'timestamp': utc_timestamp(datetime.now(timezone.utc))}
+        rows = [{column: record.get(column, defaults.get(column)) for column in columns} for record in records]
+        
+        result = self.supabase.table('license_plates').insert(rows).execute()
+        if not result.data or len(result.data) != len(rows):
+            raise RuntimeError(f"Bulk insert returned {len(result.data or [])} of {len(rows)} rows")
+        
+        return [row['id'] for row in result.data]
+    
     def get_plate_records(self, limit: int = 10) -> List[Dict]:
         """Retrieve recent license plate records"""
         try:
@@ -70,52 +85,122 @@ class SupabaseManager:
             print(f"Error retrieving plate records: {e}")
             return []
     
-    def search_plate(self, plate_number: str) -> List[Dict]:
-        """Search for specific plate number in Supabase"""
+    def _fetch_page(self, columns: Sequence[str], filters: Dict, page_size: int,
+                    cursor: Optional[Dict]) -> List[Dict]:
+        """Fetch one page ordered by (timestamp, id) descending, starting after cursor"""
+        query = self.supabase.table('license_plates').select(','.join(columns))
+        
+        if filters.get('plate_number'):
+            query = query.eq('plate_number', filters['plate_number'].upper())
+        if filters.get('camera_location'):
+            query = query.eq('camera_location', filters['camera_location'])
+        if filters.get('start_date'):
+            query = query.gte('timestamp', filters['start_date'])
+        if filters.get('end_date'):
+            query = query.lte('timestamp', filters['end_date'])
+        
+        if cursor is not None:
+            # Keyset condition: (timestamp, id) < (cursor.timestamp, cursor.id)
+            ts = cursor['timestamp']
+            query = query.or_(f'timestamp.lt."{ts}",and(timestamp.eq."{ts}",id.lt.{cursor["id"]})')
+        
+        result = (query.order('timestamp', desc=True)
+                  .order('id', desc=True)
+                  .limit(page_size)
+                  .execute())
+        return result.data or []
+    
+    def iter_plate_records(self, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                           plate_number: Optional[str] = None, camera_location: Optional[str] = None,
+                           columns: Sequence[str] = PLATE_COLUMNS, page_size: int = 1000,
+                           prefetch: bool = False) -> Iterator[Dict]:
+        """Lazily yield matching records, newest first, one keyset-paginated page at a time.
+        
+        Pages are requested with a (timestamp, id) cursor rather than an offset,
+        so every page costs the same no matter how deep into the result it is.
+        With prefetch=True the next page is fetched on a background thread while
+        the caller consumes the current one.
+        """
+        # The cursor needs both keyset columns in every row
+        columns = list(columns) + [c for c in ('timestamp', 'id') if c not in columns]
+        filters = {'start_date': start_date, 'end_date': end_date,
+                   'plate_number': plate_number, 'camera_location': camera_location}
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        
         try:
-            result = (self.supabase.table('license_plates')
-                     .select('*')
-                     .eq('plate_number', plate_number.upper())
-                     .order('timestamp', desc=True)
-                     .execute())
-            
-            return result.data if result.data else []
-            
+            page = self._fetch_page(columns, filters, page_size, None)
+            while page:
+                next_page = None
+                if len(page) == page_size:
+                    cursor = page[-1]
+                    if executor is not None:
+                        next_page = executor.submit(self._fetch_page, columns, filters, page_size, cursor)
+                    else:
+                        next_page = cursor
+                
+                yield from page
+                
+                if next_page is None:
+                    return
+                if executor is not None:
+                    page = next_page.result()
+                else:
+                    page = self._fetch_page(columns, filters, page_size, next_page)
+        
         except Exception as e:
-            print(f"Error searching plate: {e}")
-            return []
+            print(f"Error streaming plate records: {e}")
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False)
     
-    def get_plates_by_date_range(self, start_date: str, end_date: str) -> List[Dict]:
-        """Get plates within a date range"""
+    def count_unique_plates(self, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                            camera_location: Optional[str] = None) -> Optional[int]:
+        """Count distinct plate numbers in the database, optionally filtered by time and camera.
+        
+        Uses the count_unique_plates SQL function from SUPABASE_SQL.sql, so only
+        the count crosses the network. Returns None if the count failed.
+        """
         try:
-            result = (self.supabase.table('license_plates')
-                     .select('*')
-                     .gte('timestamp', start_date)
-                     .lte('timestamp', end_date)
-                     .order('timestamp', desc=True)
-                     .execute())
-            
-            return result.data if result.data else []
+            result = self.supabase.rpc('count_unique_plates', {
+                'start_ts': start_date,
+                'end_ts': end_date,
+                'camera': camera_location
+            }).execute()
+            return int(result.data or 0)
             
         except Exception as e:
-            print(f"Error retrieving plates by date range: {e}")
-            return []
+            print(f"Error counting unique plates: {e}")
+            return None
     
-    def get_unique_plate_count(self) -> int:
-        """Get count of unique license plates"""
+    def add_rollups(self, rows: List[Dict]):
+        """Add rollup deltas to the stored buckets via add_plate_rollups (see SUPABASE_SQL.sql)"""
+        if rows:
+            self.supabase.rpc('add_plate_rollups', {'deltas': rows}).execute()
+    
+    def get_rollups(self, resolution: str = 'hour', start_date: Optional[str] = None,
+                    end_date: Optional[str] = None, camera_location: Optional[str] = None,
+                    limit: int = 24) -> List[Dict]:
+        """Read traffic stats from the plate_rollup_stats view, newest bucket first"""
         try:
-            result = (self.supabase.table('license_plates')
-                     .select('plate_number')
+            query = (self.supabase.table('plate_rollup_stats')
+                    .select('*')
+                    .eq('resolution', resolution))
+            if camera_location:
+                query = query.eq('camera_location', camera_location)
+            if start_date:
+                query = query.gte('bucket_start', start_date)
+            if end_date:
+                query = query.lte('bucket_start', end_date)
+            
+            result = (query.order('bucket_start', desc=True)
+                     .order('camera_location')
+                     .limit(limit)
                      .execute())
-            
-            if result.data:
-                unique_plates = set(record['plate_number'] for record in result.data)
-                return len(unique_plates)
-            return 0
+            return result.data or []
             
         except Exception as e:
-            print(f"Error getting unique plate count: {e}")
-            return 0
+            print(f"Error retrieving traffic rollups: {e}")
+            return []
     
     def delete_plate_record(self, record_id: int) -> bool:
         """Delete a specific plate record"""
@@ -161,3 +246,7 @@ class SupabaseManager:
         except Exception as e:
             print(f"✗ Supabase connection test failed: {e}")
             return False
+    
+    def close(self):
+        """Release the Supabase client"""
+        self.supabase = None
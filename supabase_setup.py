@@ -27,6 +27,39 @@ def create_supabase_table():
         -- Create index for faster queries
         CREATE INDEX IF NOT EXISTS idx_plate_number ON license_plates(plate_number);
         CREATE INDEX IF NOT EXISTS idx_timestamp ON license_plates(timestamp);
+        CREATE INDEX IF NOT EXISTS idx_timestamp_id ON license_plates(timestamp DESC, id DESC);
+        CREATE INDEX IF NOT EXISTS idx_camera_timestamp ON license_plates(camera_location, timestamp);
+        
+        -- Server-side distinct count (see SUPABASE_SQL.sql)
+        CREATE OR REPLACE FUNCTION count_unique_plates(
+            start_ts TIMESTAMPTZ DEFAULT NULL,
+            end_ts TIMESTAMPTZ DEFAULT NULL,
+            camera VARCHAR DEFAULT NULL
+        ) RETURNS BIGINT
+        LANGUAGE sql STABLE AS $$
+            SELECT COUNT(DISTINCT plate_number)
+            FROM license_plates
+            WHERE (start_ts IS NULL OR timestamp >= start_ts)
+              AND (end_ts IS NULL OR timestamp <= end_ts)
+              AND (camera IS NULL OR camera_location = camera);
+        $$;
+        
+        -- Per-camera traffic rollups read by --mode stats (see SUPABASE_SQL.sql for the view
+        -- and the add_plate_rollups function the LPR system writes them with)
+        CREATE TABLE IF NOT EXISTS plate_rollups (
+            camera_location VARCHAR(100) NOT NULL,
+            resolution VARCHAR(10) NOT NULL CHECK (resolution IN ('minute', 'hour')),
+            bucket_start TIMESTAMPTZ NOT NULL,
+            plate_count INTEGER NOT NULL DEFAULT 0,
+            distinct_plates INTEGER NOT NULL DEFAULT 0,
+            confidence_sum FLOAT NOT NULL DEFAULT 0,
+            confidence_count INTEGER NOT NULL DEFAULT 0,
+            latency_sum FLOAT NOT NULL DEFAULT 0,
+            latency_count INTEGER NOT NULL DEFAULT 0,
+            plate_sketch TEXT,
+            updated_at TIMESTAMPTZ DEFAULT NOW(),
+            PRIMARY KEY (camera_location, resolution, bucket_start)
+        );
         """
         
         # Execute the SQL using Supabase SQL editor or directly via RPC
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Tests for the OCR result cache: repeats of a plate hit, near-miss plates never do
+"""
+
+import numpy as np
+
+from ocr_cache import OCRResultCache, fingerprint_distance, plate_fingerprint
+from ocr_pool import PLATE_CHARSET
+from plate_fixtures import generate_crop, random_plate_text
+
+BOX = (100, 400, 240, 60)
+
+
+def near_miss_pairs(count=300, seed=0):
+    """Plate texts and the same texts with one character changed"""
+    rng = np.random.default_rng(seed)
+    pairs = []
+    for _ in range(count):
+        text = random_plate_text(rng, 6)
+        index = int(rng.integers(len(text)))
+        other = rng.choice([char for char in PLATE_CHARSET if char != text[index]])
+        pairs.append((text, text[:index] + other + text[index + 1:]))
+    return pairs
+
+
+def reading(text):
+    return {'text': text, 'confidence': 0.9, 'char_confidences': [0.9] * len(text)}
+
+
+def test_near_miss_plates_do_not_collide():
+    cache = OCRResultCache()
+    for i, (text, other) in enumerate(near_miss_pairs()):
+        cache.put(plate_fingerprint(generate_crop(text, seed=i)), reading(text), 'gate', BOX, now=i * 10.0)
+        hit = cache.get(plate_fingerprint(generate_crop(other, seed=i + 1000)), 'gate', BOX, now=i * 10.0)
+        assert hit is None, f"{other} was served the cached reading of {text}"
+
+
+def test_abc123_and_abc128_are_far_apart():
+    a = plate_fingerprint(generate_crop('ABC123', seed=1))
+    b = plate_fingerprint(generate_crop('ABC128', seed=2))
+    assert fingerprint_distance(a, b) > 2 * OCRResultCache().max_distance
+
+
+def test_repeated_crop_hits():
+    cache = OCRResultCache()
+    cache.put(plate_fingerprint(generate_crop('ABC123', seed=1)), reading('ABC123'), 'gate', BOX, now=0.0)
+    hit = cache.get(plate_fingerprint(generate_crop('ABC123', seed=2, noise=8.0)), 'gate',
+                    (102, 401, 240, 60), now=1.0)
+    assert hit is not None and hit['text'] == 'ABC123'
+
+
+def test_other_camera_or_position_misses():
+    cache = OCRResultCache()
+    crop = plate_fingerprint(generate_crop('ABC123', seed=1))
+    cache.put(crop, reading('ABC123'), 'gate', BOX, now=0.0)
+    assert cache.get(crop, 'exit', BOX, now=1.0) is None
+    assert cache.get(crop, 'gate', (600, 400, 240, 60), now=1.0) is None
+    assert cache.get(crop, 'gate', BOX, now=5.0) is None  # expired
+
+
+if __name__ == "__main__":
+    for test in (test_near_miss_plates_do_not_collide, test_abc123_and_abc128_are_far_apart,
+                 test_repeated_crop_hits, test_other_camera_or_position_misses):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Tests for fuzzy plate deduplication: confusable folding, one-edit matches, TTL and scopes
+"""
+
+from plate_dedup import PlateDedupCache, normalize_plate
+
+
+def test_confusable_characters_fold():
+    assert normalize_plate('abc1O5') == normalize_plate('ABC105')
+    assert normalize_plate('B8S5') == normalize_plate('8855')
+    cache = PlateDedupCache()
+    assert cache.claim('ABC105', 'gate', now=0.0)
+    assert not cache.claim('A8C1O5', 'gate', now=1.0)
+
+
+def test_one_edit_is_a_duplicate_two_are_not():
+    cache = PlateDedupCache()
+    assert cache.claim('ABC123', 'gate', now=0.0)
+    assert not cache.claim('ABC124', 'gate', now=1.0)   # substitution
+    assert not cache.claim('ABC1234', 'gate', now=1.0)  # insertion
+    assert not cache.claim('AC123', 'gate', now=1.0)    # deletion
+    assert cache.claim('AXC124', 'gate', now=1.0)
+
+    exact = PlateDedupCache(max_distance=0)
+    assert exact.claim('ABC123', 'gate', now=0.0)
+    assert exact.claim('ABC124', 'gate', now=1.0)
+
+
+def test_claims_expire_after_ttl():
+    cache = PlateDedupCache(ttl=30.0)
+    assert cache.claim('ABC123', 'gate', now=0.0)
+    assert not cache.claim('ABC123', 'gate', now=29.9)
+    assert cache.claim('ABC123', 'gate', now=30.0)
+    assert not cache.claim('ABC123', 'gate', now=31.0)
+    assert len(cache) == 1
+
+
+def test_scopes_and_release():
+    cache = PlateDedupCache()
+    assert cache.claim('ABC123', 'gate', now=0.0)
+    assert cache.claim('ABC123', 'exit', now=0.0)
+
+    cache.release('ABC123', 'gate', recorded_at=5.0)  # a later claim's release leaves this one
+    assert not cache.claim('ABC123', 'gate', now=1.0)
+    cache.release('ABC123', 'gate', recorded_at=0.0)
+    assert cache.claim('ABC123', 'gate', now=1.0)
+
+
+def test_size_cap_evicts_oldest():
+    cache = PlateDedupCache(max_entries=2)
+    for i, plate in enumerate(('AAA111', 'CCC333', 'EEE555')):
+        assert cache.claim(plate, 'gate', now=float(i))
+    assert len(cache) == 2 and cache.evictions == 1
+    assert cache.claim('AAA111', 'gate', now=3.0)
+
+
+def test_duplicates_do_not_refresh_a_claim():
+    cache = PlateDedupCache(ttl=30.0, max_entries=2)
+    assert cache.claim('AAA111', 'gate', now=0.0)
+    assert cache.claim('CCC333', 'gate', now=1.0)
+    assert not cache.claim('AAA111', 'gate', now=20.0)
+    assert cache.claim('AAA111', 'gate', now=30.0)  # the window runs from the stored read
+
+    assert cache.claim('EEE555', 'gate', now=31.0)  # evicts CCC333, the earliest stored
+    assert not cache.claim('AAA111', 'gate', now=32.0)
+    assert cache.claim('CCC333', 'gate', now=32.0)
+
+
+if __name__ == "__main__":
+    for test in (test_confusable_characters_fold, test_one_edit_is_a_duplicate_two_are_not,
+                 test_claims_expire_after_ttl, test_scopes_and_release, test_size_cap_evicts_oldest,
+                 test_duplicates_do_not_refresh_a_claim):
+        test()
+        print(f"✅ {test.__name__}")
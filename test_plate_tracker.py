@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Tests for plate tracking: boxes follow a vehicle and its readings are settled by majority vote
+"""
+
+from plate_tracker import PlateTracker
+
+BOX = (100, 400, 120, 30)
+
+
+def test_majority_reading_wins():
+    tracker = PlateTracker(votes_to_confirm=3)
+    for i, text in enumerate(('ABC123', 'A8C123', 'ABC123', '', 'ABC128', 'ABC123')):
+        track, = tracker.update([(BOX[0] + 4 * i, BOX[1], BOX[2], BOX[3])], now=i * 0.1)
+        if tracker.needs_ocr(track):
+            tracker.add_reading(track, text, 0.8)
+
+    assert len(tracker.tracks) == 1
+    assert track.stable_text == 'ABC123'
+    assert not tracker.needs_ocr(track)
+
+    plate, = tracker.flush()
+    assert plate['text'] == 'ABC123'
+    assert plate['votes'] == 5 and plate['vote_share'] == 3 / 5
+    assert abs(plate['confidence'] - 0.8) < 1e-9
+
+
+def test_ocr_stops_after_max_attempts():
+    tracker = PlateTracker(votes_to_confirm=3, max_ocr_attempts=4)
+    track, = tracker.update([BOX], now=0.0)
+    for i, text in enumerate(('ABC123', 'ABC124', 'ABC125', 'ABC124', 'ABC124')):
+        if tracker.needs_ocr(track):
+            tracker.add_reading(track, text)
+
+    assert track.stable_text is None and track.ocr_attempts == 4
+    assert tracker.flush()[0]['text'] == 'ABC124'
+
+
+def test_tracks_are_emitted_once_they_leave():
+    tracker = PlateTracker(max_missed=2, max_age=10.0)
+    track, = tracker.update([BOX], now=0.0)
+    tracker.add_reading(track, 'ABC123')
+    other, = tracker.update([(900, 100, 120, 30)], now=0.1)
+    assert other.track_id != track.track_id
+
+    emitted = []
+    for i in range(3):
+        tracker.update([(900, 100, 120, 30)], now=0.2 + i * 0.1)
+        emitted += tracker.expire(now=0.2 + i * 0.1)
+    assert [plate['text'] for plate in emitted] == ['ABC123']
+    assert tracker.flush() == []  # the second track never got a reading
+
+
+if __name__ == "__main__":
+    for test in (test_majority_reading_wins, test_ocr_stops_after_max_attempts,
+                 test_tracks_are_emitted_once_they_leave):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Tests for the background plate writers: batching, drops, retries, spooling and dead-lettering
+"""
+
+import os
+import tempfile
+import threading
+import time
+
+from plate_spool import SpooledPlateWriter
+from plate_writer import AsyncPlateWriter
+
+
+class FakeStorage:
+    """In-memory stand-in for a storage backend's insert path"""
+
+    def __init__(self, reject=()):
+        self.rows = []
+        self.calls = 0
+        self.down = False
+        self.reject = set(reject)
+        self.gate = threading.Event()
+        self.gate.set()
+        self.entered = threading.Event()
+
+    def insert_plate_records(self, records):
+        self.calls += 1
+        self.entered.set()
+        self.gate.wait()
+        if self.down:
+            raise ConnectionError("database unreachable")
+        bad = [r['plate_number'] for r in records if r['plate_number'] in self.reject]
+        if bad:
+            raise ValueError(f"rejected {bad[0]}")
+        self.rows += records
+        return list(range(len(self.rows) - len(records) + 1, len(self.rows) + 1))
+
+    def test_connection(self):
+        return not self.down
+
+
+def record(plate):
+    return {'plate_number': plate, 'confidence_score': 0.9}
+
+
+def spool_path():
+    return os.path.join(tempfile.mkdtemp(), 'spool.db')
+
+
+def test_writer_drops_when_queue_is_full():
+    db = FakeStorage()
+    db.gate.clear()
+    writer = AsyncPlateWriter(db, batch_size=1, flush_interval=0.01, max_queue=2)
+    stuck = writer.submit(record('AAA111'))
+    assert db.entered.wait(1.0)  # the writer thread holds the first record
+
+    queued = [writer.submit(record(p), block=False) for p in ('BBB222', 'CCC333')]
+    dropped = writer.submit(record('DDD444'), block=False)
+    assert dropped.done() and dropped.result() is None
+    assert writer.dropped == 1
+
+    db.gate.set()
+    writer.close()
+    assert [f.result() for f in [stuck] + queued] == [1, 2, 3]
+    assert [r['plate_number'] for r in db.rows] == ['AAA111', 'BBB222', 'CCC333']
+
+
+def test_writer_flush_skips_the_interval():
+    db = FakeStorage()
+    writer = AsyncPlateWriter(db, flush_interval=5.0)
+    lazy = writer.submit(record('AAA111'))
+    time.sleep(0.2)
+    assert not lazy.done()
+
+    started = time.monotonic()
+    urgent = writer.submit(record('BBB222'), flush=True)
+    assert urgent.result(timeout=1.0) == 2
+    assert time.monotonic() - started < 1.0
+    assert lazy.result() == 1 and writer.batches == 1
+    writer.close()
+
+
+def test_writer_retries_then_drops():
+    db = FakeStorage(reject={'BAD000'})
+    writer = AsyncPlateWriter(db, flush_interval=0.01, max_retries=2, retry_backoff=0.01)
+    assert writer.submit(record('BAD000'), flush=True).result(timeout=2.0) is None
+    assert db.calls == 3 and writer.dropped == 1
+    writer.close()
+
+
+def test_spool_holds_records_through_an_outage():
+    db = FakeStorage()
+    db.down = True
+    path = spool_path()
+    writer = SpooledPlateWriter(db, path, flush_interval=0.01, retry_backoff=0.01,
+                                max_backoff=0.05, max_attempts=2)
+    futures = [writer.submit(record(p), flush=True) for p in ('AAA111', 'BBB222', 'CCC333')]
+    time.sleep(0.3)
+    assert db.calls > 2
+    assert not any(f.done() for f in futures)
+    assert writer.pending() == 3 and writer.spool.dead_count() == 0
+
+    db.down = False
+    assert [f.result(timeout=2.0) for f in futures] == [1, 2, 3]
+    assert writer.pending() == 0
+    writer.close()
+
+
+def test_spool_replays_after_restart():
+    db = FakeStorage()
+    db.down = True
+    path = spool_path()
+    writer = SpooledPlateWriter(db, path, flush_interval=0.01, retry_backoff=0.01)
+    future = writer.submit(record('AAA111'))
+    writer.close()
+    assert future.result() is None
+
+    db.down = False
+    writer = SpooledPlateWriter(db, path, flush_interval=0.01)
+    writer.close()
+    assert [r['plate_number'] for r in db.rows] == ['AAA111']
+
+
+def test_spool_dead_letters_only_rejected_records():
+    db = FakeStorage(reject={'BAD000'})
+    writer = SpooledPlateWriter(db, spool_path(), flush_interval=0.01, retry_backoff=0.01,
+                                max_attempts=2)
+    plates = ['AAA111', 'BBB222', 'BAD000', 'CCC333', 'DDD444']
+    futures = [writer.submit(record(p)) for p in plates]
+    results = [f.result(timeout=2.0) for f in futures]
+
+    assert results[2] is None and all(results[:2] + results[3:])
+    assert sorted(r['plate_number'] for r in db.rows) == ['AAA111', 'BBB222', 'CCC333', 'DDD444']
+    assert writer.spool.dead_count() == 1 and writer.pending() == 0
+    writer.close()
+
+
+if __name__ == "__main__":
+    for test in (test_writer_drops_when_queue_is_full, test_writer_flush_skips_the_interval,
+                 test_writer_retries_then_drops, test_spool_holds_records_through_an_outage,
+                 test_spool_replays_after_restart, test_spool_dead_letters_only_rejected_records):
+        test()
+        print(f"✅ {test.__name__}")
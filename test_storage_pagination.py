@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Tests for keyset pagination of plate records, including pages that split equal timestamps
+"""
+
+import os
+import tempfile
+
+from sqlite_manager import SQLiteManager
+
+TIMESTAMPS = ['2024-01-01T10:00:00+00:00'] * 5 + ['2024-01-01T09:00:00+00:00'] * 3
+
+
+def storage_with_records():
+    db = SQLiteManager(os.path.join(tempfile.mkdtemp(), 'lpr.db'))
+    ids = db.insert_plate_records([
+        {'plate_number': f'ABC{i:03d}', 'camera_location': 'gate' if i % 2 else 'exit', 'timestamp': ts}
+        for i, ts in enumerate(TIMESTAMPS)])
+    return db, ids
+
+
+def test_pages_split_equal_timestamps():
+    db, ids = storage_with_records()
+    expected = sorted(ids[:5], reverse=True) + sorted(ids[5:], reverse=True)
+    for page_size in (1, 2, 3, 5, 8, 100):
+        got = [row['id'] for row in db.iter_plate_records(page_size=page_size)]
+        assert got == expected, f"page_size={page_size}"
+    db.close()
+
+
+def test_filters_apply_on_every_page():
+    db, ids = storage_with_records()
+    got = [row['id'] for row in db.iter_plate_records(camera_location='gate', page_size=2)]
+    assert got == [ids[3], ids[1], ids[7], ids[5]]
+
+    got = list(db.iter_plate_records(start_date='2024-01-01T09:30:00+00:00', columns=['plate_number'],
+                                     page_size=2))
+    assert len(got) == 5 and all(row['plate_number'] for row in got)
+    db.close()
+
+
+if __name__ == "__main__":
+    for test in (test_pages_split_equal_timestamps, test_filters_apply_on_every_page):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,185 @@
+import base64
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from hyperloglog import HyperLogLog
+
+# Rollup resolutions and their bucket width in seconds
+RESOLUTIONS = {'minute': 60, 'hour': 3600}
+
+# Small sketches keep persisted rows compact (1 KiB, about 3% error)
+SKETCH_PRECISION = 10
+
+
+def bucket_start(timestamp: float, resolution: str) -> float:
+    width = RESOLUTIONS[resolution]
+    return timestamp - timestamp % width
+
+
+def format_bucket(start: float) -> str:
+    return datetime.fromtimestamp(start, timezone.utc).isoformat()
+
+
+def merge_sketches(*encoded: Optional[str]) -> Tuple[str, int]:
+    """Union of base64 plate sketches: the encoded union and its distinct count"""
+    union = HyperLogLog(SKETCH_PRECISION)
+    for value in encoded:
+        if value:
+            union.merge(HyperLogLog.from_bytes(base64.b64decode(value)))
+    return base64.b64encode(union.to_bytes()).decode('ascii'), union.count()
+
+
+class RollupBucket:
+    """Running aggregates for one camera over one time bucket"""
+
+    def __init__(self):
+        self.plate_count = 0
+        self.confidence_sum = 0.0
+        self.confidence_count = 0
+        self.latency_sum = 0.0
+        self.latency_count = 0
+        self.sketch = HyperLogLog(SKETCH_PRECISION)
+
+    def add(self, plate_number: str, confidence: Optional[float], latency: Optional[float]):
+        self.plate_count += 1
+        self.sketch.add(plate_number)
+        if confidence is not None:
+            self.confidence_sum += confidence
+            self.confidence_count += 1
+        if latency is not None:
+            self.latency_sum += latency
+            self.latency_count += 1
+
+    def merge(self, other: 'RollupBucket'):
+        """Fold in another bucket's aggregates (e.g. a delta whose write failed)"""
+        self.plate_count += other.plate_count
+        self.confidence_sum += other.confidence_sum
+        self.confidence_count += other.confidence_count
+        self.latency_sum += other.latency_sum
+        self.latency_count += other.latency_count
+        self.sketch.merge(other.sketch)
+
+    def summary(self) -> Dict:
+        return {
+            'plate_count': self.plate_count,
+            'distinct_plates': self.sketch.count(),
+            'mean_confidence': (self.confidence_sum / self.confidence_count
+                                if self.confidence_count else None),
+            'mean_latency_ms': (1000 * self.latency_sum / self.latency_count
+                                if self.latency_count else None),
+        }
+
+    def to_row(self) -> Dict:
+        return {
+            'plate_count': self.plate_count,
+            'distinct_plates': self.sketch.count(),
+            'confidence_sum': self.confidence_sum,
+            'confidence_count': self.confidence_count,
+            'latency_sum': self.latency_sum,
+            'latency_count': self.latency_count,
+            'plate_sketch': base64.b64encode(self.sketch.to_bytes()).decode('ascii'),
+        }
+
+
+class TrafficRollups:
+    """Per-camera, per-minute and per-hour traffic aggregates maintained as plates are stored.
+
+    ``record`` is O(1) and never touches the database. A background thread
+    adds what was recorded since the last flush to the plate_rollups table
+    every ``flush_interval`` seconds (and on close), so stats queries read a
+    few rollup rows instead of scanning license_plates. Counts and sums are
+    added to the stored row and plate sketches are unioned with it, so
+    restarts and several processes writing the same bucket don't lose counts.
+    A delta whose write fails is kept and retried on the next flush. Buckets
+    are dropped from memory once they have ended and been persisted.
+    """
+
+    def __init__(self, db_manager, flush_interval: float = 30.0,
+                 resolutions: Tuple[str, ...] = ('minute', 'hour')):
+        self.db_manager = db_manager
+        self.flush_interval = flush_interval
+        self.resolutions = resolutions
+
+        # (camera_location, resolution, bucket_start) -> RollupBucket: totals recorded
+        # by this process, and what of them has not been persisted yet
+        self._buckets: Dict[Tuple[str, str, float], RollupBucket] = {}
+        self._pending: Dict[Tuple[str, str, float], RollupBucket] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        if db_manager is not None and flush_interval:
+            self._thread = threading.Thread(target=self._run, name='rollup-flusher', daemon=True)
+            self._thread.start()
+
+    def record(self, camera_location: str, plate_number: str, confidence: Optional[float] = None,
+               latency: Optional[float] = None, timestamp: Optional[float] = None):
+        """Count one stored plate in every resolution's current bucket"""
+        timestamp = time.time() if timestamp is None else timestamp
+        camera_location = camera_location or ''
+        with self._lock:
+            for resolution in self.resolutions:
+                key = (camera_location, resolution, bucket_start(timestamp, resolution))
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    bucket = self._buckets[key] = RollupBucket()
+                bucket.add(plate_number, confidence, latency)
+                delta = self._pending.get(key)
+                if delta is None:
+                    delta = self._pending[key] = RollupBucket()
+                delta.add(plate_number, confidence, latency)
+
+    def snapshot(self, resolution: str = 'minute', camera_location: Optional[str] = None) -> List[Dict]:
+        """Rollups recorded by this process for a resolution, newest bucket first"""
+        with self._lock:
+            rows = [dict(camera_location=key[0], resolution=key[1],
+                         bucket_start=format_bucket(key[2]), **bucket.summary())
+                    for key, bucket in self._buckets.items()
+                    if key[1] == resolution and camera_location in (None, key[0])]
+        rows.sort(key=lambda row: row['bucket_start'], reverse=True)
+        return rows
+
+    def flush(self) -> bool:
+        """Add unpersisted deltas to the stored buckets; returns False if the database rejected them"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return True
+
+        rows = [dict(camera_location=key[0], resolution=key[1], bucket_start=format_bucket(key[2]),
+                     **delta.to_row())
+                for key, delta in pending.items()]
+        try:
+            self.db_manager.add_rollups(rows)
+        except Exception as e:
+            print(f"Error persisting traffic rollups: {e}")
+            with self._lock:
+                for key, delta in pending.items():
+                    if key in self._pending:
+                        delta.merge(self._pending[key])
+                    self._pending[key] = delta
+            return False
+
+        with self._lock:
+            self._evict(time.time())
+        return True
+
+    def _evict(self, now: float):
+        """Forget buckets that have ended and have nothing left to persist"""
+        for key in list(self._buckets):
+            _, resolution, start = key
+            if start + RESOLUTIONS[resolution] < now and key not in self._pending:
+                del self._buckets[key]
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def close(self):
+        """Stop the flusher and persist what is left"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self.db_manager is not None:
+            self.flush()
@@ -0,0 +1,202 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import cv2
+
+import metrics
+from motion_gate import MotionGate
+from plate_dedup import PlateDedupCache
+from plate_tracker import PlateTracker, track_frame, track_frames
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mkv', '.mov', '.m4v', '.ts', '.mpg', '.mpeg')
+
+# Detector owned by each worker process (created once by the pool initializer)
+_worker_detector = None
+
+
+class VideoSegment(NamedTuple):
+    path: str
+    index: int
+    start_frame: int
+    end_frame: int
+    fps: float
+
+
+def probe_video(path: str):
+    """(frame count, fps) of a video file"""
+    capture = cv2.VideoCapture(path)
+    try:
+        if not capture.isOpened():
+            raise IOError(f"Could not open video {path}")
+        frames = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = capture.get(cv2.CAP_PROP_FPS) or 25.0
+        return frames, fps
+    finally:
+        capture.release()
+
+
+def plan_segments(path: str, segment_seconds: float = 60.0) -> List[VideoSegment]:
+    """Split a video into consecutive segments of about ``segment_seconds`` each"""
+    frames, fps = probe_video(path)
+    step = max(1, int(round(segment_seconds * fps)))
+    return [VideoSegment(path, index, start, min(start + step, frames), fps)
+            for index, start in enumerate(range(0, frames, step))]
+
+
+def _init_worker(detector_options: Dict, enable_metrics: bool = False):
+    """Process pool initializer: load the cascade and OCR engine once per worker"""
+    global _worker_detector
+    metrics.init_worker(enable_metrics)
+    from plate_detector import LicensePlateDetector
+    _worker_detector = LicensePlateDetector(**detector_options)
+
+
+def read_segment_plates(detector, segment: VideoSegment, stride: int = 5,
+                        motion_method: Optional[str] = None, batch_size: int = 1) -> Dict:
+    """Detect plates in one segment, tracking them so each vehicle is reported once.
+
+    With batch_size > 1, that many sampled frames are localized and OCR'd
+    together (see track_frames). Returns the plates with ``offset`` (seconds
+    from the start of the video, when the vehicle was first seen) and the
+    number of frames read.
+    """
+    capture = cv2.VideoCapture(segment.path)
+    if not capture.isOpened():
+        return {'segment': segment, 'plates': [], 'frames': 0, 'error': 'Could not open video'}
+
+    # Track in video time so tracks expire by footage age, not by processing speed
+    tracker = PlateTracker(max_missed=max(1, int(segment.fps / stride)), max_age=2.0)
+    gate = MotionGate(method=motion_method) if motion_method else None
+    plates, frames, batch = [], 0, []
+
+    def flush_batch():
+        if batch:
+            frames_, regions, times, read_started = zip(*batch)
+            plates.extend(track_frames(tracker, detector, frames_, times, regions))
+            for started in read_started:
+                metrics.observe('end_to_end', started)
+            batch.clear()
+
+    try:
+        capture.set(cv2.CAP_PROP_POS_FRAMES, segment.start_frame)
+        for frame_index in range(segment.start_frame, segment.end_frame):
+            # grab() skips decoding frames that are not detected on
+            if frame_index % stride:
+                if not capture.grab():
+                    break
+                continue
+            started = metrics.timer()
+            ret, frame = capture.read()
+            if not ret:
+                break
+            metrics.observe('decode', started)
+            frames += 1
+
+            region = None
+            if gate is not None:
+                region = gate.check(frame)
+                if region is None:
+                    flush_batch()
+                    plates += tracker.expire(frame_index / segment.fps)
+                    continue
+
+            if batch_size > 1:
+                batch.append((frame, region, frame_index / segment.fps, started))
+                if len(batch) >= batch_size:
+                    flush_batch()
+                continue
+            _, finished = track_frame(tracker, detector, frame, region, frame_index / segment.fps)
+            metrics.observe('end_to_end', started)
+            plates += finished
+        flush_batch()
+        plates += tracker.flush()
+
+    except Exception as e:
+        return {'segment': segment, 'plates': [], 'frames': frames, 'error': str(e)}
+    finally:
+        capture.release()
+
+    return {
+        'segment': segment,
+        'plates': [{'text': plate['text'], 'confidence': plate['confidence'],
+                    'bbox': tuple(int(v) for v in plate['bbox']), 'offset': plate['first_seen']}
+                   for plate in plates],
+        'frames': frames,
+        'error': None
+    }
+
+
+def _process_segment(segment: VideoSegment, stride: int, motion_method: Optional[str],
+                     batch_size: int) -> Dict:
+    """Worker entry point: the segment's result with the worker's metrics for it under 'metrics'"""
+    result = read_segment_plates(_worker_detector, segment, stride, motion_method, batch_size)
+    result['metrics'] = metrics.collect()
+    return result
+
+
+def ingest_video(path: str, record_plate: Callable[[Dict, float], None], workers: int = 1,
+                 segment_seconds: float = 60.0, stride: int = 5, motion_method: Optional[str] = None,
+                 dedup_window: float = 30.0, detector_options: Dict = None, batch_size: int = 1) -> Dict:
+    """Run plate detection over a video file, one segment per worker process at a time.
+
+    Each worker seeks its own VideoCapture to a segment's first frame. Segment
+    results are released in video order, so ``record_plate(plate, offset)`` is
+    called chronologically, and a fuzzy dedup keyed on video time drops reads
+    of the same vehicle that were split across a segment boundary. A segment
+    whose worker fails (even a crashed worker process) is counted in
+    ``errors`` and skipped; the other segments are still recorded. When
+    metrics are enabled, each segment's worker metrics are merged into this
+    process's registry.
+    """
+    segments = plan_segments(path, segment_seconds)
+    dedup = PlateDedupCache(ttl=dedup_window)
+    started_at = time.time()
+    completed, next_index = {}, 0
+    totals = {'segments': len(segments), 'frames': 0, 'plates': 0, 'duplicates': 0, 'errors': 0}
+
+    def release_in_order():
+        nonlocal next_index
+        while next_index in completed:
+            result = completed.pop(next_index)
+            next_index += 1
+            for plate in sorted(result['plates'], key=lambda plate: plate['offset']):
+                if dedup.claim(plate['text'], None, plate['offset']):
+                    record_plate(plate, plate['offset'])
+                    totals['plates'] += 1
+                else:
+                    totals['duplicates'] += 1
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(detector_options or {}, metrics.enabled())) as executor:
+        futures = {executor.submit(_process_segment, segment, stride, motion_method, batch_size): segment
+                   for segment in segments}
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # e.g. a worker died (BrokenProcessPool): lose this segment, keep the finished ones
+                    segment = futures[future]
+                    result = {'segment': segment, 'plates': [], 'frames': 0, 'error': str(e) or type(e).__name__,
+                              'metrics': None}
+                metrics.merge(result['metrics'])
+                segment = result['segment']
+                if result['error']:
+                    totals['errors'] += 1
+                    print(f"Error processing {os.path.basename(path)} segment {segment.index}: "
+                          f"{result['error']}")
+                totals['frames'] += result['frames']
+                completed[segment.index] = result
+            release_in_order()
+
+            elapsed = max(time.time() - started_at, 1e-6)
+            processed = sum(s.end_frame - s.start_frame for s in segments[:next_index])
+            video_seconds = processed / segments[0].fps if segments else 0
+            print(f"{os.path.basename(path)}: {next_index}/{len(segments)} segments | "
+                  f"{totals['plates']} plates | {video_seconds / elapsed:.1f}x real time")
+
+    return totals